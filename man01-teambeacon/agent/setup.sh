@@ -145,9 +145,9 @@ fi
 echo ""
 echo "Deploy to AWS:"
 if [ -n "$PROFILE" ]; then
-    echo "  cd ../infra && ./deploy.sh -p $PROFILE"
+    echo "  cd ../infra && ./deploy.sh -p $PROFILE -c path/to/content.json"
 else
-    echo "  cd ../infra && ./deploy.sh"
+    echo "  cd ../infra && ./deploy.sh -c path/to/content.json"
 fi
 echo ""
 echo "Agent Details:"
@@ -42,6 +42,8 @@ OPTIONS:
     -r, --region REGION      AWS region [default: us-west-2]
     -p, --profile PROFILE    AWS CLI profile to use
     -b, --bucket BUCKET      S3 bucket for Lambda code (optional - auto-generated if not provided)
+    -c, --content FILE       Content JSON to build the hybrid ranking index from
+                             (required unless ../lambda/hybrid_index.json.gz exists)
     -h, --help              Display this help message
     --no-confirm            Skip confirmation prompts
     --validate-only         Only validate the template
@@ -49,7 +51,7 @@ OPTIONS:
 
 EXAMPLES:
     # Deploy to dev environment (bucket auto-created)
-    $0
+    $0 -c ../test/content/transformed_content.json
 
     # Deploy with custom bucket
     $0 -b my-lambda-code-bucket
@@ -72,6 +74,7 @@ NO_CONFIRM=false
 VALIDATE_ONLY=false
 DELETE_STACK=false
 LAMBDA_BUCKET=""
+CONTENT_FILE="${HYBRID_CONTENT_FILE:-}"
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -91,6 +94,10 @@ while [[ $# -gt 0 ]]; do
             LAMBDA_BUCKET="$2"
             shift 2
             ;;
+        -c|--content)
+            CONTENT_FILE="$2"
+            shift 2
+            ;;
         --no-confirm)
             NO_CONFIRM=true
             shift
@@ -119,6 +126,22 @@ if [[ ! "$ENVIRONMENT" =~ ^(dev|staging|prod)$ ]]; then
     exit 1
 fi
 
+# The ranking index must be built from the content the table is populated
+# with - there is no default, so test content never ships by accident
+if [ "$DELETE_STACK" = false ] && [ "$VALIDATE_ONLY" = false ] && [ ! -f ../lambda/hybrid_index.json.gz ]; then
+    if [ -z "$CONTENT_FILE" ]; then
+        print_error "No content file for the hybrid ranking index. Pass -c/--content FILE"
+        print_error "(or put a prebuilt hybrid_index.json.gz in ../lambda)"
+        exit 1
+    fi
+    if [ ! -f "$CONTENT_FILE" ]; then
+        print_error "Content file not found: $CONTENT_FILE"
+        exit 1
+    fi
+    # Absolute path, since packaging runs from ../lambda
+    CONTENT_FILE="$(cd "$(dirname "$CONTENT_FILE")" && pwd)/$(basename "$CONTENT_FILE")"
+fi
+
 # Set stack name
 STACK_NAME="teambeacon"
 
@@ -198,7 +221,16 @@ trap "rm -rf $TEMP_DIR" EXIT
 # Package Unified Handler
 print_info "Packaging unified handler..."
 cd ../lambda
-zip -q -r "$TEMP_DIR/unified-handler.zip" unified_handler.py
+# Hybrid ranking index (loaded at cold start) - built from the content file
+# given with -c unless a prebuilt hybrid_index.json.gz is present
+if [ ! -f hybrid_index.json.gz ]; then
+    print_info "Building hybrid ranking index from $CONTENT_FILE..."
+    python3 hybrid_ranker.py build "$CONTENT_FILE" "$TEMP_DIR/hybrid_index.json.gz"
+else
+    cp hybrid_index.json.gz "$TEMP_DIR/hybrid_index.json.gz"
+fi
+zip -q -r "$TEMP_DIR/unified-handler.zip" unified_handler.py hybrid_ranker.py
+zip -q -j "$TEMP_DIR/unified-handler.zip" "$TEMP_DIR/hybrid_index.json.gz"
 cd - > /dev/null
 
 # Package Transcribe Function
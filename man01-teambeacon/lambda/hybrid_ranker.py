@@ -0,0 +1,314 @@
+"""
+Hybrid content ranker: BM25 text relevance + tag overlap + optional vector
+similarity, fused with reciprocal rank fusion (RRF).
+
+The index is built offline into one compact gzipped JSON file that ships with
+the Lambda package and is loaded once per cold start, so ranking needs no
+network calls.
+
+Build:
+    python3 hybrid_ranker.py build ../test/content/transformed_content.json hybrid_index.json.gz
+    python3 hybrid_ranker.py build content.json hybrid_index.json.gz --vectors ../../resource-classification-system/output/kb_index
+
+Try a query:
+    python3 hybrid_ranker.py query hybrid_index.json.gz "memory problems after encephalitis" --content content.json
+"""
+import base64
+import gzip
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+INDEX_VERSION = 1
+
+# Field weights: a term in the title counts as three occurrences (BM25F-style)
+FIELD_WEIGHTS = {'title': 3, 'summary': 2, 'content': 1}
+
+# RRF constant and per-signal weights
+RRF_K = 60
+SIGNAL_WEIGHTS = {'bm25': 1.0, 'tags': 1.0, 'vector': 1.0}
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be been before being but by can could do
+does for from had has have how i if in into is it its just me more most my no not of on or our
+out so some than that the their them then there these they this to too up us very was we were
+what when where which who why will with would you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens without stopwords, with light plural stemming."""
+    tokens = []
+    for word in _WORD.findall((text or '').lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def content_id_for(item):
+    """content_id of an item (derived from the URL like populate_content.py when missing)."""
+    if item.get('content_id'):
+        return item['content_id']
+    return f"enc-{hashlib.md5(item.get('url', '').encode()).hexdigest()[:8]}"
+
+
+def build_index(items, vectors=None, k1=1.2, b=0.75):
+    """
+    Build the ranking index.
+
+    Args:
+        items: content dicts with title, summary, content/full_content and tag lists
+        vectors: optional {'model_id', 'dimensions', 'by_url': {url: [floats]}}
+        k1, b: BM25 parameters
+
+    Returns:
+        dict: JSON-serialisable index
+    """
+    doc_ids = []
+    lengths = []
+    postings = {}
+
+    for doc, item in enumerate(items):
+        doc_ids.append(content_id_for(item))
+        term_counts = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            text = item.get(field) or (item.get('full_content') if field == 'content' else '')
+            for token in tokenize(text):
+                term_counts[token] += weight
+        lengths.append(sum(term_counts.values()))
+        for term, tf in term_counts.items():
+            postings.setdefault(term, []).extend((doc, tf))
+
+    count = len(doc_ids)
+    index = {
+        'version': INDEX_VERSION,
+        'built_at': datetime.now().isoformat(),
+        'k1': k1,
+        'b': b,
+        'avgdl': (sum(lengths) / count) if count else 0.0,
+        'docs': doc_ids,
+        'lengths': lengths,
+        # term -> [idf, doc, tf, doc, tf, ...]
+        'postings': {
+            term: [round(math.log(1 + (count - len(flat) / 2 + 0.5) / (len(flat) / 2 + 0.5)), 4)] + flat
+            for term, flat in postings.items()
+        },
+    }
+
+    if vectors:
+        # int8-quantised, L2-normalised vectors (base64) - a quarter of float32 size
+        encoded = []
+        for item in items:
+            vector = vectors['by_url'].get(item.get('url', ''))
+            if vector is None:
+                encoded.append(None)
+                continue
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            quantised = bytes((max(-127, min(127, round(x / norm * 127))) & 0xFF) for x in vector)
+            encoded.append(base64.b64encode(quantised).decode('ascii'))
+        index['vectors'] = {
+            'model_id': vectors.get('model_id'),
+            'dimensions': vectors['dimensions'],
+            'docs': encoded,
+        }
+    return index
+
+
+def save_index(index, path):
+    """Write an index as gzipped JSON."""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+
+class HybridRanker:
+    """Ranks content items for a query and a set of tags (see module docstring)."""
+
+    def __init__(self, index):
+        self.k1 = index['k1']
+        self.b = index['b']
+        self.avgdl = index['avgdl'] or 1.0
+        self.docs = index['docs']
+        self.doc_numbers = {content_id: doc for doc, content_id in enumerate(self.docs)}
+        self.lengths = index['lengths']
+        self.postings = index['postings']
+        self.built_at = index.get('built_at')
+
+        self.vector_model = None
+        self.vectors = None
+        if index.get('vectors'):
+            self.vector_model = index['vectors'].get('model_id')
+            self.vector_dimensions = index['vectors']['dimensions']
+            self.vectors = index['vectors']['docs']
+            self._decoded = {}
+
+    @classmethod
+    def load(cls, path):
+        """Load an index file written by save_index."""
+        start = time.time()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            ranker = cls(json.load(f))
+        print(f"🧭 [HYBRID] Loaded index: {len(ranker.docs)} docs, {len(ranker.postings)} terms "
+              f"({(time.time() - start) * 1000:.0f} ms)")
+        return ranker
+
+    def bm25_scores(self, query):
+        """BM25 score per document number for a query string."""
+        scores = {}
+        for term in set(tokenize(query)):
+            entry = self.postings.get(term)
+            if not entry:
+                continue
+            idf = entry[0]
+            for i in range(1, len(entry), 2):
+                doc, tf = entry[i], entry[i + 1]
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avgdl)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    @staticmethod
+    def tag_score(item, all_tags):
+        """Number of (category, tag) pairs the item carries."""
+        score = 0
+        for tag_category, tag_value in all_tags:
+            category_tags = item.get(tag_category, [])
+            if isinstance(category_tags, list) and tag_value in category_tags:
+                score += 1
+        return score
+
+    def _vector(self, doc):
+        if doc not in self._decoded:
+            encoded = self.vectors[doc]
+            self._decoded[doc] = [x - 256 if x > 127 else x for x in base64.b64decode(encoded)] if encoded else None
+        return self._decoded[doc]
+
+    def vector_scores(self, query_vector, docs=None):
+        """Cosine similarity per document number (documents without a vector are skipped)."""
+        if not self.vectors or not query_vector:
+            return {}
+        norm = math.sqrt(sum(x * x for x in query_vector)) or 1.0
+        query = [x / norm for x in query_vector]
+        scores = {}
+        for doc in (range(len(self.docs)) if docs is None else docs):
+            vector = self._vector(doc)
+            if vector is not None:
+                scores[doc] = sum(x * y for x, y in zip(query, vector)) / 127.0
+        return scores
+
+    def rank(self, items, all_tags, query='', query_vector=None, limit=20):
+        """
+        Order items by reciprocal rank fusion of BM25, tag overlap and vector similarity.
+
+        Args:
+            items: candidate content items (dicts with content_id and tag lists)
+            all_tags: list of (category, tag) pairs from the classification
+            query: free text of the user's question
+            query_vector: optional query embedding (same model as the index vectors)
+            limit: maximum number of items returned
+
+        Returns:
+            list of (fused_score, item, signals) - signals holds each signal's raw score
+        """
+        candidates = [self.doc_numbers.get(item.get('content_id')) for item in items]
+        bm25 = self.bm25_scores(query) if query else {}
+        vectors = self.vector_scores(query_vector, [doc for doc in candidates if doc is not None]) if query_vector else {}
+
+        signals = []
+        for position, (item, doc) in enumerate(zip(items, candidates)):
+            signals.append({
+                'position': position,
+                'bm25': bm25.get(doc, 0.0) if doc is not None else 0.0,
+                'tags': self.tag_score(item, all_tags),
+                'vector': vectors.get(doc) if doc is not None else None,
+            })
+
+        fused = [0.0] * len(items)
+        for signal, weight in SIGNAL_WEIGHTS.items():
+            ranked = [s for s in signals if s[signal] is not None and s[signal] > 0]
+            ranked.sort(key=lambda s: (-s[signal], s['position']))
+            for rank, s in enumerate(ranked, 1):
+                fused[s['position']] += weight / (RRF_K + rank)
+
+        order = sorted((i for i in range(len(items)) if fused[i] > 0), key=lambda i: (-fused[i], i))
+        return [
+            (fused[i], items[i], {key: signals[i][key] for key in ('bm25', 'tags', 'vector')})
+            for i in order[:limit]
+        ]
+
+
+def load_ranker(path):
+    """Load the ranker at cold start; None (tag-only ranking) if the index is missing or invalid."""
+    try:
+        return HybridRanker.load(path)
+    except FileNotFoundError:
+        print(f"⚠️  [HYBRID] No index at {path} - using tag-overlap ranking")
+    except Exception as e:
+        print(f"⚠️  [HYBRID] Could not load index {path}: {e} - using tag-overlap ranking")
+    return None
+
+
+def _load_vectors(index_dir):
+    """Document vectors (by URL) from a local vector index directory (embeddings.npy + documents.json)."""
+    import numpy as np
+
+    with open(f"{index_dir}/index.json", 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    with open(f"{index_dir}/documents.json", 'r', encoding='utf-8') as f:
+        documents = json.load(f)
+    embeddings = np.load(f"{index_dir}/embeddings.npy", mmap_mode='r')
+    return {
+        'model_id': info['embedder'].get('model_id'),
+        'dimensions': info['dimensions'],
+        'by_url': {
+            document['metadata'].get('url', ''): embeddings[row].tolist()
+            for row, document in enumerate(documents) if document['metadata'].get('url')
+        },
+    }
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] not in ('build', 'query'):
+        print(__doc__)
+        return 1
+
+    if argv[0] == 'build':
+        source, output = argv[1], argv[2]
+        with open(source, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        vectors = None
+        if '--vectors' in argv:
+            vectors_idx = argv.index('--vectors')
+            if vectors_idx + 1 < len(argv):
+                vectors = _load_vectors(argv[vectors_idx + 1])
+        index = build_index(items, vectors)
+        save_index(index, output)
+        print(f"✅ [HYBRID] {len(index['docs'])} docs, {len(index['postings'])} terms"
+              f"{', vectors' if vectors else ''} -> {output}")
+        return 0
+
+    ranker = HybridRanker.load(argv[1])
+    query = argv[2]
+    items = [{'content_id': content_id} for content_id in ranker.docs]
+    if '--content' in argv:
+        content_idx = argv.index('--content')
+        if content_idx + 1 < len(argv):
+            with open(argv[content_idx + 1], 'r', encoding='utf-8') as f:
+                items = [dict(item, content_id=content_id_for(item)) for item in json.load(f)]
+    for score, item, signals in ranker.rank(items, [], query=query, limit=10):
+        print(f"{score:.4f}  bm25={signals['bm25']:.2f}  {item.get('title', item['content_id'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -5,6 +5,12 @@ from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 from decimal import Decimal
 
+try:
+    from hybrid_ranker import load_ranker
+except ImportError:
+    # Packages built without hybrid_ranker.py fall back to tag-overlap ranking
+    load_ranker = None
+
 # Initialize AWS clients
 bedrock_client = boto3.client("bedrock-runtime", region_name=os.environ.get('BEDROCK_REGION', 'us-west-2'))
 bedrock_agent_runtime = boto3.client("bedrock-agent-runtime", region_name=os.environ.get('BEDROCK_REGION', 'us-west-2'))
@@ -15,6 +21,16 @@ AGENT_ID = "28QQU2KK4R"
 ALIAS_ID = "TSTALIASID"  # Test alias points to DRAFT with inference profile
 USE_AGENT = os.environ.get('USE_AGENT', 'true').lower() == 'true'
 
+# Hybrid ranking index (BM25 + tags + optional vectors), built offline with
+# hybrid_ranker.py and loaded once per cold start - tag-overlap ranking if missing
+HYBRID_INDEX_PATH = os.environ.get(
+    'HYBRID_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hybrid_index.json.gz')
+)
+HYBRID_RANKER = load_ranker(HYBRID_INDEX_PATH) if load_ranker else None
+# Vector similarity needs one Titan embedding call per request, so it is opt-in
+HYBRID_VECTOR_SEARCH = os.environ.get('HYBRID_VECTOR_SEARCH', 'false').lower() == 'true'
+
 # Mapping userRole to persona tags
 USER_ROLE_TO_PERSONA = {
     "patient": "persona:patient",
@@ -113,7 +129,7 @@ def lambda_handler(event, context):
         # ============================================
         print("\n🔍 [STEP 2] Querying DynamoDB for relevant content...")
         limit = event.get('limit', 20)
-        content_results = query_dynamodb(classification, limit)
+        content_results = query_dynamodb(classification, limit, query_text=build_query_text(event))
         print(f"✅ [STEP 2] Found {content_results['count']} items")
         
         # ============================================
@@ -126,7 +142,8 @@ def lambda_handler(event, context):
                 'classification': classification,
                 'items': content_results['items'],
                 'count': content_results['count'],
-                'scanned_count': content_results['scanned_count']
+                'scanned_count': content_results['scanned_count'],
+                'ranking': content_results['ranking']
             })
         }
         
@@ -420,16 +437,44 @@ Guidelines:
         return {"personas": [], "types": [], "stages": [], "topics": []}
 
 
-def query_dynamodb(classification, limit=20):
+def build_query_text(event):
+    """Free text for BM25: the user's query plus their concerns/challenges."""
+    user_data = event.get('userData', {})
+    parts = [event.get('userQuery', '') or '']
+    if isinstance(user_data, dict):
+        for concern in (user_data.get('concerns') or []) + (user_data.get('challenges') or []):
+            parts.append(str(concern).replace('_', ' '))
+    return ' '.join(part for part in parts if part).strip()
+
+
+def embed_query(text):
+    """Titan embedding of the query for vector ranking (None if disabled or unavailable)."""
+    if not (HYBRID_VECTOR_SEARCH and text and HYBRID_RANKER and HYBRID_RANKER.vectors):
+        return None
+    try:
+        response = bedrock_client.invoke_model(
+            modelId=HYBRID_RANKER.vector_model or 'amazon.titan-embed-text-v2:0',
+            body=json.dumps({'inputText': text, 'dimensions': HYBRID_RANKER.vector_dimensions, 'normalize': True}),
+            contentType='application/json',
+            accept='application/json'
+        )
+        return json.loads(response['body'].read())['embedding']
+    except Exception as e:
+        print(f"⚠️  [HYBRID] Query embedding failed: {str(e)} - ranking without vectors")
+        return None
+
+
+def query_dynamodb(classification, limit=20, query_text=''):
     """
     Query DynamoDB for content matching the classification tags.
     
     Args:
         classification: dict with personas, types, stages, topics
         limit: Maximum number of results to return
+        query_text: User's free text, for hybrid (BM25 + tag + vector) ranking
     
     Returns:
-        dict: items, count, scanned_count
+        dict: items, count, scanned_count, ranking
     """
     table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'ContentMetadata')
     print(f"📋 [DYNAMODB] Table: {table_name}")
@@ -482,7 +527,13 @@ def query_dynamodb(classification, limit=20):
     items = [convert_dynamodb_item(item) for item in items]
     
     # Score and rank by relevance
-    if all_tags:
+    ranking = 'tags'
+    if HYBRID_RANKER and (all_tags or query_text):
+        ranked = HYBRID_RANKER.rank(items, all_tags, query=query_text, query_vector=embed_query(query_text), limit=limit)
+        items = [item for _, item, _ in ranked]
+        ranking = 'hybrid'
+        print(f"📦 [DYNAMODB] Returning top {len(items)} items by hybrid ranking (limit={limit})")
+    elif all_tags:
         scored_items = []
         for item in items:
             score = calculate_relevance_score(item, all_tags)
@@ -499,7 +550,8 @@ def query_dynamodb(classification, limit=20):
     return {
         'items': items,
         'count': len(items),
-        'scanned_count': scanned_count
+        'scanned_count': scanned_count,
+        'ranking': ranking
     }
 
 
@@ -2,13 +2,22 @@
 """
 Script to anonymize personal information in Excel file
 Replaces names, emails, and contact information with generic placeholders
+
+Use --stream for large workbooks: rows are read and written one at a time
+(openpyxl read-only/write-only) instead of loading each sheet into pandas.
+Placeholders are numbered in row order rather than column order, so the
+numbers can differ from a pandas run, and fully blank rows are dropped.
 """
 
 import pandas as pd
 import re
+import sys
+from pathlib import Path
 from faker import Faker
 import random
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 fake = Faker()
 Faker.seed(42)
 random.seed(42)
@@ -86,46 +95,62 @@ def anonymize_text_field(text):
     
     return text_str
 
-# Read all sheets
-xls = pd.ExcelFile(input_file)
+def anonymize_brain_bank_value(value):
+    """Replace any text that is not an institution/contact detail"""
+    if isinstance(value, str) and not any(word in str(value).lower() for word in
+                                          ['bank', 'department', 'hospital', 'oxford', 'tel:', 'level', 'wing']):
+        return 'Generic Contact'
+    return value
+
+def column_rules(sheet_name, columns):
+    """Anonymizer for each column of a sheet (other columns are copied unchanged)"""
+    if sheet_name == 'Encephalitis Orgs':
+        rules = {'Key Contact': anonymize_name, 'Email': anonymize_email, 'Generic Email': anonymize_email}
+        # Anonymize names in URLs and text
+        for col in ['Facebook', 'Twitter/X', 'Instagram', 'LinkedIn', 'website']:
+            rules[col] = anonymize_text_field
+    elif sheet_name == 'Country Contacts':
+        rules = {'Name': anonymize_name, 'Email': anonymize_email}
+    elif sheet_name == 'Brain Bank':
+        # Anonymize all text in this sheet
+        rules = {col: anonymize_brain_bank_value for col in columns}
+    else:
+        rules = {}
+    return {col: rule for col, rule in rules.items() if col in columns}
 
-# Create Excel writer
-with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+if '--stream' in sys.argv:
+    from scripts.excel_stream import StreamingWorkbook, StreamingWriter
     
-    # Process each sheet
-    for sheet_name in xls.sheet_names:
-        print(f"Processing sheet: {sheet_name}")
-        df = pd.read_excel(xls, sheet_name)
-        
-        # Anonymize based on sheet type
-        if sheet_name == 'Encephalitis Orgs':
-            if 'Key Contact' in df.columns:
-                df['Key Contact'] = df['Key Contact'].apply(anonymize_name)
-            if 'Email' in df.columns:
-                df['Email'] = df['Email'].apply(anonymize_email)
-            if 'Generic Email' in df.columns:
-                df['Generic Email'] = df['Generic Email'].apply(anonymize_email)
-            # Anonymize names in URLs and text
-            for col in ['Facebook', 'Twitter/X', 'Instagram', 'LinkedIn', 'website']:
-                if col in df.columns:
-                    df[col] = df[col].apply(anonymize_text_field)
-        
-        elif sheet_name == 'Country Contacts':
-            if 'Name' in df.columns:
-                df['Name'] = df['Name'].apply(anonymize_name)
-            if 'Email' in df.columns:
-                df['Email'] = df['Email'].apply(anonymize_email)
-        
-        elif sheet_name == 'Brain Bank':
-            # Anonymize all text in this sheet
-            for col in df.columns:
-                df[col] = df[col].apply(lambda x: 'Generic Contact' if isinstance(x, str) and 
-                                       not any(word in str(x).lower() for word in 
-                                       ['bank', 'department', 'hospital', 'oxford', 'tel:', 'level', 'wing']) 
-                                       else x)
+    # Read and write one row at a time
+    with StreamingWorkbook(input_file) as source, StreamingWriter(output_file) as target:
+        for sheet_name in source:
+            print(f"Processing sheet: {sheet_name}")
+            columns = source.columns(sheet_name)
+            rules = column_rules(sheet_name, columns)
+            target.add_sheet(sheet_name, columns)
+            
+            for _, row in source.rows(sheet_name):
+                for col, rule in rules.items():
+                    row[col] = rule(row[col])
+                target.write_row(row)
+else:
+    # Read all sheets
+    xls = pd.ExcelFile(input_file)
+    
+    # Create Excel writer
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
         
-        # Write to new file
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        # Process each sheet
+        for sheet_name in xls.sheet_names:
+            print(f"Processing sheet: {sheet_name}")
+            df = pd.read_excel(xls, sheet_name)
+            
+            # Anonymize based on sheet type
+            for col, rule in column_rules(sheet_name, df.columns).items():
+                df[col] = df[col].apply(rule)
+            
+            # Write to new file
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
     
 print(f"\nAnonymization complete!")
 print(f"Output saved to: {output_file}")
@@ -18,24 +18,35 @@ USAGE:
     Then open: http://localhost:5001
 """
 
-from flask import Flask, jsonify, render_template_string, send_file
+from flask import Flask, Response, jsonify, render_template_string, stream_with_context
 from flask_cors import CORS
 import json
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
 import threading
 import time
-import io
+import sys
+
+# Configuration - Use paths relative to project root
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.checkpoint_journal import JournalFollower
+from scripts.classification_store import ClassificationStore
+from scripts.json_stream import iter_json_array
 
 app = Flask(__name__)
 CORS(app)
 
-# Configuration - Use paths relative to project root
-PROJECT_ROOT = Path(__file__).parent.parent
+# Pipelines write append-only journals; the JSON files are the older checkpoint format
+JOURNAL_FILE = PROJECT_ROOT / 'temp' / 'progress_checkpoint.jsonl'
+JOURNAL_FILE_CACHED = PROJECT_ROOT / 'temp' / 'progress_checkpoint_cached.jsonl'
 CHECKPOINT_FILE = PROJECT_ROOT / 'temp' / 'progress_checkpoint.json'
 CHECKPOINT_FILE_CACHED = PROJECT_ROOT / 'temp' / 'progress_checkpoint_cached.json'
+# Result store the pipelines record every run in (preferred when present)
+STORE_FILE = PROJECT_ROOT / 'temp' / 'classification_store.db'
 REFRESH_INTERVAL = 2  # seconds
 
 # Global state
@@ -47,8 +58,75 @@ monitoring_data = {
     'queue_items': []
 }
 
+# Followers only parse journal lines appended since the previous refresh
+journal_followers = [JournalFollower(str(JOURNAL_FILE)), JournalFollower(str(JOURNAL_FILE_CACHED))]
+
+result_store = None
+
+def get_result_store() -> Optional[ClassificationStore]:
+    """Open the result store once it exists"""
+    global result_store
+    if result_store is None and STORE_FILE.exists():
+        result_store = ClassificationStore(str(STORE_FILE))
+    return result_store
+
+def load_store_checkpoint() -> Optional[Dict[str, Any]]:
+    """
+    Latest pipeline run from the result store, in the checkpoint shape
+    
+    Results are not loaded; they are streamed from the store by run_id.
+    """
+    store = get_result_store()
+    if store is None:
+        return None
+    
+    run = store.latest_run()
+    if run is None:
+        return None
+    
+    metadata = dict(run['metadata'])
+    if run['status'] != 'running':
+        metadata['completed'] = run['status'] == 'completed' or metadata.get('completed', False)
+    
+    return {
+        'timestamp': run['updated_at'],
+        'metadata': metadata,
+        'run_id': run['run_id'],
+        'status': run['status']
+    }
+
+def iter_checkpoint_results(checkpoint: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Results of a checkpoint - streamed from the store for store-backed runs"""
+    if 'run_id' in checkpoint:
+        return get_result_store().iter_results(checkpoint['run_id'])
+    return checkpoint.get('results', [])
+
 def load_checkpoint() -> Dict[str, Any]:
-    """Load the most recent checkpoint file"""
+    """Load the most recent checkpoint (result store or progress journals, then legacy JSON files)"""
+    journal_checkpoint = None
+    for follower in journal_followers:
+        try:
+            follower.poll()
+            snapshot = follower.snapshot()
+            if snapshot:
+                journal_checkpoint = snapshot
+                break
+        except Exception as e:
+            print(f"Error reading {follower.path}: {e}")
+    
+    try:
+        store_checkpoint = load_store_checkpoint()
+    except Exception as e:
+        print(f"Error reading {STORE_FILE}: {e}")
+        store_checkpoint = None
+    
+    # Runs with --no-store only write the journal, so use whichever is newer
+    if store_checkpoint and (not journal_checkpoint
+                             or store_checkpoint['timestamp'] >= journal_checkpoint['timestamp']):
+        return store_checkpoint
+    if journal_checkpoint:
+        return journal_checkpoint
+    
     for checkpoint_file in [CHECKPOINT_FILE, CHECKPOINT_FILE_CACHED]:
         if checkpoint_file.exists():
             try:
@@ -60,26 +138,30 @@ def load_checkpoint() -> Dict[str, Any]:
 
 def calculate_stats(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate comprehensive statistics from checkpoint data"""
-    if not checkpoint or 'results' not in checkpoint:
+    if not checkpoint or ('results' not in checkpoint and 'run_id' not in checkpoint):
         return None
     
-    results = checkpoint['results']
     metadata = checkpoint.get('metadata', {})
     
     # Basic stats
-    total = len(results)
-    successful = len([r for r in results if 'error' not in r])
-    errors = len([r for r in results if 'error' in r])
+    total = 0
+    successful = 0
+    errors = 0
     
     # Tag statistics with detailed counting
     personas = {}
     stages = {}
     topics = {}
     types = {}
+    confidence_scores = []
     
-    for result in results:
+    # Single pass, so store-backed results are streamed rather than loaded
+    for result in iter_checkpoint_results(checkpoint):
+        total += 1
         if 'error' in result:
+            errors += 1
             continue
+        successful += 1
         
         refined = result.get('refined', {})
         tags = refined.get('refined_tags', {})
@@ -103,25 +185,26 @@ def calculate_stats(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
         for type_tag in tags.get('types', []):
             clean_name = type_tag.replace('type:', '').replace('_', ' ').title()
             types[clean_name] = types.get(clean_name, 0) + 1
+        
+        # Confidence scores
+        score = refined.get('confidence_score', 0)
+        if score == 0 or score is None:
+            scores_obj = refined.get('confidence_scores', {})
+            if isinstance(scores_obj, dict):
+                score = scores_obj.get('overall_classification', 0)
+        if score and score > 0:
+            confidence_scores.append(score)
     
-    # Progress calculation
+    # Progress calculation - total is None while an open-ended run
+    # (no --limit) is still going, so there is no percentage to show
     last_processed = metadata.get('last_processed', total)
     total_expected = metadata.get('total', total)
-    progress_pct = (last_processed / total_expected * 100) if total_expected > 0 else 0
-    items_left = total_expected - last_processed
-    
-    # Confidence scores
-    confidence_scores = []
-    for result in results:
-        if 'error' not in result:
-            refined = result.get('refined', {})
-            score = refined.get('confidence_score', 0)
-            if score == 0 or score is None:
-                scores_obj = refined.get('confidence_scores', {})
-                if isinstance(scores_obj, dict):
-                    score = scores_obj.get('overall_classification', 0)
-            if score > 0:
-                confidence_scores.append(score)
+    if total_expected is None:
+        progress_pct = None
+        items_left = None
+    else:
+        progress_pct = (last_processed / total_expected * 100) if total_expected > 0 else 0
+        items_left = total_expected - last_processed
     
     avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
     
@@ -152,10 +235,14 @@ def calculate_stats(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
 
 def get_queue_items(checkpoint: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get processing queue items with status"""
-    if not checkpoint or 'results' not in checkpoint:
+    if not checkpoint:
         return []
     
-    results = checkpoint['results'][-20:]  # Last 20 items
+    # Last 20 items
+    if 'run_id' in checkpoint:
+        results = get_result_store().recent_results(checkpoint['run_id'], limit=20)
+    else:
+        results = checkpoint.get('results', [])[-20:]
     
     queue_items = []
     for result in results:
@@ -200,7 +287,10 @@ def monitor_checkpoint():
                 monitoring_data['stats'] = stats
                 monitoring_data['queue_items'] = queue_items
                 monitoring_data['last_update'] = datetime.now().isoformat()
-                monitoring_data['is_running'] = not checkpoint.get('metadata', {}).get('completed', False)
+                if 'status' in checkpoint:
+                    monitoring_data['is_running'] = checkpoint['status'] == 'running'
+                else:
+                    monitoring_data['is_running'] = not checkpoint.get('metadata', {}).get('completed', False)
         except Exception as e:
             print(f"Error in monitoring thread: {e}")
         
@@ -233,23 +323,24 @@ def export_data():
     if not checkpoint:
         return jsonify({'error': 'No data available'}), 404
     
-    # Create export file
-    export_data = {
-        'exported_at': datetime.now().isoformat(),
-        'stats': monitoring_data['stats'],
-        'results': checkpoint.get('results', [])
-    }
+    exported_at = datetime.now()
+    stats = monitoring_data['stats']
     
-    # Return as downloadable file
-    output = io.BytesIO()
-    output.write(json.dumps(export_data, indent=2).encode('utf-8'))
-    output.seek(0)
+    # Same document as json.dumps({'exported_at', 'stats', 'results'}, indent=2),
+    # streamed so results come straight from the store instead of a prebuilt copy
+    def generate():
+        yield '{\n  "exported_at": ' + json.dumps(exported_at.isoformat())
+        yield ',\n  "stats": ' + json.dumps(stats, indent=2).replace('\n', '\n  ')
+        yield ',\n  "results": '
+        yield from iter_json_array(iter_checkpoint_results(checkpoint), indent=2, level=1)
+        yield '\n}'
     
-    return send_file(
-        output,
+    # Return as downloadable file
+    filename = f'classification_export_{exported_at.strftime("%Y%m%d_%H%M%S")}.json'
+    return Response(
+        stream_with_context(generate()),
         mimetype='application/json',
-        as_attachment=True,
-        download_name=f'classification_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 # Enhanced Dashboard HTML
@@ -731,10 +822,17 @@ DASHBOARD_HTML = """
                     }
 
                     // Update progress
-                    const progressPct = Math.round(stats.progress.percentage);
-                    document.getElementById('progress-fill').style.width = progressPct + '%';
-                    document.getElementById('progress-percentage').textContent = progressPct + '%';
-                    document.getElementById('items-left').textContent = stats.progress.items_left || 0;
+                    if (stats.progress.percentage === null) {
+                        // Open-ended run: the total isn't known until it finishes
+                        document.getElementById('progress-fill').style.width = '0%';
+                        document.getElementById('progress-percentage').textContent = stats.progress.processed + ' processed';
+                        document.getElementById('items-left').textContent = '?';
+                    } else {
+                        const progressPct = Math.round(stats.progress.percentage);
+                        document.getElementById('progress-fill').style.width = progressPct + '%';
+                        document.getElementById('progress-percentage').textContent = progressPct + '%';
+                        document.getElementById('items-left').textContent = stats.progress.items_left || 0;
+                    }
                     document.getElementById('export-count').textContent = stats.successful || 0;
 
                     // Update sitemap (show recent URLs)
@@ -3,12 +3,16 @@ Demo script to test live monitoring with 20 resources
 Simulates processing by creating checkpoint files with realistic data
 """
 
-import json
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
 import random
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.checkpoint_journal import CheckpointJournal
+
 def create_fake_result(idx, source_type='web_content'):
     """Create a realistic fake classification result"""
     
@@ -101,7 +105,9 @@ def simulate_processing(total_items=20, delay=3):
     """Simulate processing with checkpoint saves"""
     
     from pathlib import Path
-    checkpoint_file = Path(__file__).parent.parent / 'temp' / 'progress_checkpoint.json'
+    checkpoint_file = Path(__file__).parent.parent / 'temp' / 'progress_checkpoint.jsonl'
+    journal = CheckpointJournal(str(checkpoint_file))
+    journal.reset()
     
     print("\n" + "=" * 80)
     print("LIVE MONITORING TEST - 20 RESOURCES")
@@ -128,6 +134,7 @@ def simulate_processing(total_items=20, delay=3):
         # Create fake result
         result = create_fake_result(idx)
         results.append(result)
+        journal.append(result)
         
         # Print progress
         status = "✓" if 'error' not in result else "✗"
@@ -140,19 +147,12 @@ def simulate_processing(total_items=20, delay=3):
         
         # Save checkpoint every 5 items
         if idx % 5 == 0 or idx == total_items:
-            checkpoint = {
-                'timestamp': datetime.now().isoformat(),
-                'metadata': {
-                    'last_processed': idx,
-                    'total': total_items,
-                    'type': 'web_content',
-                    'completed': idx == total_items
-                },
-                'results': results
-            }
-            
-            with open(checkpoint_file, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
+            journal.checkpoint({
+                'last_processed': idx,
+                'total': total_items,
+                'type': 'web_content',
+                'completed': idx == total_items
+            })
             
             progress_pct = (idx / total_items) * 100
             print(f"   💾 Progress saved: {idx}/{total_items} ({progress_pct:.1f}%)")
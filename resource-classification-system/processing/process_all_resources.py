@@ -4,17 +4,30 @@ Uses AWS Bedrock Claude Opus 4.5 to classify all resources
 Outputs: DynamoDB JSON + Excel file for charity
 
 RESILIENT FEATURES:
-- Auto-saves progress every 5 items
+- Auto-saves progress every 5 items (append-only journal, each result persisted as it arrives)
 - Auto-resumes from last checkpoint
 - Network retry logic (3 attempts with exponential backoff)
-- Survives interruptions (max loss: 4 items)
+- Parallel classification (configurable workers, RPM/TPM rate limiting,
+  adaptive backoff on throttling, results kept in input order)
+- Optional batched prompts (N items per request within a token budget)
+- Prompt caching (static taxonomy sent as a cached system block, cache hits reported)
+- Optional Bedrock batch inference job for full-corpus runs (--batch-job)
+- Incremental runs: classifications stored by content hash, only new or
+  changed items are sent to Bedrock (--no-store to disable)
+- Results recorded per run in an SQLite store (WAL); output files are
+  written by streaming from it
+- Survives interruptions (max loss: items still in flight)
+- Large staff spreadsheets can be read row by row (--stream-excel)
 
 USAGE:
     Recommended (with resilient runner):
-        ./run_resilient.sh process_all_resources.py [--test]
+        ./run_resilient.sh process_all_resources.py [--test] [--workers N] [--batch-size N]
     
     Direct execution (still has auto-resume):
-        python3 process_all_resources.py [--test]
+        python3 process_all_resources.py [--test] [--workers N] [--batch-size N]
+    
+    Offline batch inference (one Bedrock job per source, or --batch-job-local to test):
+        python3 process_all_resources.py --batch-job --no-prompt
 
 For complete documentation, see RESILIENT_PROCESSING.md
 """
@@ -27,13 +40,21 @@ from pathlib import Path
 import time
 import sys
 import os
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 
 # Add parent directory to path so we can import from scripts/
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.excel_processor import LiveChatCribSheetProcessor, ContactsProcessor
-from scripts.bedrock_tag_refinement_prompt import BedrockTagRefinementPrompt
+from scripts.bedrock_tag_refinement_prompt import BedrockTagRefinementPrompt, PROMPT_VERSION
+from scripts.bedrock_executor import BedrockRateLimiter, TokenUsageTracker, estimate_tokens
+from scripts.batch_classification import BatchClassifier
+from scripts.batch_inference import write_manifest, BedrockBatchInferenceRunner, LocalBatchInferenceRunner
+from scripts.classification_store import ClassificationStore, content_hash
+from scripts.concurrent_executor import ConcurrentExecutor
+from scripts.checkpoint_journal import CheckpointJournal
+from scripts.json_stream import write_json_array, read_json_array
 
 
 def get_relative_path(path: Path) -> str:
@@ -70,17 +91,41 @@ class ResourceClassificationPipeline:
     - Automatic resume from last checkpoint
     - Network retry logic with exponential backoff
     - Graceful error handling
+    - Parallel classification with Bedrock quota-aware rate limiting
     
     The pipeline can be safely interrupted and resumed at any time.
-    Maximum data loss: 4 items (between checkpoints)
+    Maximum data loss: items still in flight (every result is journaled as it completes)
     """
     
-    def __init__(self, region_name: str = 'us-west-2'):
+    def __init__(
+        self,
+        region_name: str = 'us-west-2',
+        max_workers: int = 4,
+        requests_per_minute: int = 50,
+        tokens_per_minute: int = 400000,
+        batch_size: int = 1,
+        batch_token_budget: int = 60000,
+        batch_runner=None,
+        store_path: str = 'temp/classification_store.db',
+        stream_excel: bool = False
+    ):
         """
         Initialize pipeline with Claude Opus 4.5 and resilient processing
         
         Args:
             region_name: AWS region (default: us-west-2)
+            max_workers: Concurrent Bedrock calls (default: 4, use 1 for serial processing)
+            requests_per_minute: Bedrock RPM quota to stay under (default: 50)
+            tokens_per_minute: Bedrock TPM quota to stay under (default: 400,000)
+            batch_size: Web items per Bedrock request (default: 1 = one prompt per item;
+                        spreadsheet rows are always classified one per request)
+            batch_token_budget: Maximum estimated input tokens per batched request
+            batch_runner: Optional BedrockBatchInferenceRunner / LocalBatchInferenceRunner -
+                          classifies each source as one offline batch job instead
+                          of synchronous calls
+            store_path: Classification store for incremental runs (None = classify everything)
+            stream_excel: Read the Excel files row by row (openpyxl read-only) instead
+                          of loading whole sheets into pandas
         
         Raises:
             ValueError: If AWS credentials are not configured
@@ -106,13 +151,45 @@ class ResourceClassificationPipeline:
             region_name=region_name
         )
         
+        self.session = session
         self.bedrock_runtime = session.client('bedrock-runtime')
         self.model_id = 'global.anthropic.claude-opus-4-5-20251101-v1:0'
         self.prompt_builder = BedrockTagRefinementPrompt()
         self.results = []
+        self.max_tokens = 4096
+        
+        # Parallel execution with quota-aware rate limiting
+        self.rate_limiter = BedrockRateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute
+        )
+        self.executor = ConcurrentExecutor(max_workers=max_workers)
+        self.usage = TokenUsageTracker()
+        
+        # Batched classification (several items share one taxonomy preamble)
+        self.batch_size = max(1, batch_size)
+        self.batch_classifier = BatchClassifier(
+            invoke_text=self._invoke_text,
+            max_items=self.batch_size,
+            token_budget=batch_token_budget,
+            prompt_builder=self.prompt_builder
+        )
         
-        # Progress tracking for resilient processing
-        self.progress_file = 'temp/progress_checkpoint_cached.json'
+        # Offline batch inference (manifests are kept for inspection)
+        self.batch_runner = batch_runner
+        self.batch_job_dir = 'temp/batch_inference'
+        
+        # Content-hash store: unchanged items reuse their previous classification,
+        # and every processed item is recorded against the current run
+        self.store = ClassificationStore(store_path) if store_path else None
+        self.run_id = None
+        self.stream_excel = stream_excel
+        
+        # Progress tracking for resilient processing (append-only journal;
+        # the old whole-file JSON checkpoint is still read when resuming)
+        self.progress_file = 'temp/progress_checkpoint_cached.jsonl'
+        self.legacy_progress_file = 'temp/progress_checkpoint_cached.json'
+        self.journal = CheckpointJournal(self.progress_file)
         
         print(f"✅ Initialized with Claude Opus 4.5 (Global)")
         print(f"   Model: {self.model_id}")
@@ -121,79 +198,145 @@ class ResourceClassificationPipeline:
         print(f"   Resilient mode: ✅ Enabled (auto-save every 5 items)")
         print(f"   Network retry: ✅ Enabled (3 attempts with backoff)")
         print(f"   Auto-resume: ✅ Enabled (from checkpoint)")
+        print(f"   Parallel workers: {self.executor.max_workers} "
+              f"(limits: {requests_per_minute} RPM, {tokens_per_minute:,} TPM)")
+        if self.batch_size > 1:
+            print(f"   Batched prompts: ✅ Up to {self.batch_size} web items per request "
+                  f"(budget: {batch_token_budget:,} input tokens)")
+        if self.batch_runner:
+            print(f"   Batch inference: ✅ {type(self.batch_runner).__name__}")
+        if self.store is not None:
+            print(f"   Incremental: ✅ {len(self.store)} stored classifications "
+                  f"({get_relative_path(Path(self.store.db_path))})")
         print()
     
-    def save_progress(self, results: List[Dict[str, Any]], metadata: Dict[str, Any]):
+    def save_progress(self, metadata: Dict[str, Any]):
         """
-        Save progress to checkpoint file for resilient processing
+        Mark a checkpoint in the progress journal for resilient processing
+        
+        Results are appended to the journal as they arrive (see
+        record_result); this records progress metadata and fsyncs, so it
+        costs the same no matter how many results came before.
         
         Args:
-            results: List of processed results
             metadata: Processing metadata (last_processed, total, type, etc.)
         """
         try:
-            checkpoint = {
-                'timestamp': datetime.now().isoformat(),
-                'metadata': metadata,
-                'results': results
-            }
-            with open(self.progress_file, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
+            self.journal.checkpoint(metadata)
+            if self.store is not None and self.run_id:
+                self.store.update_run(self.run_id, metadata)
             
             # Print progress indicator
-            if 'last_processed' in metadata and 'total' in metadata:
+            if 'last_processed' in metadata and metadata.get('total'):
                 progress_pct = (metadata['last_processed'] / metadata['total']) * 100
                 print(f"   💾 Progress saved: {metadata['last_processed']}/{metadata['total']} ({progress_pct:.1f}%)")
+            elif 'last_processed' in metadata:
+                print(f"   💾 Progress saved: {metadata['last_processed']} items")
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save progress: {e}")
+    
+    def record_result(self, result: Dict[str, Any]):
+        """Append one result to the progress journal (O(1), fsynced in batches)"""
+        try:
+            self.journal.append(result)
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save progress: {e}")
+    
+    def finish_progress(self, results: Optional[List[Dict[str, Any]]], metadata: Dict[str, Any]):
+        """
+        Compact the journal to the final results (atomic rename)
+        
+        Streaming runs don't hold the results, so with results=None the
+        journal is left as is and only the final metadata is recorded.
+        """
+        try:
+            if results is None:
+                self.journal.checkpoint(metadata)
+            else:
+                self.journal.compact(results, metadata)
         except Exception as e:
             print(f"⚠️  Warning: Could not save progress: {e}")
     
     def load_progress(self) -> tuple:
         """
-        Load progress from checkpoint file for auto-resume
+        Load progress from the checkpoint journal for auto-resume
         
         Returns:
             Tuple of (results, metadata) from checkpoint, or ([], {}) if no checkpoint
         """
-        if Path(self.progress_file).exists():
-            try:
-                with open(self.progress_file, 'r') as f:
+        try:
+            if self.journal.exists():
+                results, metadata, timestamp = self.journal.replay()
+            elif Path(self.legacy_progress_file).exists():
+                with open(self.legacy_progress_file, 'r') as f:
                     checkpoint = json.load(f)
-                
                 results = checkpoint.get('results', [])
                 metadata = checkpoint.get('metadata', {})
-                
-                if results:
-                    print(f"📂 Found checkpoint from {checkpoint.get('timestamp', 'unknown time')}")
-                    if 'last_processed' in metadata:
-                        print(f"   Resuming from item {metadata['last_processed']}")
-                
-                return results, metadata
-            except Exception as e:
-                print(f"⚠️  Warning: Could not load progress: {e}")
-                print(f"   Starting fresh...")
+                timestamp = checkpoint.get('timestamp')
+                # Continue in journal form from here on
+                self.journal.compact(results, metadata)
+            else:
+                return [], {}
+            
+            if results:
+                print(f"📂 Found checkpoint from {timestamp or 'unknown time'}")
+                if 'last_processed' in metadata:
+                    print(f"   Resuming from item {metadata['last_processed']}")
+            
+            return results, metadata
+        except Exception as e:
+            print(f"⚠️  Warning: Could not load progress: {e}")
+            print(f"   Starting fresh...")
         return [], {}
-        
-    def classify_item(self, item: Dict[str, Any], source_type: str, max_retries: int = 3) -> Dict[str, Any]:
+    
+    def _invoke_model(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Classify a single item using Claude Opus 4.5 with network retry logic
+        Invoke Bedrock under the shared rate limiter
+        
+        Throttling errors are retried here with adaptive backoff; all other
+        errors propagate to the caller's retry logic.
         
         Args:
-            item: Item to classify
-            source_type: 'web_scraper', 'crib_sheet', or 'contacts'
-            max_retries: Number of retries on network errors (default: 3)
+            request_body: Anthropic Messages API request body
         
         Returns:
-            Classified item with refined tags, or error information
-        
-        Resilient Features:
-            - Automatic retry on network errors
-            - Exponential backoff (1s, 2s, 4s)
-            - Graceful error handling
+            Parsed response body
+        """
+        estimated = (estimate_tokens(json.dumps(request_body.get('system', [])))
+                     + estimate_tokens(json.dumps(request_body.get('messages', [])))
+                     + request_body.get('max_tokens', 0))
+        
+        response = self.rate_limiter.invoke(
+            lambda: self.bedrock_runtime.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps(request_body)
+            ),
+            estimated_tokens=estimated
+        )
+        response_body = json.loads(response['body'].read())
+        self.usage.record(response_body)
+        return response_body
+    
+    def _invoke_text(self, system_prompt: str, prompt: str, max_tokens: int) -> str:
+        """Send a cached system prompt plus a user prompt and return the response text"""
+        response_body = self._invoke_model(
+            self.prompt_builder.build_cached_request_body(system_prompt, prompt, max_tokens=max_tokens)
+        )
+        return response_body['content'][0]['text']
+    
+    def _build_prompts(self, item: Dict[str, Any], source_type: str) -> Tuple[str, str]:
         """
+        Build the (system_prompt, user_prompt) pair for an item
         
-        # Build appropriate prompt based on source type
+        Args:
+            item: Item to classify
+            source_type: 'web_scraper', 'crib_sheet', or 'contacts'
+        """
+        # Build appropriate prompt based on source type - the static framework
+        # goes in the cached system block, only the item details vary
         if source_type == 'web_scraper':
-            prompt = self.prompt_builder.build_tag_refinement_prompt(
+            system_prompt = self.prompt_builder.build_tag_refinement_system_prompt()
+            prompt = self.prompt_builder.build_tag_refinement_item_prompt(
                 url=item.get('url', ''),
                 title=item.get('title', ''),
                 summary=item.get('summary', ''),
@@ -201,7 +344,8 @@ class ResourceClassificationPipeline:
                 content_source='website'
             )
         else:  # crib_sheet or contacts
-            prompt = self.prompt_builder.build_spreadsheet_content_prompt(
+            system_prompt = self.prompt_builder.build_spreadsheet_system_prompt()
+            prompt = self.prompt_builder.build_spreadsheet_item_prompt(
                 spreadsheet_row={
                     'title': item.get('title', ''),
                     'description': item.get('description', item.get('summary', '')),
@@ -220,43 +364,53 @@ class ResourceClassificationPipeline:
                 }
             )
         
+        return system_prompt, prompt
+    
+    @staticmethod
+    def _parse_classification(content_text: str) -> Dict[str, Any]:
+        """Extract the classification JSON object from a model response"""
+        if '```json' in content_text:
+            json_start = content_text.find('```json') + 7
+            json_end = content_text.find('```', json_start)
+            json_text = content_text[json_start:json_end].strip()
+        elif '{' in content_text:
+            json_start = content_text.find('{')
+            json_end = content_text.rfind('}') + 1
+            json_text = content_text[json_start:json_end]
+        else:
+            json_text = content_text
+        
+        return json.loads(json_text)
+    
+    def classify_item(self, item: Dict[str, Any], source_type: str, max_retries: int = 3) -> Dict[str, Any]:
+        """
+        Classify a single item using Claude Opus 4.5 with network retry logic
+        
+        Args:
+            item: Item to classify
+            source_type: 'web_scraper', 'crib_sheet', or 'contacts'
+            max_retries: Number of retries on network errors (default: 3)
+        
+        Returns:
+            Classified item with refined tags, or error information
+        
+        Resilient Features:
+            - Automatic retry on network errors
+            - Exponential backoff (1s, 2s, 4s)
+            - Adaptive backoff on Bedrock throttling (via the shared rate limiter)
+            - Graceful error handling
+        
+        Safe to call from multiple worker threads.
+        """
+        
+        system_prompt, prompt = self._build_prompts(item, source_type)
+        
         # Retry logic for network issues
         for attempt in range(max_retries):
             try:
-                # Call Claude Sonnet 4.5
-                request_body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4096,
-                    "temperature": 0.3,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                }
-                
-                response = self.bedrock_runtime.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps(request_body)
-                )
-                
-                response_body = json.loads(response['body'].read())
-                content_text = response_body['content'][0]['text']
-                
-                # Extract JSON
-                if '```json' in content_text:
-                    json_start = content_text.find('```json') + 7
-                    json_end = content_text.find('```', json_start)
-                    json_text = content_text[json_start:json_end].strip()
-                elif '{' in content_text:
-                    json_start = content_text.find('{')
-                    json_end = content_text.rfind('}') + 1
-                    json_text = content_text[json_start:json_end]
-                else:
-                    json_text = content_text
-                
-                refined_data = json.loads(json_text)
+                # Call Claude Opus 4.5
+                content_text = self._invoke_text(system_prompt, prompt, self.max_tokens)
+                refined_data = self._parse_classification(content_text)
                 
                 # Combine original and refined data
                 result = {
@@ -287,6 +441,214 @@ class ResourceClassificationPipeline:
                     'processed_at': datetime.now().isoformat()
                 }
     
+    def _batch_input(self, item: Dict[str, Any], source_type: str) -> Dict[str, Any]:
+        """Convert a web scraper item to the batch prompt item format"""
+        return {
+            'url': item.get('url', ''),
+            'title': item.get('title', ''),
+            'summary': item.get('summary', ''),
+            'tags': item.get('tags', {}),
+            'source_type': 'website'
+        }
+    
+    def classify_batch(self, items: List[Dict[str, Any]], source_type: str) -> List[Dict[str, Any]]:
+        """
+        Classify several web scraper items with one batched prompt
+        
+        Items the batch response could not cover (even after split-and-retry)
+        fall back to the regular single-item prompt.
+        
+        Args:
+            items: Items to classify
+            source_type: 'web_scraper'
+        
+        Returns:
+            Result records in the same order as items
+        """
+        refined_list = self.batch_classifier.classify_batch(
+            [self._batch_input(item, source_type) for item in items]
+        )
+        
+        results = []
+        for item, refined_data in zip(items, refined_list):
+            if refined_data is None:
+                results.append(self.classify_item(item, source_type))
+                continue
+            
+            refined_data.pop('item_id', None)
+            results.append({
+                'source_type': source_type,
+                'original': item,
+                'refined': refined_data,
+                'processed_at': datetime.now().isoformat()
+            })
+        return results
+    
+    def classify_with_batch_job(self, items: Iterable[Dict[str, Any]], source_type: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify items with one offline batch inference job
+        
+        Writes each prompt to a JSONL manifest as the items arrive (the items
+        are spooled to a sidecar JSONL file rather than held in memory), runs
+        the manifest through self.batch_runner and turns the streamed output
+        records into the usual original/refined result records. Sources below
+        the runner's minimum record count, records the job could not classify
+        and every record of a job that failed, stopped or expired are
+        classified with synchronous calls instead.
+        
+        Args:
+            items: Items to classify (any iterable - consumed once)
+            source_type: 'web_scraper', 'crib_sheet', or 'contacts'
+        
+        Yields:
+            Tuples of (item, result, elapsed_seconds), in input order
+        """
+        start_time = time.time()
+        job_name = f"classify-{source_type.replace('_', '-')}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        manifest_path = str(Path(self.batch_job_dir) / f"{job_name}.jsonl")
+        items_path = str(Path(self.batch_job_dir) / f"{job_name}.items.jsonl")
+        
+        def records():
+            Path(items_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(items_path, 'w', encoding='utf-8') as spool:
+                for idx, item in enumerate(items):
+                    spool.write(json.dumps(item, ensure_ascii=False, default=str) + '\n')
+                    system_prompt, prompt = self._build_prompts(item, source_type)
+                    # Bedrock expects 11-character record IDs
+                    yield f"{idx:011d}", self.prompt_builder.build_cached_request_body(
+                        system_prompt, prompt, max_tokens=self.max_tokens, cache=False
+                    )
+        
+        def spooled_items():
+            with open(items_path, 'r', encoding='utf-8') as spool:
+                for line in spool:
+                    yield json.loads(line)
+        
+        count = write_manifest(records(), manifest_path)
+        
+        if count < self.batch_runner.min_records:
+            print(f"   ℹ️  {count} items is below the batch job minimum "
+                  f"({self.batch_runner.min_records}), using synchronous calls")
+            yield from self.executor.map_ordered(lambda item: self.classify_item(item, source_type), spooled_items())
+            return
+        
+        print(f"📝 Wrote batch manifest: {get_relative_path(Path(manifest_path))} ({count} records)")
+        
+        outputs = {}
+        job_failed = False
+        try:
+            for record_id, model_output, error in self.batch_runner.run(manifest_path, job_name):
+                outputs[int(record_id)] = (model_output, error)
+        except Exception as e:
+            job_failed = True
+            print(f"❌ Batch job {job_name} failed: {e}")
+            print(f"   Classifying the {count - len(outputs)} records without output synchronously")
+        
+        elapsed = (time.time() - start_time) / max(1, count)
+        failed = []
+        
+        def resolve(indexed):
+            """Result from the job output, or a synchronous call when there is none"""
+            idx, item = indexed
+            model_output, error = outputs.pop(idx, (None, 'Missing from batch output'))
+            
+            if model_output is not None:
+                self.usage.record(model_output)
+                try:
+                    return {
+                        'source_type': source_type,
+                        'original': item,
+                        'refined': self._parse_classification(model_output['content'][0]['text']),
+                        'processed_at': datetime.now().isoformat()
+                    }, True
+                except Exception as e:
+                    error = f"Could not parse batch output: {e}"
+            
+            failed.append(idx)
+            if not job_failed:
+                print(f"   ⚠️  Record {idx} failed in batch job ({error}), classifying directly")
+            return self.classify_item(item, source_type), False
+        
+        for (_, item), (result, from_job), item_time in self.executor.map_ordered(resolve, enumerate(spooled_items())):
+            yield item, result, elapsed if from_job else item_time
+        
+        print(f"✓ Batch job results: {count - len(failed)} from job, {len(failed)} classified directly")
+    
+    def _ensure_run(self) -> int:
+        """Current run in the result store (started on first use)"""
+        if self.run_id is None:
+            self.run_id = self.store.start_run('process_all_resources')
+        return self.run_id
+    
+    def _content_hash(self, item: Dict[str, Any], source_type: str) -> str:
+        """Store key for an item: its prompt content, the prompt version and the model"""
+        _, prompt = self._build_prompts(item, source_type)
+        return content_hash(f"{source_type}\n{prompt}", PROMPT_VERSION, self.model_id)
+    
+    def _classify_iter(self, items: Iterable[Dict[str, Any]], source_type: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify items, reusing stored classifications for unchanged items
+        
+        Only new or changed items reach Bedrock; results for all items come
+        back in input order and are recorded in the result store.
+        
+        Yields:
+            Tuples of (item, result, elapsed_seconds)
+        """
+        if self.store is None:
+            yield from self._classify_uncached(items, source_type)
+            return
+        
+        def from_stored(item, stored):
+            return {
+                'source_type': source_type,
+                'original': item,
+                'refined': stored['refined'],
+                'processed_at': stored['classified_at'],
+                'reused': True
+            }
+        
+        incremental = self.store.classify_incremental(
+            items,
+            source_type,
+            key_fn=lambda item: self._content_hash(item, source_type),
+            classify_iter=lambda misses: self._classify_uncached(misses, source_type),
+            to_refined=lambda result: None if 'error' in result else result.get('refined'),
+            from_stored=from_stored,
+            item_key_fn=lambda item: item.get('url') or item.get('title', ''),
+            # A batch job needs every miss of the source in one manifest
+            max_queued_hits=None if self.batch_runner else 256
+        )
+        run_id = self._ensure_run()
+        for item, result, elapsed, _, key in incremental:
+            self.store.record_result(run_id, result, key, item.get('url') or item.get('title', ''))
+            yield item, result, elapsed
+    
+    def _classify_uncached(self, items: Iterable[Dict[str, Any]], source_type: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify items in parallel (single or batched prompts), in input order
+        
+        Only web scraper items are batched; spreadsheet rows keep the
+        single-item prompt, which carries their full content and the
+        staff_context fields. With a batch runner configured, sources large
+        enough for a batch job are classified offline instead.
+        
+        Yields:
+            Tuples of (item, result, elapsed_seconds)
+        """
+        if self.batch_runner:
+            yield from self.classify_with_batch_job(items, source_type)
+            return
+        
+        if self.batch_size <= 1 or source_type != 'web_scraper':
+            yield from self.executor.map_ordered(lambda item: self.classify_item(item, source_type), items)
+            return
+        
+        batches = self.batch_classifier.pack(items, to_batch_item=lambda item: self._batch_input(item, source_type))
+        for batch, batch_results, elapsed in self.executor.map_ordered(lambda batch: self.classify_batch(batch, source_type), batches):
+            for item, result in zip(batch, batch_results):
+                yield item, result, elapsed / len(batch)
+    
     def process_web_scraper_data(self, json_file: str, limit: int = None, resume: bool = True) -> List[Dict]:
         """
         Process web scraper data with resilient processing
@@ -303,6 +665,27 @@ class ResourceClassificationPipeline:
             - Auto-resume from last checkpoint
             - Progress saved every 5 items
             - Can be safely interrupted and resumed
+            - Items classified in parallel, results collected in input order
+        """
+        return list(self.iter_web_scraper_data(json_file, limit, resume, keep_results=True))
+    
+    def iter_web_scraper_data(self, json_file: str, limit: int = None, resume: bool = True,
+                              keep_results: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Stream web scraper data through classification
+        
+        The export is read one item at a time and results are yielded as they
+        arrive, so memory stays flat however many items the file holds.
+        
+        Args:
+            json_file: Path to web scraper JSON file
+            limit: Limit number of items (for testing)
+            resume: Enable auto-resume from checkpoint (default: True)
+            keep_results: Hold results in memory to compact the progress journal
+                          at the end (default: False - the journal is kept as is)
+        
+        Yields:
+            Classified results in input order (resumed checkpoint results first)
         """
         print("\n" + "=" * 80)
         print("PROCESSING WEB SCRAPER DATA (RESILIENT MODE)")
@@ -312,7 +695,12 @@ class ResourceClassificationPipeline:
         existing_results = []
         processed_count = 0
         
-        if resume:
+        if resume and self.store is not None:
+            # Everything classified before (this run or earlier ones) is reused from the store
+            print(f"✅ Incremental mode: unchanged items reuse stored classifications")
+            print(f"   You can safely interrupt and resume at any time")
+            print()
+        elif resume:
             existing_results, metadata = self.load_progress()
             if existing_results:
                 processed_count = len([r for r in existing_results if r.get('source_type') == 'web_scraper'])
@@ -321,119 +709,137 @@ class ResourceClassificationPipeline:
                     print(f"   You can safely interrupt and resume at any time")
                     print()
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # The file is read once, so the total is only known up front with a
+        # limit (an upper bound); otherwise progress is open-ended
+        total = limit
         
+        data = read_json_array(json_file)
         if limit:
-            data = data[:limit]
+            data = islice(data, limit)
         
         # Skip already processed items
-        data_to_process = data[processed_count:]
+        data_to_process = islice(data, processed_count, None)
+        
+        # New run: start an empty journal (a resumed run keeps appending to it)
+        if processed_count == 0:
+            self.journal.reset()
         
         if processed_count > 0:
-            print(f"Processing {len(data_to_process)} remaining items ({processed_count} already done)...")
+            print(f"Processing remaining items ({processed_count} already done)...")
+        elif total:
+            print(f"Processing up to {total} web scraper items...")
         else:
-            print(f"Processing {len(data)} web scraper items...")
+            print(f"Processing web scraper items...")
         
         print(f"Progress will be saved every 5 items")
         print()
         
         start_time = time.time()
         
-        results = existing_results.copy()
-        for idx, item in enumerate(data_to_process, processed_count + 1):
-            item_start = time.time()
-            print(f"[{idx}/{len(data)}] {item.get('title', 'Unknown')[:60]}...", end=' ')
-            result = self.classify_item(item, 'web_scraper')
-            results.append(result)
+        results = existing_results.copy() if keep_results else None
+        yield from existing_results
+        del existing_results
+        
+        completed = processed_count
+        classified = self._classify_iter(data_to_process, 'web_scraper')
+        for idx, (item, result, item_time) in enumerate(classified, processed_count + 1):
+            if results is not None:
+                results.append(result)
+            self.record_result(result)
+            completed = idx
             
-            item_time = time.time() - item_start
             status = "✓" if 'error' not in result else "✗"
-            print(f"{status} ({item_time:.1f}s)")
+            progress = f"{idx}/{total}" if total else f"{idx}"
+            print(f"[{progress}] {item.get('title', 'Unknown')[:60]}... {status} ({item_time:.1f}s)")
             
-            # Save progress every 5 items
+            # Save progress every 5 items (results are in input order, so the count stays a valid resume point)
             if idx % 5 == 0:
-                self.save_progress(results, {'last_processed': idx, 'total': len(data), 'type': 'web_scraper'})
+                # total=None marks an open-ended run (no percentage to show)
+                self.save_progress({'last_processed': idx, 'total': total, 'type': 'web_scraper'})
             
-            # Reduced delay for faster processing
-            time.sleep(0.2)
+            yield result
         
         # Final save
-        self.save_progress(results, {'completed': True, 'total': len(data), 'type': 'web_scraper'})
+        self.finish_progress(results, {'completed': True, 'total': completed, 'type': 'web_scraper'})
         
         total_time = time.time() - start_time
         print()
-        print(f"✅ Completed {len(results) - processed_count} items in {total_time/60:.1f} minutes")
-        print(f"   Total: {len(results)} items")
-        if len(results) > processed_count:
-            print(f"   Average: {total_time/(len(results) - processed_count):.1f}s per item")
-        return results
+        print(f"✅ Completed {completed - processed_count} items in {total_time/60:.1f} minutes")
+        print(f"   Total: {completed} items")
+        if completed > processed_count:
+            print(f"   Average: {total_time/(completed - processed_count):.1f}s per item")
     
-    def process_crib_sheet(self, excel_file: str, limit: int = None) -> List[Dict]:
-        """Process crib sheet data"""
+    def process_crib_sheet(self, excel_file: str, limit: int = None, keep_results: bool = True) -> List[Dict]:
+        """
+        Process crib sheet data
+        
+        With keep_results=False (result store enabled) results are only
+        recorded in the store, and an empty list is returned.
+        """
         print("\n" + "=" * 80)
         print("PROCESSING LIVE CHAT CRIB SHEET")
         print("=" * 80)
         
-        processor = LiveChatCribSheetProcessor(excel_file)
-        dataset = processor.create_tagging_dataset()
-        
         if limit:
-            dataset = dataset[:limit]
-        
-        print(f"Processing {len(dataset)} crib sheet items...")
+            print(f"Processing up to {limit} crib sheet items...")
+        else:
+            print(f"Processing crib sheet items...")
         start_time = time.time()
         
         results = []
-        for idx, item in enumerate(dataset, 1):
-            item_start = time.time()
-            print(f"[{idx}/{len(dataset)}] {item.get('title', 'Unknown')[:60]}...", end=' ')
-            result = self.classify_item(item, 'crib_sheet')
-            results.append(result)
-            
-            item_time = time.time() - item_start
-            print(f"({item_time:.1f}s)")
-            
-            time.sleep(0.2)
+        completed = 0
+        # Rows are read as they are classified; the workbook is closed when done
+        with LiveChatCribSheetProcessor(excel_file, streaming=self.stream_excel) as processor:
+            dataset = islice(processor.iter_tagging_dataset(), limit or None)
+            classified = self._classify_iter(dataset, 'crib_sheet')
+            for idx, (item, result, item_time) in enumerate(classified, 1):
+                if keep_results:
+                    results.append(result)
+                completed = idx
+                progress = f"{idx}/{limit}" if limit else f"{idx}"
+                print(f"[{progress}] {item.get('title', 'Unknown')[:60]}... ({item_time:.1f}s)")
         
         total_time = time.time() - start_time
-        print(f"✓ Completed {len(results)} items in {total_time/60:.1f} minutes")
-        print(f"  Average: {total_time/len(results):.1f}s per item")
+        print(f"✓ Completed {completed} items in {total_time/60:.1f} minutes")
+        print(f"  Average: {total_time/max(completed, 1):.1f}s per item")
         return results
     
-    def process_contacts(self, excel_file: str, limit: int = None) -> List[Dict]:
-        """Process contacts data"""
+    def process_contacts(self, excel_file: str, limit: int = None, keep_results: bool = True) -> List[Dict]:
+        """
+        Process contacts data
+        
+        With keep_results=False (result store enabled) results are only
+        recorded in the store, and an empty list is returned.
+        """
         print("\n" + "=" * 80)
         print("PROCESSING PROFESSIONAL CONTACTS")
         print("=" * 80)
         
-        processor = ContactsProcessor(excel_file)
-        dataset = processor.create_tagging_dataset()
-        
         if limit:
-            dataset = dataset[:limit]
-        
-        print(f"Processing {len(dataset)} contact items...")
+            print(f"Processing up to {limit} contact items...")
+        else:
+            print(f"Processing contact items...")
         start_time = time.time()
         
         results = []
-        for idx, item in enumerate(dataset, 1):
-            item_start = time.time()
-            print(f"[{idx}/{len(dataset)}] {item.get('title', 'Unknown')[:60]}...", end=' ')
-            result = self.classify_item(item, 'contacts')
-            results.append(result)
-            
-            item_time = time.time() - item_start
-            print(f"({item_time:.1f}s)")
-            
-            time.sleep(0.2)
+        completed = 0
+        # Rows are read as they are classified; the workbook is closed when done
+        with ContactsProcessor(excel_file, streaming=self.stream_excel) as processor:
+            dataset = islice(processor.iter_tagging_dataset(), limit or None)
+            classified = self._classify_iter(dataset, 'contacts')
+            for idx, (item, result, item_time) in enumerate(classified, 1):
+                if keep_results:
+                    results.append(result)
+                completed = idx
+                progress = f"{idx}/{limit}" if limit else f"{idx}"
+                print(f"[{progress}] {item.get('title', 'Unknown')[:60]}... ({item_time:.1f}s)")
         
         total_time = time.time() - start_time
-        print(f"✓ Completed {len(results)} items in {total_time/60:.1f} minutes")
-        print(f"  Average: {total_time/len(results):.1f}s per item")
+        print(f"✓ Completed {completed} items in {total_time/60:.1f} minutes")
+        print(f"  Average: {total_time/max(completed, 1):.1f}s per item")
         return results
     
-    def create_dynamodb_format(self, results: List[Dict]) -> List[Dict]:
+    def create_dynamodb_format(self, results: Iterable[Dict]) -> List[Dict]:
         """
         Convert results to DynamoDB format
         
@@ -444,8 +850,18 @@ class ResourceClassificationPipeline:
         - tags (map)
         - metadata (map)
         """
-        dynamodb_items = []
+        return list(self.iter_dynamodb_items(results))
+    
+    def iter_dynamodb_items(self, results: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Convert a stream of results to DynamoDB items one at a time
         
+        Args:
+            results: Result records (list, generator or result store stream)
+        
+        Yields:
+            DynamoDB items (failed results are skipped)
+        """
         for idx, result in enumerate(results, 1):
             if 'error' in result:
                 continue
@@ -494,11 +910,9 @@ class ResourceClassificationPipeline:
                 'updated_at': result['processed_at']
             }
             
-            dynamodb_items.append(item)
-        
-        return dynamodb_items
+            yield item
     
-    def create_excel_for_charity(self, results: List[Dict], output_file: str):
+    def create_excel_for_charity(self, results: Iterable[Dict], output_file: str):
         """
         Create Excel file for charity staff
         
@@ -509,12 +923,13 @@ class ResourceClassificationPipeline:
         4. By Topic - Grouped by topic
         5. Statistics - Summary statistics
         
-        Handles both standard and adaptive classification formats
+        Handles both standard and adaptive classification formats.
+        `results` is read once, so it can be a result store stream.
         """
         
         # Prepare data for main sheet
         rows = []
-        for result in results:
+        for position, result in enumerate(results, 1):
             if 'error' in result:
                 continue
             
@@ -544,7 +959,7 @@ class ResourceClassificationPipeline:
                 ])
             
             row = {
-                'Resource ID': f"{result['source_type']}_{results.index(result)+1:05d}",
+                'Resource ID': f"{result['source_type']}_{position:05d}",
                 'Source': result['source_type'],
                 'Title': original.get('title', ''),
                 'Description': original.get('description', original.get('summary', ''))[:200],
@@ -722,6 +1137,8 @@ class ResourceClassificationPipeline:
         print("  ✅ Auto-resume from checkpoint")
         print("  ✅ Network retry (3 attempts with backoff)")
         print("  ✅ Graceful error handling")
+        print(f"  ✅ Parallel classification ({self.executor.max_workers} workers, adaptive throttling backoff)")
+        print("  ✅ Prompt caching for the static classification framework")
         print()
         print("You can safely interrupt this process at any time.")
         print("To resume, simply run the same command again.")
@@ -731,25 +1148,44 @@ class ResourceClassificationPipeline:
         pipeline_start = time.time()
         all_results = []
         
-        # Process web scraper
+        if self.store is not None:
+            self.run_id = self.store.start_run('process_all_resources')
+        
+        # Process web scraper - streamed; with the result store the results are
+        # only counted here and read back from the store for the output files
         if web_scraper_file and Path(web_scraper_file).exists():
-            web_results = self.process_web_scraper_data(web_scraper_file, limit_per_source)
-            all_results.extend(web_results)
+            web_results = self.iter_web_scraper_data(web_scraper_file, limit_per_source,
+                                                     keep_results=self.store is None)
+            if self.store is not None:
+                for _ in web_results:
+                    pass
+            else:
+                all_results.extend(web_results)
         
         # Process crib sheet
         if crib_sheet_file and Path(crib_sheet_file).exists():
-            crib_results = self.process_crib_sheet(crib_sheet_file, limit_per_source)
+            crib_results = self.process_crib_sheet(crib_sheet_file, limit_per_source,
+                                                   keep_results=self.store is None)
             all_results.extend(crib_results)
         
         # Process contacts
         if contacts_file and Path(contacts_file).exists():
-            contact_results = self.process_contacts(contacts_file, limit_per_source)
+            contact_results = self.process_contacts(contacts_file, limit_per_source,
+                                                    keep_results=self.store is None)
             all_results.extend(contact_results)
         
+        # Output files are written from a stream: the result store when it is
+        # enabled (nothing has to be held in memory), otherwise the in-memory list
+        if self.store is not None:
+            counts = self.store.count_results(self.run_id)
+            self.store.update_run(self.run_id, {'completed': True, 'total': counts['items']}, status='completed')
+            result_stream = lambda: self.store.iter_results(self.run_id)
+        else:
+            result_stream = lambda: iter(all_results)
+        
         # Save complete results - Knowledge Base ready format
         complete_output = Path(output_dir) / 'encephalitis_content_database.json'
-        with open(complete_output, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, indent=2, ensure_ascii=False)
+        write_json_array(str(complete_output), result_stream(), ensure_ascii=False)
         print(f"\n✓ Complete results saved: {get_relative_path(complete_output)}")
         
         # Create DynamoDB format
@@ -757,12 +1193,10 @@ class ResourceClassificationPipeline:
         print("CREATING DYNAMODB FORMAT")
         print("=" * 80)
         
-        dynamodb_items = self.create_dynamodb_format(all_results)
         dynamodb_output = Path(output_dir) / 'dynamodb_resources.json'
-        with open(dynamodb_output, 'w', encoding='utf-8') as f:
-            json.dump(dynamodb_items, f, indent=2, ensure_ascii=False)
+        dynamodb_count = write_json_array(str(dynamodb_output), self.iter_dynamodb_items(result_stream()), ensure_ascii=False)
         print(f"✓ DynamoDB format saved: {get_relative_path(dynamodb_output)}")
-        print(f"  Items: {len(dynamodb_items)}")
+        print(f"  Items: {dynamodb_count}")
         
         # Create Excel for charity
         print("\n" + "=" * 80)
@@ -770,7 +1204,7 @@ class ResourceClassificationPipeline:
         print("=" * 80)
         
         excel_output = Path(output_dir) / 'classified_resources_for_charity.xlsx'
-        self.create_excel_for_charity(all_results, str(excel_output))
+        self.create_excel_for_charity(result_stream(), str(excel_output))
         
         # Summary
         print("\n" + "=" * 80)
@@ -778,15 +1212,30 @@ class ResourceClassificationPipeline:
         print("=" * 80)
         
         total_time = time.time() - pipeline_start
-        successful = len([r for r in all_results if 'error' not in r])
-        errors = len([r for r in all_results if 'error' in r])
+        if self.store is not None:
+            total_items, errors, reused = counts['items'], counts['errors'], counts['reused']
+        else:
+            total_items = len(all_results)
+            errors = len([r for r in all_results if 'error' in r])
+            reused = 0
+        successful = total_items - errors
         
         print(f"\n📊 PROCESSING SUMMARY:")
         print(f"   Total time: {total_time/60:.1f} minutes ({total_time/3600:.2f} hours)")
-        print(f"   Total items: {len(all_results)}")
-        print(f"   Successful: {successful} ({successful/len(all_results)*100:.1f}%)")
-        print(f"   Errors: {errors} ({errors/len(all_results)*100:.1f}%)")
-        print(f"   Average: {total_time/len(all_results):.1f}s per item")
+        print(f"   Total items: {total_items}")
+        print(f"   Successful: {successful} ({successful/total_items*100:.1f}%)")
+        print(f"   Errors: {errors} ({errors/total_items*100:.1f}%)")
+        print(f"   Average: {total_time/total_items:.1f}s per item")
+        print(f"   Bedrock requests: {self.rate_limiter.stats['requests']} "
+              f"(throttled: {self.rate_limiter.stats['throttled']})")
+        print(f"   {self.usage.summary()}")
+        if self.store is not None:
+            print(f"   Reused from classification store: {reused} "
+                  f"({total_items - reused} classified this run)")
+        if self.batch_size > 1:
+            batch_stats = self.batch_classifier.stats
+            print(f"   Batched: {batch_stats['items']} items in {batch_stats['requests']} requests "
+                  f"({batch_stats['retried_items']} retried, {batch_stats['failed_items']} sent individually)")
         
         print(f"\n📁 OUTPUT FILES:")
         print(f"   1. {get_relative_path(complete_output)}")
@@ -801,9 +1250,9 @@ class ResourceClassificationPipeline:
         print("\n" + "=" * 80)
         
         return {
-            'total_processed': len(all_results),
-            'successful': len([r for r in all_results if 'error' not in r]),
-            'errors': len([r for r in all_results if 'error' in r]),
+            'total_processed': total_items,
+            'successful': successful,
+            'errors': errors,
             'outputs': {
                 'complete_json': str(complete_output),
                 'dynamodb_json': str(dynamodb_output),
@@ -819,8 +1268,53 @@ if __name__ == "__main__":
     print("RESOURCE CLASSIFICATION PIPELINE - RESILIENT PROCESSING")
     print("=" * 80)
     
+    # Check for custom worker count
+    workers = 4
+    if '--workers' in sys.argv:
+        try:
+            workers_idx = sys.argv.index('--workers')
+            if workers_idx + 1 < len(sys.argv):
+                workers = int(sys.argv[workers_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    
+    # Check for batched prompts
+    batch_size = 1
+    if '--batch-size' in sys.argv:
+        try:
+            batch_idx = sys.argv.index('--batch-size')
+            if batch_idx + 1 < len(sys.argv):
+                batch_size = int(sys.argv[batch_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    
     # Initialize pipeline
-    pipeline = ResourceClassificationPipeline(region_name='us-west-2')
+    pipeline = ResourceClassificationPipeline(
+        region_name='us-west-2',
+        max_workers=workers,
+        batch_size=batch_size,
+        store_path=None if '--no-store' in sys.argv else 'temp/classification_store.db',
+        stream_excel='--stream-excel' in sys.argv
+    )
+    
+    # Check for offline batch inference
+    if '--batch-job-local' in sys.argv:
+        pipeline.batch_runner = LocalBatchInferenceRunner()
+        print("\n🧪 LOCAL BATCH JOB MODE: Prompts processed by the stub model (no Bedrock calls)")
+    elif '--batch-job' in sys.argv:
+        batch_bucket = os.environ.get('BATCH_INFERENCE_BUCKET')
+        batch_role_arn = os.environ.get('BATCH_INFERENCE_ROLE_ARN')
+        if not batch_bucket or not batch_role_arn:
+            print("❌ --batch-job needs BATCH_INFERENCE_BUCKET and BATCH_INFERENCE_ROLE_ARN set")
+            sys.exit(1)
+        pipeline.batch_runner = BedrockBatchInferenceRunner(
+            bedrock_client=pipeline.session.client('bedrock'),
+            s3_client=pipeline.session.client('s3'),
+            bucket=batch_bucket,
+            role_arn=batch_role_arn,
+            model_id=pipeline.model_id
+        )
+        print(f"\n📦 BATCH JOB MODE: One Bedrock batch inference job per source (s3://{batch_bucket})")
     
     # Check for test mode
     test_mode = '--test' in sys.argv
@@ -843,6 +1337,11 @@ if __name__ == "__main__":
     print("   • Progress is saved every 5 items")
     print("   • You can safely interrupt (Ctrl+C) and resume later")
     print("   • Network errors are automatically retried")
+    print("   • Bedrock throttling slows the send rate automatically")
+    print("   • Use --workers N to change parallelism (--workers 1 = serial)")
+    print("   • Use --batch-size N to classify N items per Bedrock request")
+    print("   • Use --batch-job for an offline Bedrock batch job (--batch-job-local to test)")
+    print("   • Unchanged items reuse stored classifications (--no-store to reclassify everything)")
     print("   • To resume: just run the same command again")
     
     print("\n📖 For more information:")
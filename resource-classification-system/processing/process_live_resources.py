@@ -4,17 +4,39 @@ Scrapes current data from Encephalitis International website and classifies it
 Uses AWS Bedrock Claude Opus 4.5 for classification
 
 RESILIENT FEATURES:
-- Auto-saves progress every 5 items
+- Auto-saves progress every 5 items (append-only journal, each result persisted as it arrives)
 - Auto-resumes from last checkpoint
 - Network retry logic (3 attempts with exponential backoff)
-- Survives interruptions (max loss: 4 items)
+- Survives interruptions (results journaled as they complete)
+- Optional batched prompts (N items per request within a token budget)
+- Prompt caching (static taxonomy sent as a cached system block, cache hits reported)
+- Incremental runs: classifications stored by content hash, so changed pages are
+  reclassified and unchanged ones reused (--no-store to disable)
+- Results recorded per run in an SQLite store (WAL); output files are
+  written by streaming from it
+- Concurrent polite scraping (per-host limits, token-bucket pacing, robots.txt,
+  pooled connections with retry/backoff)
+- Conditional HTTP requests (ETag/Last-Modified + body hash cache): unchanged
+  pages are neither re-parsed nor reclassified (--no-http-cache to disable)
+- Full sitemap tree (parallel child sitemaps, gzip, streaming parse); re-crawls
+  only visit pages whose <lastmod> changed since their last crawl (--full-crawl
+  to visit everything)
+- Pluggable HTML extraction (selectolax, lxml or BeautifulSoup; the fastest
+  installed engine by default, --html-engine to choose)
+- Fetching and parsing run as separate stages: crawler threads download into a
+  bounded queue, a process pool parses (--parse-workers N, 0 = in-process),
+  and pages stream straight into classification
+- Near-duplicate pages (MinHash/LSH over word shingles) reuse one page's
+  classification (--dedup-threshold 0.9, --no-dedup to classify every page);
+  clusters and estimated tokens saved go to temp/near_duplicates_report.json
+- Large staff spreadsheets can be read row by row (--stream-excel)
 
 USAGE:
     Recommended (with resilient runner):
-        ./run_resilient.sh process_live_resources.py [--test] [--cached]
+        ./run_resilient.sh process_live_resources.py [--test] [--cached] [--batch-size N] [--scrape-workers N] [--html-engine NAME]
     
     Direct execution (still has auto-resume):
-        python3 process_live_resources.py [--test] [--cached]
+        python3 process_live_resources.py [--test] [--cached] [--batch-size N] [--scrape-workers N] [--html-engine NAME]
 
 For complete documentation, see RESILIENT_PROCESSING.md
 """
@@ -22,21 +44,32 @@ For complete documentation, see RESILIENT_PROCESSING.md
 import json
 import boto3
 import requests
-import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import time
 import sys
 import os
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 
 # Add parent directory to path so we can import from scripts/
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.excel_processor import LiveChatCribSheetProcessor, ContactsProcessor
-from scripts.bedrock_tag_refinement_prompt import BedrockTagRefinementPrompt
+from scripts.bedrock_tag_refinement_prompt import BedrockTagRefinementPrompt, PROMPT_VERSION
+from scripts.batch_classification import BatchClassifier
+from scripts.bedrock_executor import TokenUsageTracker, estimate_tokens
+from scripts.classification_store import ClassificationStore, content_hash
+from scripts.checkpoint_journal import CheckpointJournal
+from scripts.json_stream import JsonArrayWriter, read_json_array
+from scripts.excel_stream import StreamingWriter
+from scripts.polite_crawler import PoliteCrawler, RobotsDisallowed
+from scripts.http_cache import HttpCache, body_hash
+from scripts.sitemap_engine import SitemapEngine, SitemapEntry, CrawlFrontier
+from scripts.html_extraction import resolve_engine
+from scripts.scrape_pipeline import ScrapePipeline, ParseTask, parse_html
+from scripts.near_duplicates import NearDuplicateDetector, classify_with_duplicates
+from scripts.content_chunker import select_content
 
 
 def get_relative_path(path: Path) -> str:
@@ -67,139 +100,242 @@ def clean_tags_list(tags: List[str]) -> str:
 class LiveWebScraper:
     """Scrape content from Encephalitis International website"""
     
-    def __init__(self):
+    # Bump when page extraction changes, so cached parsed pages are re-parsed
+    EXTRACTION_VERSION = '2'
+    
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 4, requests_per_second: float = 2.0,
+                 http_cache_path: str = 'temp/http_cache.db', frontier_path: str = 'temp/crawl_frontier.db',
+                 html_engine: str = 'auto', parse_workers: int = None, queue_size: int = 32):
+        """
+        Initialize scraper
+        
+        Args:
+            max_workers: Concurrent page fetches
+            per_host_limit: Concurrent fetches to one host
+            requests_per_second: Request rate per host (robots.txt Crawl-delay can lower it)
+            http_cache_path: Conditional-request page cache (None = always download and parse)
+            frontier_path: Crawl frontier for sitemap-lastmod re-crawls (needs the HTTP
+                           cache to serve skipped pages; None = visit every page)
+            html_engine: HTML extraction engine - selectolax, lxml, bs4 or auto
+                         (fastest installed)
+            parse_workers: Parser processes (None = CPU count, 0 = parse in-process)
+            queue_size: Downloaded pages allowed to wait for parsing (bounds memory)
+        """
         self.base_url = "https://www.encephalitis.info"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (compatible; EncephalitisResourceClassifier/1.0)'
         })
+        # Pooled, retrying, robots-aware fetching shared by every request below
+        self.crawler = PoliteCrawler(
+            self.session,
+            max_workers=max_workers,
+            per_host_limit=per_host_limit,
+            requests_per_second=requests_per_second
+        )
+        # Unchanged pages (304 or same body hash) skip parsing, and come back
+        # identical, so their stored classification is reused as well
+        # All engines produce the same fields; the engine still goes into the
+        # cache version so switching engines re-parses cached pages
+        self.html_engine = resolve_engine(html_engine)
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        extraction_version = f"{self.EXTRACTION_VERSION}:{self.html_engine}"
+        self.http_cache = HttpCache(http_cache_path, extraction_version) if http_cache_path else None
+        
+        # Pages whose sitemap lastmod hasn't moved since their last crawl aren't requested at all
+        self.sitemap_engine = SitemapEngine(self.crawler)
+        self.frontier = CrawlFrontier(frontier_path) if frontier_path and self.http_cache is not None else None
     
     def get_sitemap(self, sitemap_url: str = None) -> List[str]:
         """Fetch and parse sitemap to get all URLs"""
+        return [entry.url for entry in self.get_sitemap_entries(sitemap_url)]
+    
+    def get_sitemap_entries(self, sitemap_url: str = None) -> List[SitemapEntry]:
+        """
+        Fetch the whole sitemap tree (child sitemaps in parallel, gzip supported)
+        
+        Returns:
+            SitemapEntry (url, lastmod) per page, in sitemap order
+        """
         if not sitemap_url:
             sitemap_url = f"{self.base_url}/sitemap.xml"
         
         print(f"📡 Fetching sitemap from {sitemap_url}")
         
+        entries = self.sitemap_engine.fetch_entries(sitemap_url)
+        with_lastmod = len([entry for entry in entries if entry.lastmod])
+        print(f"✅ Found {len(entries)} URLs in sitemap ({with_lastmod} with lastmod, "
+              f"{self.sitemap_engine.stats['sitemaps']} sitemaps read)")
+        return entries
+    
+    def scrape_url(self, url: str) -> Dict[str, Any]:
+        """
+        Scrape content from a single URL
+        
+        With the HTTP cache, the request is conditional: a 304 or an unchanged
+        body returns the previously parsed page without parsing again.
+        """
+        fetched = self.fetch_page(url)
+        if not isinstance(fetched, ParseTask):
+            return fetched
+        
         try:
-            response = self.session.get(sitemap_url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse XML
-            root = ET.fromstring(response.content)
-            
-            # Extract URLs (handle different sitemap formats)
-            urls = []
-            
-            # Standard sitemap namespace
-            ns = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-            
-            # Try with namespace
-            url_elements = root.findall('.//ns:url/ns:loc', ns)
-            if url_elements:
-                urls = [elem.text for elem in url_elements if elem.text]
-            else:
-                # Try without namespace
-                url_elements = root.findall('.//url/loc')
-                if url_elements:
-                    urls = [elem.text for elem in url_elements if elem.text]
-                else:
-                    # Try sitemap index
-                    sitemap_elements = root.findall('.//ns:sitemap/ns:loc', ns)
-                    if not sitemap_elements:
-                        sitemap_elements = root.findall('.//sitemap/loc')
-                    
-                    if sitemap_elements:
-                        print(f"📋 Found sitemap index with {len(sitemap_elements)} sitemaps")
-                        # Recursively fetch from sub-sitemaps
-                        for elem in sitemap_elements[:3]:  # Limit to first 3 sitemaps for test
-                            sub_urls = self.get_sitemap(elem.text)
-                            urls.extend(sub_urls)
-            
-            print(f"✅ Found {len(urls)} URLs in sitemap")
-            return urls
-            
+            page = self.parse_page(url, fetched.content)
         except Exception as e:
-            print(f"❌ Error fetching sitemap: {e}")
-            return []
+            print(f"  ❌ Error parsing {url}: {e}")
+            return None
+        self.cache_page(fetched, page)
+        return page
     
-    def scrape_url(self, url: str) -> Dict[str, Any]:
-        """Scrape content from a single URL"""
+    def fetch_page(self, url: str):
+        """
+        Download a page for the parse stage (runs in a crawler thread)
+        
+        Returns:
+            The cached page when the server reports it unchanged, a ParseTask
+            with the new body otherwise, or None on failure
+        """
         try:
-            print(f"  📄 Scraping: {url}")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if self.http_cache is None:
+                return ParseTask(url, self.crawler.fetch(url).content)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Extract title
-            title = soup.find('title')
-            title = title.get_text().strip() if title else url.split('/')[-1]
-            
-            # Extract main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('body')
-            
-            if main_content:
-                # Get text content
-                text = main_content.get_text(separator=' ', strip=True)
-                
-                # Clean up whitespace
-                text = ' '.join(text.split())
-                
-                # Limit length for API (match Lambda scraper limit)
-                if len(text) > 50000:
-                    text = text[:50000] + "..."
-            else:
-                text = soup.get_text(separator=' ', strip=True)[:50000]
+            entry = self.http_cache.get(url)
+            response = self.crawler.fetch(url, headers=self.http_cache.conditional_headers(entry))
             
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '') if meta_desc else ''
+            if response.status_code == 304 and entry:
+                self.http_cache.count('not_modified')
+                self.http_cache.touch(url)
+                return entry['page']
             
-            if not description:
-                # Use first paragraph as description
-                first_p = soup.find('p')
-                description = first_p.get_text().strip()[:500] if first_p else text[:500]
+            page_hash = body_hash(response.content)
+            if entry and entry['body_hash'] == page_hash:
+                self.http_cache.count('unchanged')
+                self.http_cache.touch(url, response)
+                return entry['page']
             
-            return {
-                'url': url,
-                'title': title,
-                'description': description,
-                'content': text,
-                'scraped_at': datetime.now().isoformat()
-            }
+            return ParseTask(url, response.content, (response, page_hash, entry is not None))
             
+        except RobotsDisallowed:
+            print(f"  🤖 Skipping {url} (disallowed by robots.txt)")
+            return None
         except Exception as e:
             print(f"  ❌ Error scraping {url}: {e}")
             return None
     
+    def cache_page(self, task: ParseTask, page: Dict[str, Any]):
+        """Store a freshly parsed page in the HTTP cache"""
+        if self.http_cache is None or task.context is None:
+            return
+        response, page_hash, was_cached = task.context
+        self.http_cache.count('changed' if was_cached else 'new')
+        self.http_cache.put(task.url, response, page, page_hash)
+    
+    def parse_page(self, url: str, content: bytes) -> Dict[str, Any]:
+        """Extract title, description and text from a page's HTML"""
+        return parse_html(self.html_engine, url, content)
+    
+    def iter_scrape(self, urls: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Scrape URLs through the fetch/parse pipeline
+        
+        Crawler threads download while parser processes work through a bounded
+        queue, so nothing waits on the other and only a few raw pages are held
+        at once. Consumed lazily: a slow consumer pauses fetching.
+        
+        Yields:
+            Tuples of (url, page) in input order (page is None on failure)
+        """
+        pipeline = ScrapePipeline(self.crawler, self.html_engine, self.parse_workers, self.queue_size)
+        try:
+            yield from pipeline.run(urls, self.fetch_page, self.cache_page)
+        finally:
+            print(f"   {pipeline.summary()}")
+            if self.http_cache is not None:
+                print(f"   {self.http_cache.summary()}")
+    
     def scrape_multiple(self, urls: List[str], limit: int = None) -> List[Dict[str, Any]]:
-        """Scrape multiple URLs"""
+        """
+        Scrape multiple URLs concurrently (per-host limits and pacing apply)
+        
+        Returns:
+            Scraped pages in input order (failed URLs omitted)
+        """
         if limit:
             urls = urls[:limit]
         
         results = []
         total = len(urls)
+        start_time = time.time()
         
-        print(f"\n🌐 Scraping {total} URLs from Encephalitis International website...")
+        self._print_scrape_start(total)
         
-        for i, url in enumerate(urls, 1):
-            print(f"[{i}/{total}] ", end='')
-            
-            result = self.scrape_url(url)
+        for i, (url, result) in enumerate(self.iter_scrape(urls), 1):
             if result:
                 results.append(result)
-            
-            # Rate limiting
-            if i < total:
-                time.sleep(1)  # Be respectful to the server
+                print(f"[{i}/{total}]   📄 Scraped: {url}")
         
-        print(f"\n✅ Successfully scraped {len(results)} pages")
+        duration = time.time() - start_time
+        print(f"\n✅ Successfully scraped {len(results)} pages in {duration/60:.1f} minutes")
         return results
+    
+    def _print_scrape_start(self, total: int):
+        """Scraping banner with the fetch and parse settings"""
+        print(f"\n🌐 Scraping {total} URLs from Encephalitis International website...")
+        print(f"   {self.crawler.max_workers} workers, {self.crawler.per_host_limit} per host, "
+              f"{self.crawler.requests_per_second} requests/s per host")
+    
+    def iter_entries(self, entries: List[SitemapEntry]) -> Iterator[Dict[str, Any]]:
+        """
+        Scrape sitemap entries, visiting only pages modified since their last crawl
+        
+        Pages whose lastmod matches the crawl frontier are served from the HTTP
+        cache without a request; everything else goes through the fetch/parse
+        pipeline, and is recorded in the frontier once it succeeds.
+        
+        Yields:
+            Pages in entry order (failed URLs omitted), as soon as each is ready
+        """
+        unchanged = set()
+        due = []
+        for entry in entries:
+            if self.frontier is not None and not self.frontier.is_due(entry):
+                cached = self.http_cache.get(entry.url)
+                if cached and cached['page']:
+                    unchanged.add(entry.url)
+                    continue
+            due.append(entry)
+        
+        if self.frontier is not None:
+            print(f"🗺️  {len(unchanged)} pages unchanged since their last crawl (sitemap lastmod), "
+                  f"{len(due)} to visit")
+        self._print_scrape_start(len(due))
+        
+        scraped = self.iter_scrape(entry.url for entry in due)
+        crawled = []
+        try:
+            for entry in entries:
+                if entry.url in unchanged:
+                    yield self.http_cache.get(entry.url)['page']
+                    continue
+                
+                _, page = next(scraped)
+                if page:
+                    crawled.append(entry)
+                    yield page
+        finally:
+            scraped.close()
+            if self.frontier is not None:
+                self.frontier.mark_crawled(crawled)
+    
+    def scrape_entries(self, entries: List[SitemapEntry]) -> List[Dict[str, Any]]:
+        """
+        Scrape sitemap entries (see iter_entries)
+        
+        Returns:
+            Pages in entry order (failed URLs omitted)
+        """
+        return list(self.iter_entries(entries))
 
 
 class LiveResourceClassificationPipeline:
@@ -208,8 +344,30 @@ class LiveResourceClassificationPipeline:
     With automatic progress saving and resume capability
     """
     
-    def __init__(self, region_name: str = 'us-west-2'):
-        """Initialize with Claude Opus 4.5"""
+    def __init__(self, region_name: str = 'us-west-2', batch_size: int = 1, batch_token_budget: int = 60000,
+                 store_path: str = 'temp/classification_store.db', scrape_workers: int = 8,
+                 http_cache_path: str = 'temp/http_cache.db', frontier_path: str = 'temp/crawl_frontier.db',
+                 html_engine: str = 'auto', parse_workers: int = None, dedup_threshold: float = 0.9,
+                 stream_excel: bool = False):
+        """
+        Initialize with Claude Opus 4.5
+        
+        Args:
+            region_name: AWS region (default: us-west-2)
+            batch_size: Web items per Bedrock request (default: 1 = one prompt per item;
+                        spreadsheet rows are always classified one per request)
+            batch_token_budget: Maximum estimated input tokens per batched request
+            store_path: Classification store for incremental runs (None = classify everything)
+            scrape_workers: Concurrent page fetches when scraping live
+            http_cache_path: Conditional-request page cache for live scraping (None = disabled)
+            frontier_path: Crawl frontier for lastmod-based re-crawls (None = visit every page)
+            html_engine: HTML extraction engine for live scraping (auto = fastest installed)
+            parse_workers: HTML parser processes for live scraping (None = CPU count)
+            dedup_threshold: Similarity above which web pages reuse a near-duplicate's
+                             classification (None = classify every page)
+            stream_excel: Read the Excel files row by row (openpyxl read-only) instead
+                          of loading whole sheets into pandas
+        """
         import os
         
         # Explicitly get credentials from environment
@@ -233,48 +391,107 @@ class LiveResourceClassificationPipeline:
         
         self.model_id = "global.anthropic.claude-opus-4-5-20251101-v1:0"
         self.prompt_builder = BedrockTagRefinementPrompt()
-        self.scraper = LiveWebScraper()
+        self.scraper = LiveWebScraper(max_workers=scrape_workers, http_cache_path=http_cache_path,
+                                      frontier_path=frontier_path, html_engine=html_engine,
+                                      parse_workers=parse_workers)
         
-        # Progress tracking
-        self.progress_file = 'temp/progress_checkpoint.json'
+        # Progress tracking (append-only journal; the old whole-file JSON
+        # checkpoint is still read when resuming)
+        self.progress_file = 'temp/progress_checkpoint.jsonl'
+        self.legacy_progress_file = 'temp/progress_checkpoint.json'
+        self.journal = CheckpointJournal(self.progress_file)
         self.results_cache = []
+        self.usage = TokenUsageTracker()
+        
+        # Content-hash store: unchanged resources reuse their previous classification,
+        # and every processed resource is recorded against the current run
+        self.store = ClassificationStore(store_path) if store_path else None
+        self.run_id = None
+        self.stream_excel = stream_excel
+        
+        # Near-identical pages (listings, tag archives, print views) share one classification
+        self.dedup = NearDuplicateDetector(dedup_threshold) if dedup_threshold else None
+        self.dedup_report_file = 'temp/near_duplicates_report.json'
+        
+        # Batched classification (several items share one taxonomy preamble)
+        self.batch_size = max(1, batch_size)
+        self.batch_classifier = BatchClassifier(
+            invoke_text=self._invoke_text,
+            max_items=self.batch_size,
+            token_budget=batch_token_budget,
+            prompt_builder=self.prompt_builder
+        )
         
         print(f"✅ Initialized with Claude Opus 4.5 (Global)")
         print(f"   Region: {region_name}")
         print(f"   Model: {self.model_id}")
         print(f"   Progress file: {get_relative_path(Path(self.progress_file))}")
+        if self.batch_size > 1:
+            print(f"   Batched prompts: Up to {self.batch_size} web items per request")
+        if self.store is not None:
+            print(f"   Incremental: {len(self.store)} stored classifications")
+        if self.scraper.http_cache is not None:
+            print(f"   HTTP cache: {len(self.scraper.http_cache)} cached pages")
+        if self.dedup is not None:
+            print(f"   Near-duplicate pages: similarity ≥ {self.dedup.threshold:.2f} reuse one classification")
+        print(f"   HTML extraction: {self.scraper.html_engine}")
     
-    def save_progress(self, results: List[Dict[str, Any]], metadata: Dict[str, Any]):
-        """Save progress to checkpoint file"""
+    def save_progress(self, metadata: Dict[str, Any]):
+        """Mark a checkpoint (progress metadata + fsync) in the progress journal"""
         try:
-            checkpoint = {
-                'timestamp': datetime.now().isoformat(),
-                'metadata': metadata,
-                'results': results
-            }
-            with open(self.progress_file, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
+            self.journal.checkpoint(metadata)
+            if self.store is not None and self.run_id:
+                self.store.update_run(self.run_id, metadata)
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save progress: {e}")
+    
+    def record_result(self, result: Dict[str, Any]):
+        """Append one result to the progress journal"""
+        try:
+            self.journal.append(result)
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save progress: {e}")
+    
+    def finish_progress(self, results: Optional[List[Dict[str, Any]]], metadata: Dict[str, Any]):
+        """
+        Compact the journal to the final results (atomic rename)
+        
+        With the result store the results aren't held, so with results=None
+        the journal is left as is and only the final metadata is recorded.
+        """
+        try:
+            if results is None:
+                self.journal.checkpoint(metadata)
+            else:
+                self.journal.compact(results, metadata)
         except Exception as e:
             print(f"⚠️  Warning: Could not save progress: {e}")
     
     def load_progress(self) -> tuple:
-        """Load progress from checkpoint file"""
-        if Path(self.progress_file).exists():
-            try:
-                with open(self.progress_file, 'r') as f:
+        """Load progress from the checkpoint journal (or a legacy JSON checkpoint)"""
+        try:
+            if self.journal.exists():
+                results, metadata, _ = self.journal.replay()
+                return results, metadata
+            if Path(self.legacy_progress_file).exists():
+                with open(self.legacy_progress_file, 'r') as f:
                     checkpoint = json.load(f)
-                return checkpoint.get('results', []), checkpoint.get('metadata', {})
-            except Exception as e:
-                print(f"⚠️  Warning: Could not load progress: {e}")
+                results, metadata = checkpoint.get('results', []), checkpoint.get('metadata', {})
+                # Continue in journal form from here on
+                self.journal.compact(results, metadata)
+                return results, metadata
+        except Exception as e:
+            print(f"⚠️  Warning: Could not load progress: {e}")
         return [], {}
     
-    def classify_resource(self, resource: Dict[str, Any], resource_type: str, max_retries: int = 3) -> Dict[str, Any]:
-        """Classify a single resource using Claude Opus 4.5"""
+    def _build_prompts(self, resource: Dict[str, Any], resource_type: str) -> Tuple[str, str]:
+        """Build the (system_prompt, user_prompt) pair for a resource"""
         
         # Build prompt based on resource type
         if resource_type == 'web_content':
-            # Use the actual method from BedrockTagRefinementPrompt
-            prompt = self.prompt_builder.build_tag_refinement_prompt(
+            # Static framework goes in the cached system block, only the item varies
+            system_prompt = self.prompt_builder.build_tag_refinement_system_prompt()
+            prompt = self.prompt_builder.build_tag_refinement_item_prompt(
                 url=resource.get('url', ''),
                 title=resource.get('title', ''),
                 summary=resource.get('description', ''),
@@ -285,7 +502,7 @@ class LiveResourceClassificationPipeline:
                     'topics': []
                 },
                 content_source='website',
-                full_content=resource.get('content', '')[:30000]
+                full_content=resource.get('content', '')
             )
         elif resource_type in ['crib_sheet', 'contact']:
             # For Excel data, use spreadsheet prompt
@@ -295,13 +512,15 @@ class LiveResourceClassificationPipeline:
                 'name': 'Name',
                 'description': 'Description'
             }
-            prompt = self.prompt_builder.build_spreadsheet_content_prompt(
+            system_prompt = self.prompt_builder.build_spreadsheet_system_prompt()
+            prompt = self.prompt_builder.build_spreadsheet_item_prompt(
                 spreadsheet_row=resource,
                 column_mapping=column_mapping
             )
         else:
             # Fallback to basic prompt
-            prompt = self.prompt_builder.build_tag_refinement_prompt(
+            system_prompt = self.prompt_builder.build_tag_refinement_system_prompt()
+            prompt = self.prompt_builder.build_tag_refinement_item_prompt(
                 url='',
                 title=resource.get('title', resource.get('name', 'Unknown')),
                 summary=resource.get('description', resource.get('content', '')),
@@ -309,26 +528,16 @@ class LiveResourceClassificationPipeline:
                 content_source='other'
             )
         
+        return system_prompt, prompt
+    
+    def classify_resource(self, resource: Dict[str, Any], resource_type: str, max_retries: int = 3) -> Dict[str, Any]:
+        """Classify a single resource using Claude Opus 4.5"""
+        system_prompt, prompt = self._build_prompts(resource, resource_type)
+        
         # Call Bedrock with retry logic
         for attempt in range(max_retries):
             try:
-                response = self.bedrock.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 4096,
-                        "temperature": 0.3,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ]
-                    })
-                )
-                
-                response_body = json.loads(response['body'].read())
-                content = response_body['content'][0]['text']
+                content = self._invoke_text(system_prompt, prompt, 4096)
                 
                 # Parse JSON from response
                 json_start = content.find('{')
@@ -351,8 +560,178 @@ class LiveResourceClassificationPipeline:
                     print(f"  ❌ Classification error after {max_retries} attempts: {e}")
                     return {}
     
-    def process_web_content(self, limit: int = None, use_cached: bool = False, cached_file: str = None, resume: bool = True) -> List[Dict[str, Any]]:
-        """Scrape and classify web content, or use cached data, with resume capability"""
+    def _invoke_text(self, system_prompt: str, prompt: str, max_tokens: int) -> str:
+        """Send a cached system prompt plus a user prompt and return the response text"""
+        response = self.bedrock.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps(
+                self.prompt_builder.build_cached_request_body(system_prompt, prompt, max_tokens=max_tokens)
+            )
+        )
+        response_body = json.loads(response['body'].read())
+        self.usage.record(response_body)
+        return response_body['content'][0]['text']
+    
+    def _batch_input(self, resource: Dict[str, Any], resource_type: str) -> Dict[str, Any]:
+        """Convert a web resource to the batch prompt item format"""
+        return {
+            'url': resource.get('url', ''),
+            'title': resource.get('title', ''),
+            'summary': resource.get('description', ''),
+            'content': resource.get('content', ''),
+            'source_type': 'website'
+        }
+    
+    def classify_batch(self, resources: List[Dict[str, Any]], resource_type: str) -> List[Dict[str, Any]]:
+        """
+        Classify several resources with one batched prompt
+        
+        Resources the batch response could not cover (even after
+        split-and-retry) fall back to classify_resource.
+        
+        Returns:
+            Classifications in the same order as resources ({} on failure)
+        """
+        refined_list = self.batch_classifier.classify_batch(
+            [self._batch_input(resource, resource_type) for resource in resources]
+        )
+        
+        classifications = []
+        for resource, classification in zip(resources, refined_list):
+            if classification is None:
+                classification = self.classify_resource(resource, resource_type)
+            else:
+                classification.pop('item_id', None)
+            classifications.append(classification)
+        return classifications
+    
+    def _ensure_run(self) -> int:
+        """Current run in the result store (started on first use)"""
+        if self.run_id is None:
+            self.run_id = self.store.start_run('process_live_resources')
+        return self.run_id
+    
+    def _content_hash(self, resource: Dict[str, Any], resource_type: str) -> str:
+        """Store key for a resource: its prompt content, the prompt version and the model"""
+        _, prompt = self._build_prompts(resource, resource_type)
+        return content_hash(f"{resource_type}\n{prompt}", PROMPT_VERSION, self.model_id)
+    
+    def _classify_iter(self, resources: Iterable[Dict[str, Any]], resource_type: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify resources, reusing stored classifications for unchanged content
+        
+        Every resource (including failures) is recorded in the result store.
+        
+        Yields:
+            Tuples of (resource, classification, duration_seconds)
+        """
+        if self.store is None:
+            yield from self._classify_uncached(resources, resource_type)
+            return
+        
+        incremental = self.store.classify_incremental(
+            resources,
+            resource_type,
+            key_fn=lambda resource: self._content_hash(resource, resource_type),
+            classify_iter=lambda misses: self._classify_uncached(misses, resource_type),
+            to_refined=lambda classification: classification or None,
+            from_stored=lambda resource, stored: stored['refined'],
+            item_key_fn=lambda resource: resource.get('url') or resource.get('title', resource.get('name', ''))
+        )
+        run_id = self._ensure_run()
+        for resource, classification, duration, reused, key in incremental:
+            result = {'source_type': resource_type, 'original': resource}
+            if classification:
+                result['refined'] = classification
+            else:
+                result['error'] = 'Classification failed'
+            result['processed_at'] = datetime.now().isoformat()
+            if reused:
+                result['reused'] = True
+            
+            self.store.record_result(run_id, result, key, resource.get('url') or resource.get('title', resource.get('name', '')))
+            yield resource, classification, duration
+    
+    def _classify_web_pages(self, pages: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify web pages, one per near-duplicate cluster
+        
+        Duplicates get their representative's classification (and a
+        duplicate_of field); in the result store they point at the
+        representative's stored classification.
+        
+        Yields:
+            Tuples of (resource, classification, duration_seconds)
+        """
+        if self.dedup is None:
+            yield from self._classify_iter(pages, 'web_content')
+            return
+        
+        representative_hashes = {}
+        deduplicated = classify_with_duplicates(
+            pages,
+            self.dedup,
+            classify_iter=lambda representatives: self._classify_iter(representatives, 'web_content'),
+            key_fn=lambda page: page['url'],
+            text_fn=lambda page: f"{page.get('title', '')}\n{page.get('content', '')}",
+            tokens_fn=lambda page: estimate_tokens(self._build_prompts(page, 'web_content')[1])
+        )
+        for page, classification, duration, duplicate_of in deduplicated:
+            if duplicate_of is None:
+                if self.store is not None:
+                    representative_hashes[page['url']] = self._content_hash(page, 'web_content')
+                yield page, classification, duration
+                continue
+            
+            page['duplicate_of'] = duplicate_of
+            if self.store is not None:
+                result = {'source_type': 'web_content', 'original': page, 'reused': True,
+                          'processed_at': datetime.now().isoformat()}
+                if classification:
+                    result['refined'] = classification
+                else:
+                    result['error'] = 'Classification failed'
+                self.store.record_result(self._ensure_run(), result, representative_hashes.get(duplicate_of), page['url'])
+            yield page, classification, duration
+        
+        print(f"\n🔁 {self.dedup.summary()}")
+        self.dedup.save_report(self.dedup_report_file)
+    
+    def _classify_uncached(self, resources: Iterable[Dict[str, Any]], resource_type: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        Classify resources one at a time or in batches, in input order
+        
+        Only web content is batched; spreadsheet rows keep the single-item
+        prompt, which carries their full content and the staff_context fields.
+        
+        Yields:
+            Tuples of (resource, classification, duration_seconds)
+        """
+        if self.batch_size <= 1 or resource_type != 'web_content':
+            for resource in resources:
+                start_time = time.time()
+                classification = self.classify_resource(resource, resource_type)
+                yield resource, classification, time.time() - start_time
+                
+                # Rate limiting
+                time.sleep(0.2)
+            return
+        
+        for batch in self.batch_classifier.pack(resources, to_batch_item=lambda r: self._batch_input(r, resource_type)):
+            start_time = time.time()
+            classifications = self.classify_batch(batch, resource_type)
+            duration = (time.time() - start_time) / len(batch)
+            for resource, classification in zip(batch, classifications):
+                yield resource, classification, duration
+    
+    def process_web_content(self, limit: int = None, use_cached: bool = False, cached_file: str = None, resume: bool = True,
+                            keep_results: bool = True) -> List[Dict[str, Any]]:
+        """
+        Scrape and classify web content, or use cached data, with resume capability
+        
+        With keep_results=False (result store enabled) results are only
+        recorded, not collected, and an empty list is returned.
+        """
         print("\n" + "="*80)
         print("PROCESSING LIVE WEB CONTENT")
         print("="*80)
@@ -361,7 +740,10 @@ class LiveResourceClassificationPipeline:
         existing_results = []
         processed_urls = set()
         
-        if resume:
+        if resume and self.store is not None:
+            # Pages are re-read every run; only new or changed content is reclassified
+            print(f"📂 Incremental mode: unchanged pages reuse stored classifications")
+        elif resume:
             existing_results, metadata = self.load_progress()
             if existing_results:
                 processed_urls = {r['original']['url'] for r in existing_results if r.get('source_type') == 'web_content'}
@@ -371,12 +753,12 @@ class LiveResourceClassificationPipeline:
         if use_cached and cached_file and Path(cached_file).exists():
             print(f"📂 Using cached web scraper data from: {get_relative_path(Path(cached_file))}")
             try:
-                with open(cached_file, 'r') as f:
-                    cached_data = json.load(f)
+                # Streamed, so only the trimmed fields below are held in memory
+                cached_data = read_json_array(cached_file)
                 
                 # Convert cached format to our format
                 scraped_data = []
-                for item in cached_data[:limit] if limit else cached_data:
+                for item in islice(cached_data, limit) if limit else cached_data:
                     url = item.get('url', '')
                     # Skip if already processed
                     if url in processed_urls:
@@ -386,7 +768,7 @@ class LiveResourceClassificationPipeline:
                         'url': url,
                         'title': item.get('title', ''),
                         'description': item.get('summary', item.get('description', '')),
-                        'content': item.get('content', item.get('summary', ''))[:8000],
+                        'content': select_content(item.get('content', item.get('summary', '')), 2000, title=item.get('title', '')),
                         'scraped_at': item.get('scraped_at', datetime.now().isoformat())
                     })
                 
@@ -399,40 +781,41 @@ class LiveResourceClassificationPipeline:
         
         # If not using cache, scrape live
         if not use_cached:
-            # Get URLs from sitemap
-            urls = self.scraper.get_sitemap()
+            # Get URLs (with lastmod) from sitemap
+            entries = self.scraper.get_sitemap_entries()
             
-            if not urls:
+            if not entries:
                 print("❌ No URLs found in sitemap")
                 return existing_results
             
             # Filter out already processed URLs
-            urls_to_process = [url for url in urls if url not in processed_urls]
+            entries_to_process = [entry for entry in entries if entry.url not in processed_urls]
             if limit:
-                urls_to_process = urls_to_process[:limit]
+                entries_to_process = entries_to_process[:limit]
             
-            print(f"📋 {len(urls_to_process)} URLs to process ({len(processed_urls)} already done)")
+            print(f"📋 {len(entries_to_process)} URLs to process ({len(processed_urls)} already done)")
             
-            # Scrape content
-            scraped_data = self.scraper.scrape_multiple(urls_to_process, limit=None)
-            
-            if not scraped_data:
-                print("❌ No content scraped")
-                return existing_results
+            # Scrape content (pages unchanged since the last crawl come from the
+            # cache); pages stream into classification while later ones download
+            scraped_data = self.scraper.iter_entries(entries_to_process)
+            total = len(entries_to_process)
+        else:
+            total = len(scraped_data)
         
         # Classify each resource
-        results = existing_results.copy()
-        total = len(scraped_data)
+        results = existing_results.copy() if keep_results else None
+        classified = 0
+        
+        # New run: start an empty journal (a resumed run keeps appending to it)
+        if not existing_results:
+            self.journal.reset()
         
         print(f"\n🤖 Classifying {total} web resources with Claude Opus 4.5...")
         
-        for i, resource in enumerate(scraped_data, 1):
+        i = 0
+        for i, (resource, classification, duration) in enumerate(self._classify_web_pages(scraped_data), 1):
             print(f"[{i}/{total}] {resource['title'][:60]}...", end=' ')
             
-            start_time = time.time()
-            classification = self.classify_resource(resource, 'web_content')
-            duration = time.time() - start_time
-            
             if classification:
                 result = {
                     'source_type': 'web_content',
@@ -440,28 +823,38 @@ class LiveResourceClassificationPipeline:
                     'refined': classification,
                     'processed_at': datetime.now().isoformat()
                 }
-                results.append(result)
+                if results is not None:
+                    results.append(result)
+                classified += 1
+                self.record_result(result)
                 print(f"✓ ({duration:.1f}s)")
                 
                 # Save progress every 5 items
                 if i % 5 == 0:
-                    self.save_progress(results, {'last_processed': i, 'total': total, 'type': 'web_content'})
+                    self.save_progress({'last_processed': i, 'total': total, 'type': 'web_content'})
             else:
                 print(f"✗ ({duration:.1f}s)")
-            
-            # Rate limiting
-            time.sleep(0.2)
+        
+        if i == 0:
+            print("❌ No content scraped")
         
         # Final save
-        self.save_progress(results, {'completed': True, 'type': 'web_content'})
+        self.finish_progress(results, {'completed': True, 'type': 'web_content'})
         
-        print(f"\n✅ Classified {len(results) - len(existing_results)}/{total} web resources")
-        print(f"   Total: {len(results)} items")
-        return results
+        print(f"\n✅ Classified {classified}/{total} web resources")
+        print(f"   Total: {classified + len(existing_results)} items")
+        return results if results is not None else []
     
-    def process_excel_data(self, crib_sheet_file: str, contacts_file: str, limit: int = None) -> List[Dict[str, Any]]:
-        """Process Excel files (crib sheet and contacts)"""
+    def process_excel_data(self, crib_sheet_file: str, contacts_file: str, limit: int = None,
+                           keep_results: bool = True) -> List[Dict[str, Any]]:
+        """
+        Process Excel files (crib sheet and contacts)
+        
+        With keep_results=False (result store enabled) results are only
+        counted, and an empty list is returned.
+        """
         results = []
+        counts = {'crib_sheet': 0, 'contact': 0}
         
         # Process crib sheet
         print("\n" + "="*80)
@@ -469,36 +862,32 @@ class LiveResourceClassificationPipeline:
         print("="*80)
         
         try:
-            processor = LiveChatCribSheetProcessor(crib_sheet_file)
-            crib_items = processor.create_tagging_dataset()
-            
             if limit:
-                crib_items = crib_items[:limit]
-            
-            print(f"Processing {len(crib_items)} crib sheet items...")
+                print(f"Processing up to {limit} crib sheet items...")
+            else:
+                print(f"Processing crib sheet items...")
             
-            for i, item in enumerate(crib_items, 1):
-                print(f"[{i}/{len(crib_items)}] {item.get('topic', 'Unknown')[:40]}...", end=' ')
-                
-                start_time = time.time()
-                classification = self.classify_resource(item, 'crib_sheet')
-                duration = time.time() - start_time
-                
-                if classification:
-                    result = {
-                        'source_type': 'crib_sheet',
-                        'original': item,
-                        'refined': classification,
-                        'processed_at': datetime.now().isoformat()
-                    }
-                    results.append(result)
-                    print(f"✓ ({duration:.1f}s)")
-                else:
-                    print(f"✗ ({duration:.1f}s)")
-                
-                time.sleep(0.2)
+            # Rows are read as they are classified; the workbook is closed when done
+            with LiveChatCribSheetProcessor(crib_sheet_file, streaming=self.stream_excel) as processor:
+                crib_items = islice(processor.iter_tagging_dataset(), limit or None)
+                for i, (item, classification, duration) in enumerate(self._classify_iter(crib_items, 'crib_sheet'), 1):
+                    progress = f"{i}/{limit}" if limit else f"{i}"
+                    print(f"[{progress}] {item.get('topic', 'Unknown')[:40]}...", end=' ')
+                    
+                    if classification:
+                        counts['crib_sheet'] += 1
+                        if keep_results:
+                            results.append({
+                                'source_type': 'crib_sheet',
+                                'original': item,
+                                'refined': classification,
+                                'processed_at': datetime.now().isoformat()
+                            })
+                        print(f"✓ ({duration:.1f}s)")
+                    else:
+                        print(f"✗ ({duration:.1f}s)")
             
-            print(f"✅ Classified {len([r for r in results if r['source_type'] == 'crib_sheet'])} crib sheet items")
+            print(f"✅ Classified {counts['crib_sheet']} crib sheet items")
             
         except Exception as e:
             print(f"❌ Error processing crib sheet: {e}")
@@ -509,44 +898,139 @@ class LiveResourceClassificationPipeline:
         print("="*80)
         
         try:
-            processor = ContactsProcessor(contacts_file)
-            contact_items = processor.create_tagging_dataset()
-            
             if limit:
-                contact_items = contact_items[:limit]
-            
-            print(f"Processing {len(contact_items)} contact items...")
+                print(f"Processing up to {limit} contact items...")
+            else:
+                print(f"Processing contact items...")
             
-            for i, item in enumerate(contact_items, 1):
-                print(f"[{i}/{len(contact_items)}] {item.get('name', 'Unknown')[:40]}...", end=' ')
-                
-                start_time = time.time()
-                classification = self.classify_resource(item, 'contact')
-                duration = time.time() - start_time
-                
-                if classification:
-                    result = {
-                        'source_type': 'contact',
-                        'original': item,
-                        'refined': classification,
-                        'processed_at': datetime.now().isoformat()
-                    }
-                    results.append(result)
-                    print(f"✓ ({duration:.1f}s)")
-                else:
-                    print(f"✗ ({duration:.1f}s)")
-                
-                time.sleep(0.2)
+            # Rows are read as they are classified; the workbook is closed when done
+            with ContactsProcessor(contacts_file, streaming=self.stream_excel) as processor:
+                contact_items = islice(processor.iter_tagging_dataset(), limit or None)
+                for i, (item, classification, duration) in enumerate(self._classify_iter(contact_items, 'contact'), 1):
+                    progress = f"{i}/{limit}" if limit else f"{i}"
+                    print(f"[{progress}] {item.get('name', 'Unknown')[:40]}...", end=' ')
+                    
+                    if classification:
+                        counts['contact'] += 1
+                        if keep_results:
+                            results.append({
+                                'source_type': 'contact',
+                                'original': item,
+                                'refined': classification,
+                                'processed_at': datetime.now().isoformat()
+                            })
+                        print(f"✓ ({duration:.1f}s)")
+                    else:
+                        print(f"✗ ({duration:.1f}s)")
             
-            print(f"✅ Classified {len([r for r in results if r['source_type'] == 'contact'])} contact items")
+            print(f"✅ Classified {counts['contact']} contact items")
             
         except Exception as e:
             print(f"❌ Error processing contacts: {e}")
         
         return results
     
-    def generate_outputs(self, all_results: List[Dict[str, Any]], output_dir: str):
-        """Generate output files"""
+    def _dynamodb_item(self, position: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert one result to a DynamoDB item"""
+        item = {
+            'resource_id': f"{result['source_type']}_{position:05d}",
+            'source_type': result['source_type'],  # Changed from resource_type to source_type
+            'title': result['original'].get('title', ''),
+            'description': result['original'].get('description', ''),
+            'url': result['original'].get('url', ''),
+            'created_at': result['processed_at']
+        }
+        
+        # Add refined tags
+        refined = result.get('refined', {}).get('refined_tags', {})
+        for key, value in refined.items():
+            if isinstance(value, list):
+                item[key] = value
+            else:
+                item[key] = value
+        
+        # Add metadata
+        metadata = result.get('refined', {}).get('metadata', {})
+        item['metadata'] = metadata
+        
+        # Add recommendations
+        recommendations = result.get('refined', {}).get('recommendations', {})
+        item['recommendations'] = recommendations
+        
+        return item
+    
+    def _excel_row(self, item: Dict[str, Any], full_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the charity Excel row for a DynamoDB item and its full result"""
+        refined = full_result.get('refined', {})
+        refined_tags = refined.get('refined_tags', {})
+        metadata = item.get('metadata', {})
+        recommendations = item.get('recommendations', {})
+        
+        # Handle confidence scores (both formats)
+        confidence_score = 0
+        confidence_scores = refined.get('confidence_scores', {})
+        if isinstance(confidence_scores, dict):
+            confidence_score = confidence_scores.get('overall_classification', 0)
+        else:
+            confidence_score = metadata.get('confidence_score', 0)
+
+        # Handle suggested new tags (adaptive classification)
+        suggested_tags = refined.get('suggested_new_tags', [])
+        suggested_tags_str = ''
+        if suggested_tags:
+            suggested_tags_str = '; '.join([
+                f"{tag.get('tag', '')} ({tag.get('confidence', 0)}%)"
+                for tag in suggested_tags[:3]  # Top 3 suggestions
+            ])
+
+        row = {
+            'Resource ID': item['resource_id'],
+            'Source': item['source_type'],  # Changed from resource_type to source_type
+            'Title': item['title'],
+            'Description': item['description'][:200],
+            'URL': item.get('url', ''),
+            'Personas': clean_tags_list(refined_tags.get('personas', [])),
+            'Condition Types': clean_tags_list(refined_tags.get('types', [])),
+            'Journey Stages': clean_tags_list(refined_tags.get('stages', [])),
+            'Topics': clean_tags_list(refined_tags.get('topics', [])),
+            'Symptoms': clean_tags_list(refined_tags.get('symptoms', [])),
+            'Locations': clean_tags_list(refined_tags.get('locations', [])),
+            'Reading Time': metadata.get('estimated_time', ''),
+            'Complexity': metadata.get('complexity_level', ''),
+
+            # Confidence scores (detailed)
+            'Overall Confidence': confidence_score,
+            'Persona Match': confidence_scores.get('persona_match', '') if isinstance(confidence_scores, dict) else '',
+            'Stage Match': confidence_scores.get('stage_match', '') if isinstance(confidence_scores, dict) else '',
+            'Topic Relevance': confidence_scores.get('topic_relevance', '') if isinstance(confidence_scores, dict) else '',
+
+            # Adaptive classification
+            'Suggested New Tags': suggested_tags_str,
+            'Has Gap': 'Yes' if suggested_tags else 'No',
+
+            'When to Use': recommendations.get('best_used_when', ''),
+            'Staff Notes': recommendations.get('staff_notes', ''),
+            'Processed': item['created_at']
+        }
+        return row
+    
+    def _iter_excel_rows(self, complete_file: Path) -> Iterator[Dict[str, Any]]:
+        """Re-read the complete JSON output as charity Excel rows"""
+        for i, result in enumerate(read_json_array(str(complete_file)), 1):
+            yield self._excel_row(self._dynamodb_item(i, result), result)
+    
+    def generate_outputs(self, all_results: Iterable[Dict[str, Any]], output_dir: str) -> Dict[str, int]:
+        """
+        Generate output files
+        
+        `all_results` is read once (a result store stream or a list); the JSON
+        files and the 'All Resources' sheet are written row by row as results
+        arrive, and the grouped sheets re-read the complete JSON file, so no
+        output is held in memory.
+        
+        Returns:
+            Number of results written per source type
+        """
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
@@ -555,148 +1039,85 @@ class LiveResourceClassificationPipeline:
         print("="*80)
         
         # 1. Complete JSON - Knowledge Base ready format
-        complete_file = output_path / 'encephalitis_content_database.json'
-        with open(complete_file, 'w') as f:
-            json.dump(all_results, f, indent=2)
-        print(f"✅ Saved: {get_relative_path(complete_file)}")
-        
         # 2. DynamoDB JSON
-        dynamodb_items = []
-        for i, result in enumerate(all_results, 1):
-            item = {
-                'resource_id': f"{result['source_type']}_{i:05d}",
-                'source_type': result['source_type'],  # Changed from resource_type to source_type
-                'title': result['original'].get('title', ''),
-                'description': result['original'].get('description', ''),
-                'url': result['original'].get('url', ''),
-                'created_at': result['processed_at']
-            }
-            
-            # Add refined tags
-            refined = result.get('refined', {}).get('refined_tags', {})
-            for key, value in refined.items():
-                if isinstance(value, list):
-                    item[key] = value
-                else:
-                    item[key] = value
-            
-            # Add metadata
-            metadata = result.get('refined', {}).get('metadata', {})
-            item['metadata'] = metadata
-            
-            # Add recommendations
-            recommendations = result.get('refined', {}).get('recommendations', {})
-            item['recommendations'] = recommendations
-            
-            dynamodb_items.append(item)
-        
+        # 3. Excel for charity staff (enhanced with adaptive classification support)
+        complete_file = output_path / 'encephalitis_content_database.json'
         dynamodb_file = output_path / 'dynamodb_resources.json'
-        with open(dynamodb_file, 'w') as f:
-            json.dump(dynamodb_items, f, indent=2)
-        print(f"✅ Saved: {get_relative_path(dynamodb_file)}")
+        excel_file = output_path / 'classified_resources_for_charity.xlsx'
         
-        # 3. Excel for charity staff (enhanced with adaptive classification support)
-        excel_data = []
-        for item in dynamodb_items:
-            result_idx = dynamodb_items.index(item)
-            full_result = all_results[result_idx] if result_idx < len(all_results) else {}
-            refined = full_result.get('refined', {})
-            refined_tags = refined.get('refined_tags', {})
-            metadata = item.get('metadata', {})
-            recommendations = item.get('recommendations', {})
+        personas = ['Patient', 'Caregiver', 'Parent', 'Professional', 'Bereaved']
+        gap_columns = ['Title', 'Suggested New Tags', 'Personas', 'Topics', 'Overall Confidence', 'URL']
+        source_counts = {}
+        persona_counts = dict.fromkeys(personas, 0)
+        columns = []
+        confidence_total, confidence_count = 0, 0
+        gap_count = 0
+        
+        with StreamingWriter(str(excel_file)) as excel_writer:
+            with JsonArrayWriter(str(complete_file)) as complete_writer, \
+                    JsonArrayWriter(str(dynamodb_file)) as dynamodb_writer:
+                for i, result in enumerate(all_results, 1):
+                    complete_writer.write(result)
+                    
+                    item = self._dynamodb_item(i, result)
+                    dynamodb_writer.write(item)
+                    
+                    row = self._excel_row(item, result)
+                    if i == 1:
+                        columns = list(row)
+                        excel_writer.add_sheet('All Resources', columns)
+                    excel_writer.write_row(row)
+                    
+                    source_counts[row['Source']] = source_counts.get(row['Source'], 0) + 1
+                    for persona in personas:
+                        if persona.lower() in row['Personas'].lower():
+                            persona_counts[persona] += 1
+                    if row['Overall Confidence'] > 0:
+                        confidence_total += row['Overall Confidence']
+                        confidence_count += 1
+                    if row['Has Gap'] == 'Yes':
+                        gap_count += 1
             
-            # Handle confidence scores (both formats)
-            confidence_score = 0
-            confidence_scores = refined.get('confidence_scores', {})
-            if isinstance(confidence_scores, dict):
-                confidence_score = confidence_scores.get('overall_classification', 0)
-            else:
-                confidence_score = metadata.get('confidence_score', 0)
+            print(f"✅ Saved: {get_relative_path(complete_file)}")
+            print(f"✅ Saved: {get_relative_path(dynamodb_file)}")
             
-            # Handle suggested new tags (adaptive classification)
-            suggested_tags = refined.get('suggested_new_tags', [])
-            suggested_tags_str = ''
-            if suggested_tags:
-                suggested_tags_str = '; '.join([
-                    f"{tag.get('tag', '')} ({tag.get('confidence', 0)}%)"
-                    for tag in suggested_tags[:3]  # Top 3 suggestions
-                ])
-            
-            row = {
-                'Resource ID': item['resource_id'],
-                'Source': item['source_type'],  # Changed from resource_type to source_type
-                'Title': item['title'],
-                'Description': item['description'][:200],
-                'URL': item.get('url', ''),
-                'Personas': clean_tags_list(refined_tags.get('personas', [])),
-                'Condition Types': clean_tags_list(refined_tags.get('types', [])),
-                'Journey Stages': clean_tags_list(refined_tags.get('stages', [])),
-                'Topics': clean_tags_list(refined_tags.get('topics', [])),
-                'Symptoms': clean_tags_list(refined_tags.get('symptoms', [])),
-                'Locations': clean_tags_list(refined_tags.get('locations', [])),
-                'Reading Time': metadata.get('estimated_time', ''),
-                'Complexity': metadata.get('complexity_level', ''),
-                
-                # Confidence scores (detailed)
-                'Overall Confidence': confidence_score,
-                'Persona Match': confidence_scores.get('persona_match', '') if isinstance(confidence_scores, dict) else '',
-                'Stage Match': confidence_scores.get('stage_match', '') if isinstance(confidence_scores, dict) else '',
-                'Topic Relevance': confidence_scores.get('topic_relevance', '') if isinstance(confidence_scores, dict) else '',
-                
-                # Adaptive classification
-                'Suggested New Tags': suggested_tags_str,
-                'Has Gap': 'Yes' if suggested_tags else 'No',
-                
-                'When to Use': recommendations.get('best_used_when', ''),
-                'Staff Notes': recommendations.get('staff_notes', ''),
-                'Processed': item['created_at']
-            }
-            excel_data.append(row)
-        
-        df = pd.DataFrame(excel_data)
-        
-        excel_file = output_path / 'classified_resources_for_charity.xlsx'
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='All Resources', index=False)
+            total = sum(source_counts.values())
+            if not total:
+                excel_writer.add_sheet('All Resources', [])
             
             # By Persona
-            for persona in ['Patient', 'Caregiver', 'Parent', 'Professional', 'Bereaved']:
-                persona_df = df[df['Personas'].str.contains(persona, case=False, na=False)]
-                if not persona_df.empty:
-                    persona_df.to_excel(writer, sheet_name=f'By {persona}', index=False)
+            for persona in personas:
+                if persona_counts[persona]:
+                    excel_writer.add_sheet(f'By {persona}', columns)
+                    for row in self._iter_excel_rows(complete_file):
+                        if persona.lower() in row['Personas'].lower():
+                            excel_writer.write_row(row)
             
             # Suggested Tags (Adaptive Classification)
-            gap_df = df[df['Has Gap'] == 'Yes'][['Title', 'Suggested New Tags', 'Personas', 'Topics', 'Overall Confidence', 'URL']]
-            if not gap_df.empty:
-                gap_df.to_excel(writer, sheet_name='Suggested Tags', index=False)
+            if gap_count:
+                excel_writer.add_sheet('Suggested Tags', gap_columns)
+                for row in self._iter_excel_rows(complete_file):
+                    if row['Has Gap'] == 'Yes':
+                        excel_writer.write_row(row)
             
             # Statistics
-            confidence_scores_list = [score for score in df['Overall Confidence'] if score > 0]
-            avg_confidence = sum(confidence_scores_list) / len(confidence_scores_list) if confidence_scores_list else 0
+            avg_confidence = confidence_total / confidence_count if confidence_count else 0
             
-            stats_data = {
-                'Metric': [
-                    'Total Resources',
-                    'Web Content',
-                    'Crib Sheet Items',
-                    'Contact Items',
-                    'Avg Overall Confidence',
-                    'Items with Confidence Scores',
-                    'Items with Suggested Tags'
-                ],
-                'Value': [
-                    len(df),
-                    len(df[df['Source'] == 'web_content']),
-                    len(df[df['Source'] == 'crib_sheet']),
-                    len(df[df['Source'] == 'contact']),
-                    f"{avg_confidence:.1f}",
-                    len(confidence_scores_list),
-                    len(df[df['Has Gap'] == 'Yes'])
-                ]
-            }
-            pd.DataFrame(stats_data).to_excel(writer, sheet_name='Statistics', index=False)
+            stats_data = [
+                ('Total Resources', total),
+                ('Web Content', source_counts.get('web_content', 0)),
+                ('Crib Sheet Items', source_counts.get('crib_sheet', 0)),
+                ('Contact Items', source_counts.get('contact', 0)),
+                ('Avg Overall Confidence', f"{avg_confidence:.1f}"),
+                ('Items with Confidence Scores', confidence_count),
+                ('Items with Suggested Tags', gap_count)
+            ]
+            excel_writer.add_sheet('Statistics', ['Metric', 'Value'])
+            for metric, value in stats_data:
+                excel_writer.write_row({'Metric': metric, 'Value': value})
         
         print(f"✅ Saved: {get_relative_path(excel_file)}")
+        return source_counts
     
     def run_complete_pipeline(self, crib_sheet_file: str, contacts_file: str, 
                             limit_per_source: int = None, output_dir: str = 'Output',
@@ -715,21 +1136,40 @@ class LiveResourceClassificationPipeline:
         
         all_results = []
         
+        if self.store is not None:
+            self.run_id = self.store.start_run('process_live_resources')
+        
+        # With the result store, results are only recorded while classifying
+        # and every output is streamed back from the store
+        keep_results = self.store is None
+        
         # 1. Process web content (live or cached)
         web_results = self.process_web_content(
             limit=limit_per_source, 
             use_cached=use_cached_web, 
-            cached_file=cached_web_file
+            cached_file=cached_web_file,
+            keep_results=keep_results
         )
         all_results.extend(web_results)
         
         # 2. Process Excel data
-        excel_results = self.process_excel_data(crib_sheet_file, contacts_file, limit=limit_per_source)
+        excel_results = self.process_excel_data(crib_sheet_file, contacts_file, limit=limit_per_source,
+                                                keep_results=keep_results)
         all_results.extend(excel_results)
         
-        # 3. Generate outputs
-        if all_results:
-            self.generate_outputs(all_results, output_dir)
+        # 3. Generate outputs - streamed from the result store when it is enabled
+        source_counts = {}
+        if self.store is not None:
+            counts = self.store.count_results(self.run_id)
+            if counts['items'] > counts['errors']:
+                source_counts = self.generate_outputs(
+                    (r for r in self.store.iter_results(self.run_id) if 'error' not in r),
+                    output_dir
+                )
+            self.store.update_run(self.run_id, {'completed': True, 'total': sum(source_counts.values())}, status='completed')
+        elif all_results:
+            source_counts = self.generate_outputs(all_results, output_dir)
+        total_items = sum(source_counts.values())
         
         # Summary
         duration = time.time() - start_time
@@ -738,13 +1178,22 @@ class LiveResourceClassificationPipeline:
         print("PIPELINE COMPLETE")
         print("="*80)
         print(f"Total processing time: {duration/60:.1f} minutes")
-        print(f"Total items processed: {len(all_results)}")
-        print(f"  - Web content: {len([r for r in all_results if r['source_type'] == 'web_content'])}")
-        print(f"  - Crib sheet: {len([r for r in all_results if r['source_type'] == 'crib_sheet'])}")
-        print(f"  - Contacts: {len([r for r in all_results if r['source_type'] == 'contact'])}")
+        print(f"Total items processed: {total_items}")
+        print(f"  - Web content: {source_counts.get('web_content', 0)}")
+        print(f"  - Crib sheet: {source_counts.get('crib_sheet', 0)}")
+        print(f"  - Contacts: {source_counts.get('contact', 0)}")
+        print(f"Bedrock requests: {self.usage.stats['requests']}")
+        print(self.usage.summary())
+        if self.store is not None:
+            print(f"Reused from classification store: {self.store.stats['hits']} "
+                  f"({self.store.stats['misses']} new or changed)")
+        if self.dedup is not None:
+            print(self.dedup.summary())
         
+        # 'results' is only populated without the result store (read the run
+        # back with store.iter_results otherwise)
         return {
-            'total_items': len(all_results),
+            'total_items': total_items,
             'duration_minutes': duration/60,
             'results': all_results
         }
@@ -753,13 +1202,73 @@ class LiveResourceClassificationPipeline:
 if __name__ == "__main__":
     import sys
     
-    # Initialize pipeline
-    pipeline = LiveResourceClassificationPipeline(region_name='us-west-2')
-    
     # Check for test mode
     test_mode = '--test' in sys.argv
     use_cached = '--cached' in sys.argv
     
+    # Check for batched prompts
+    batch_size = 1
+    if '--batch-size' in sys.argv:
+        try:
+            batch_idx = sys.argv.index('--batch-size')
+            if batch_idx + 1 < len(sys.argv):
+                batch_size = int(sys.argv[batch_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    
+    # Check for scraping concurrency
+    scrape_workers = 8
+    if '--scrape-workers' in sys.argv:
+        try:
+            workers_idx = sys.argv.index('--scrape-workers')
+            if workers_idx + 1 < len(sys.argv):
+                scrape_workers = int(sys.argv[workers_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    
+    # Check for HTML extraction engine
+    html_engine = 'auto'
+    if '--html-engine' in sys.argv:
+        engine_idx = sys.argv.index('--html-engine')
+        if engine_idx + 1 < len(sys.argv):
+            html_engine = sys.argv[engine_idx + 1]
+    
+    # Check for HTML parser processes
+    parse_workers = None
+    if '--parse-workers' in sys.argv:
+        try:
+            parse_idx = sys.argv.index('--parse-workers')
+            if parse_idx + 1 < len(sys.argv):
+                parse_workers = int(sys.argv[parse_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    
+    # Check for near-duplicate similarity threshold
+    dedup_threshold = 0.9
+    if '--dedup-threshold' in sys.argv:
+        try:
+            dedup_idx = sys.argv.index('--dedup-threshold')
+            if dedup_idx + 1 < len(sys.argv):
+                dedup_threshold = float(sys.argv[dedup_idx + 1])
+        except (ValueError, IndexError):
+            pass
+    if '--no-dedup' in sys.argv:
+        dedup_threshold = None
+    
+    # Initialize pipeline
+    pipeline = LiveResourceClassificationPipeline(
+        region_name='us-west-2',
+        batch_size=batch_size,
+        scrape_workers=scrape_workers,
+        html_engine=html_engine,
+        parse_workers=parse_workers,
+        dedup_threshold=dedup_threshold,
+        http_cache_path=None if '--no-http-cache' in sys.argv else 'temp/http_cache.db',
+        frontier_path=None if '--full-crawl' in sys.argv else 'temp/crawl_frontier.db',
+        store_path=None if '--no-store' in sys.argv else 'temp/classification_store.db',
+        stream_excel='--stream-excel' in sys.argv
+    )
+    
     # Check for custom limit
     limit = None
     if '--limit' in sys.argv:
@@ -0,0 +1,217 @@
+"""
+Multi-Item Batched Classification
+Packs several items into one Bedrock request so the static taxonomy preamble is paid once per batch
+
+FEATURES:
+- Token-budget packing (max items AND max estimated input tokens per request)
+- Tolerant JSON array parsing (recovers every complete object from truncated output)
+- Results matched back to items by item_id
+- Split-and-retry of only the items that failed to parse, down to single items
+- Static instructions sent as a separate (cacheable) system prompt
+
+USAGE:
+    classifier = BatchClassifier(invoke_text=call_bedrock, max_items=10, token_budget=60000)
+    for batch in classifier.pack(items, to_batch_item=convert):
+        refined = classifier.classify_batch([convert(item) for item in batch])   # one dict (or None) per item
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from scripts.bedrock_executor import estimate_tokens
+from scripts.bedrock_tag_refinement_prompt import BedrockTagRefinementPrompt
+
+
+# Rough output size of one classified item in the batch response format
+OUTPUT_TOKENS_PER_ITEM = 700
+MAX_BATCH_OUTPUT_TOKENS = 32000
+
+
+def parse_batch_response(text: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Parse a batch classification response into {item_id: classification}
+
+    Tries the whole JSON array first; if that fails (truncated or malformed
+    output), every complete top-level object carrying an item_id is recovered
+    individually so only the broken items need a retry.
+
+    Args:
+        text: Raw model response text
+
+    Returns:
+        Dict mapping item_id (int) to the parsed classification object
+    """
+    if '```json' in text:
+        start = text.find('```json') + 7
+        end = text.find('```', start)
+        text = text[start:end if end != -1 else len(text)].strip()
+
+    parsed = {}
+
+    start = text.find('[')
+    end = text.rfind(']') + 1
+    if start != -1 and end > start:
+        try:
+            array = json.loads(text[start:end])
+            if isinstance(array, list):
+                for obj in array:
+                    if isinstance(obj, dict) and 'item_id' in obj:
+                        try:
+                            parsed[int(obj['item_id'])] = obj
+                        except (TypeError, ValueError):
+                            continue
+                return parsed
+        except json.JSONDecodeError:
+            pass
+
+    # Fallback: decode each complete object independently
+    decoder = json.JSONDecoder()
+    position = text.find('{')
+    while position != -1:
+        try:
+            obj, end_position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            position = text.find('{', position + 1)
+            continue
+
+        if isinstance(obj, dict) and 'item_id' in obj:
+            try:
+                parsed[int(obj['item_id'])] = obj
+            except (TypeError, ValueError):
+                pass
+        position = text.find('{', end_position)
+
+    return parsed
+
+
+class BatchClassifier:
+    """
+    Classifies items N-at-a-time with the batch refinement prompt
+    """
+
+    def __init__(
+        self,
+        invoke_text: Callable[[str, str, int], str],
+        max_items: int = 10,
+        token_budget: int = 60000,
+        prompt_builder: Optional[BedrockTagRefinementPrompt] = None
+    ):
+        """
+        Initialize batch classifier
+
+        Args:
+            invoke_text: Function (system_prompt, user_prompt, max_tokens) -> response text
+            max_items: Maximum items per request
+            token_budget: Maximum estimated input tokens per request
+            prompt_builder: Prompt builder (default: BedrockTagRefinementPrompt)
+        """
+        self.invoke_text = invoke_text
+        self.max_items = max(1, max_items)
+        self.token_budget = token_budget
+        self.prompt_builder = prompt_builder or BedrockTagRefinementPrompt()
+
+        # Cost of the static preamble, paid once per request
+        self.system_prompt = self.prompt_builder.build_batch_refinement_system_prompt()
+        self.preamble_tokens = (estimate_tokens(self.system_prompt)
+                                + estimate_tokens(self.prompt_builder.build_batch_refinement_item_prompt([])))
+
+        self.stats = {'requests': 0, 'items': 0, 'retried_items': 0, 'failed_items': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1):
+        """Increment a stats counter (batches may run on several worker threads)"""
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def item_tokens(self, item: Dict[str, Any]) -> int:
+        """Estimated input tokens one item adds to a batch prompt"""
+        return estimate_tokens(self.prompt_builder.format_batch_item(self.max_items, item))
+
+    def pack(
+        self,
+        items: Iterable[Any],
+        to_batch_item: Optional[Callable[[Any], Dict[str, Any]]] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Group items into batches within the item and token limits
+
+        Consumes `items` lazily, so it works with generators.
+
+        Args:
+            items: Items to group
+            to_batch_item: Converts an item to batch-prompt format for token
+                           estimation (default: items are already in that format)
+
+        Yields:
+            Lists of the original items (each at least one item)
+        """
+        batch = []
+        batch_tokens = self.preamble_tokens
+
+        for item in items:
+            tokens = self.item_tokens(to_batch_item(item) if to_batch_item else item)
+            if batch and (len(batch) >= self.max_items or batch_tokens + tokens > self.token_budget):
+                yield batch
+                batch = []
+                batch_tokens = self.preamble_tokens
+            batch.append(item)
+            batch_tokens += tokens
+
+        if batch:
+            yield batch
+
+    def _request(self, batch: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Send one batch request and return parsed results keyed by item_id"""
+        prompt = self.prompt_builder.build_batch_refinement_item_prompt(batch, max_items=len(batch))
+        max_tokens = min(MAX_BATCH_OUTPUT_TOKENS, OUTPUT_TOKENS_PER_ITEM * len(batch) + 500)
+
+        self._count('requests')
+        try:
+            text = self.invoke_text(self.system_prompt, prompt, max_tokens)
+        except Exception as e:
+            print(f"   ⚠️  Batch request failed ({len(batch)} items): {e}")
+            return {}
+        return parse_batch_response(text)
+
+    def classify_batch(self, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Classify a batch, splitting and retrying only the items that failed
+
+        Args:
+            batch: Items in batch-prompt format (see format_batch_item)
+
+        Returns:
+            One classification dict per input item (same order), or None where
+            the item could not be classified
+        """
+        self._count('items', len(batch))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        self._classify_into(batch, list(range(len(batch))), results)
+        return results
+
+    def _classify_into(self, batch: List[Dict[str, Any]], positions: List[int], results: List[Optional[Dict[str, Any]]]):
+        """Classify batch items at `positions`, recursing on the failures"""
+        sub_batch = [batch[pos] for pos in positions]
+        parsed = self._request(sub_batch)
+
+        failed = []
+        for item_id, pos in enumerate(positions, 1):
+            classification = parsed.get(item_id)
+            if classification is not None and isinstance(classification.get('refined_tags'), dict):
+                results[pos] = classification
+            else:
+                failed.append(pos)
+
+        if not failed:
+            return
+
+        if len(positions) > 1:
+            # Retry only the failures, halving the batch each round
+            self._count('retried_items', len(failed))
+            middle = (len(failed) + 1) // 2
+            for half in (failed[:middle], failed[middle:]):
+                if half:
+                    self._classify_into(batch, half, results)
+        else:
+            self._count('failed_items')
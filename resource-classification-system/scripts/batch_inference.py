@@ -0,0 +1,322 @@
+"""
+Bedrock Batch Inference (offline jobs)
+Runs a whole corpus of classification prompts as one Bedrock model invocation job
+instead of thousands of synchronous invoke_model calls
+
+FEATURES:
+- JSONL manifest writer ({"recordId", "modelInput"} per line, the Bedrock batch format)
+- Bedrock runner: uploads the manifest to S3, submits the job, polls until it
+  finishes (or gives up after max_wait_seconds) and streams the .jsonl.out
+  records back
+- Local runner with the same interface, processing the manifest with a stub
+  model (for testing the pipeline without AWS)
+
+USAGE:
+    write_manifest(records, 'temp/batch_inference/job.jsonl')
+    runner = LocalBatchInferenceRunner()          # or BedrockBatchInferenceRunner(...)
+    for record_id, model_output, error in runner.run('temp/batch_inference/job.jsonl', 'job'):
+        ...
+
+NOTE:
+    Bedrock rejects jobs below a minimum record count (100 by default, see the
+    service quotas for your account) - callers should fall back to synchronous
+    calls for small runs.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# Job statuses that mean the job is still queued or running
+ACTIVE_JOB_STATUSES = {'Submitted', 'Validating', 'Scheduled', 'InProgress', 'Stopping'}
+
+# Finished statuses whose output can be read
+READABLE_JOB_STATUSES = {'Completed', 'PartiallyCompleted'}
+
+
+def write_manifest(records: Iterable[Tuple[str, Dict[str, Any]]], manifest_path: str) -> int:
+    """
+    Write a batch inference manifest
+
+    Args:
+        records: Iterable of (record_id, model_input) where model_input is an
+                 invoke_model request body
+        manifest_path: Path of the JSONL file to write
+
+    Returns:
+        Number of records written
+    """
+    Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+
+    count = 0
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for record_id, model_input in records:
+            f.write(json.dumps({'recordId': record_id, 'modelInput': model_input}, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def parse_output_records(lines: Iterable[Any]) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Parse batch output lines
+
+    Args:
+        lines: JSONL lines (str or bytes) from a .jsonl.out file
+
+    Yields:
+        Tuples of (record_id, model_output, error_message) - model_output is
+        None when the record failed
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+        record_id = record.get('recordId')
+        if record_id is None:
+            continue
+
+        error = record.get('error')
+        if error:
+            message = error.get('errorMessage', str(error)) if isinstance(error, dict) else str(error)
+            yield record_id, None, message
+        else:
+            yield record_id, record.get('modelOutput'), None
+
+
+def stub_model(model_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stand-in model for local batch runs
+
+    Returns a Messages API response whose text is a minimal, valid
+    classification (empty tag lists), so downstream parsing and output
+    generation can be exercised without Bedrock.
+    """
+    classification = {
+        'refined_tags': {
+            'personas': [],
+            'types': [],
+            'stages': [],
+            'topics': [],
+            'symptoms': [],
+            'locations': [],
+            'conditions': [],
+            'resource_type': [],
+            'content_length': '',
+            'content_format': '',
+            'playlists': []
+        },
+        'changes': {'reasoning': 'Stub model output (local batch run)'},
+        'recommendations': {},
+        'metadata': {},
+        'confidence_score': 0
+    }
+    prompt_chars = len(json.dumps(model_input.get('system', []))) + len(json.dumps(model_input.get('messages', [])))
+
+    return {
+        'type': 'message',
+        'role': 'assistant',
+        'content': [{'type': 'text', 'text': json.dumps(classification)}],
+        'stop_reason': 'end_turn',
+        'usage': {'input_tokens': prompt_chars // 4, 'output_tokens': 0}
+    }
+
+
+class LocalBatchInferenceRunner:
+    """
+    Processes a batch manifest locally, writing a Bedrock-style .jsonl.out file
+    """
+
+    min_records = 0
+
+    def __init__(self, model: Callable[[Dict[str, Any]], Dict[str, Any]] = stub_model):
+        """
+        Initialize local runner
+
+        Args:
+            model: Function (model_input) -> model_output (default: stub_model)
+        """
+        self.model = model
+
+    def run(self, manifest_path: str, job_name: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Run every manifest record through the local model
+
+        Args:
+            manifest_path: JSONL manifest written by write_manifest
+            job_name: Job name (used for log output only)
+
+        Yields:
+            Tuples of (record_id, model_output, error_message)
+        """
+        output_path = f"{manifest_path}.out"
+        print(f"🧪 Local batch job '{job_name}': {manifest_path}")
+
+        with open(manifest_path, 'r', encoding='utf-8') as manifest, \
+                open(output_path, 'w', encoding='utf-8') as output:
+            for line in manifest:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                try:
+                    record['modelOutput'] = self.model(record['modelInput'])
+                except Exception as e:
+                    record['error'] = {'errorCode': 500, 'errorMessage': str(e)}
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        print(f"✓ Local batch output: {output_path}")
+
+        with open(output_path, 'r', encoding='utf-8') as f:
+            yield from parse_output_records(f)
+
+
+class BedrockBatchInferenceRunner:
+    """
+    Submits a manifest as a Bedrock model invocation job and streams the results
+    """
+
+    min_records = 100
+
+    def __init__(
+        self,
+        bedrock_client,
+        s3_client,
+        bucket: str,
+        role_arn: str,
+        model_id: str,
+        prefix: str = 'batch-inference',
+        poll_interval: int = 60,
+        timeout_hours: int = 24,
+        max_wait_seconds: float = 6 * 3600
+    ):
+        """
+        Initialize Bedrock batch runner
+
+        Args:
+            bedrock_client: boto3 'bedrock' (control plane) client
+            s3_client: boto3 S3 client
+            bucket: S3 bucket for job input and output
+            role_arn: IAM role Bedrock assumes to read/write the bucket
+            model_id: Model or inference profile ID
+            prefix: S3 key prefix for job files
+            poll_interval: Seconds between job status checks
+            timeout_hours: Job timeout passed to Bedrock
+            max_wait_seconds: Give up (and stop the job) if it is still queued
+                              or running after this long
+        """
+        self.bedrock = bedrock_client
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.role_arn = role_arn
+        self.model_id = model_id
+        self.prefix = prefix.strip('/')
+        self.poll_interval = poll_interval
+        self.timeout_hours = timeout_hours
+        self.max_wait_seconds = max_wait_seconds
+
+    def submit(self, manifest_path: str, job_name: str) -> str:
+        """
+        Upload the manifest and create the invocation job
+
+        Returns:
+            Job ARN
+        """
+        input_key = f"{self.prefix}/input/{job_name}/{os.path.basename(manifest_path)}"
+        self.s3.upload_file(manifest_path, self.bucket, input_key)
+        print(f"✓ Uploaded manifest to s3://{self.bucket}/{input_key}")
+
+        response = self.bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=self.model_id,
+            inputDataConfig={
+                's3InputDataConfig': {
+                    's3Uri': f"s3://{self.bucket}/{input_key}",
+                    's3InputFormat': 'JSONL'
+                }
+            },
+            outputDataConfig={
+                's3OutputDataConfig': {
+                    's3Uri': f"s3://{self.bucket}/{self.prefix}/output/{job_name}/"
+                }
+            },
+            timeoutDurationInHours=self.timeout_hours
+        )
+        job_arn = response['jobArn']
+        print(f"✓ Submitted batch job: {job_arn}")
+        return job_arn
+
+    def wait(self, job_arn: str) -> Dict[str, Any]:
+        """
+        Poll the job until it leaves the active states
+
+        Returns:
+            Final get_model_invocation_job response
+
+        Raises:
+            RuntimeError: If the job failed, stopped or expired, or is still
+                          active after max_wait_seconds
+        """
+        start = time.time()
+        while True:
+            job = self.bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+            status = job['status']
+            if status not in ACTIVE_JOB_STATUSES:
+                break
+            if time.time() - start > self.max_wait_seconds:
+                # Best effort: don't leave a job we no longer wait for running
+                try:
+                    self.bedrock.stop_model_invocation_job(jobIdentifier=job_arn)
+                except Exception as e:
+                    print(f"   ⚠️  Could not stop batch job {job_arn}: {e}")
+                raise RuntimeError(
+                    f"Batch job {job_arn} still {status} after {self.max_wait_seconds / 60:.0f} minutes"
+                )
+            print(f"   ⏳ Batch job {status} ({(time.time() - start) / 60:.0f} min elapsed)")
+            time.sleep(self.poll_interval)
+
+        if status not in READABLE_JOB_STATUSES:
+            raise RuntimeError(f"Batch job {job_arn} ended with status {status}: {job.get('message', '')}")
+
+        print(f"✓ Batch job {status} in {(time.time() - start) / 60:.1f} minutes")
+        return job
+
+    def _output_keys(self, job_name: str, job_arn: str) -> Iterator[str]:
+        """List the .jsonl.out files Bedrock wrote for the job"""
+        job_id = job_arn.split('/')[-1]
+        prefix = f"{self.prefix}/output/{job_name}/{job_id}/"
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith('.jsonl.out'):
+                    yield obj['Key']
+
+    def run(self, manifest_path: str, job_name: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Submit the manifest, wait for the job and stream its output records
+
+        Args:
+            manifest_path: JSONL manifest written by write_manifest
+            job_name: Unique job name
+
+        Yields:
+            Tuples of (record_id, model_output, error_message)
+        """
+        job_arn = self.submit(manifest_path, job_name)
+        self.wait(job_arn)
+
+        for key in self._output_keys(job_name, job_arn):
+            body = self.s3.get_object(Bucket=self.bucket, Key=key)['Body']
+            yield from parse_output_records(body.iter_lines())
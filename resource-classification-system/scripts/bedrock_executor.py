@@ -0,0 +1,239 @@
+"""
+Parallel Bedrock Classification Executor
+Bounded-concurrency execution of classification calls with quota-aware rate limiting
+
+FEATURES:
+- Runs with the ordered thread-pool executor in scripts.concurrent_executor
+- Token-bucket limiter for Bedrock requests-per-minute AND tokens-per-minute quotas
+- Adaptive backoff on throttling (halves the send rate, recovers gradually)
+- Ordered result collection (results come back in input order, so
+  checkpoint counting and resume keep working)
+- Lazy consumption of input iterables (bounded number of items in flight)
+- Token usage accounting, including prompt-cache reads and writes
+
+USAGE:
+    limiter = BedrockRateLimiter(requests_per_minute=50, tokens_per_minute=400000)
+    executor = ConcurrentExecutor(max_workers=4)      # scripts.concurrent_executor
+
+    for item, result, elapsed in executor.map_ordered(classify, items):
+        results.append(result)
+
+    usage = TokenUsageTracker()
+    usage.record(response_body)        # after each invoke_model call
+    print(usage.summary())
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from scripts.rate_limiter import TokenBucket
+
+
+# Error codes Bedrock uses when a quota is exceeded or capacity is short
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ServiceQuotaExceededException',
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for Claude models (~4 characters per token)
+
+    Args:
+        text: Prompt or content text
+
+    Returns:
+        Estimated token count (never less than 1 for non-empty text)
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Check whether an exception is a Bedrock throttling/capacity error
+
+    Works with botocore ClientError (inspects the error code) and falls back
+    to the error message for other exception types.
+    """
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code', '')
+        if code in THROTTLING_ERROR_CODES:
+            return True
+
+    message = str(error).lower()
+    return any(marker in message for marker in ('throttl', 'too many requests', 'rate exceeded'))
+
+
+class BedrockRateLimiter:
+    """
+    Rate limiter that respects Bedrock RPM and TPM quotas
+
+    Every call takes one request token and its estimated token cost from two
+    buckets. When Bedrock throttles anyway, the send rate is halved
+    (multiplicative decrease) and the call is retried after an exponential
+    backoff with jitter; each success restores 10% of the configured rate
+    (additive increase) until the full quota is back.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 50,
+        tokens_per_minute: int = 400000,
+        min_rate_fraction: float = 0.1,
+        max_backoff: float = 60.0
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            requests_per_minute: Bedrock RPM quota for the model
+            tokens_per_minute: Bedrock TPM quota for the model (input + max output tokens)
+            min_rate_fraction: Lowest fraction of the quota adaptive backoff may drop to
+            max_backoff: Maximum seconds to wait after a throttling error
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_fraction = min_rate_fraction
+        self.max_backoff = max_backoff
+
+        # Burst capacity of a few seconds keeps the first requests fast without busting the quota
+        self._request_bucket = TokenBucket(
+            rate=requests_per_minute / 60.0,
+            capacity=max(1.0, requests_per_minute / 12.0)
+        )
+        self._token_bucket = TokenBucket(
+            rate=tokens_per_minute / 60.0,
+            capacity=max(1.0, tokens_per_minute / 6.0)
+        )
+
+        self._rate_fraction = 1.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'requests': 0, 'throttled': 0, 'estimated_tokens': 0}
+
+    @property
+    def rate_fraction(self) -> float:
+        """Current fraction of the configured quota being used"""
+        return self._rate_fraction
+
+    def _apply_rate(self):
+        """Push the current rate fraction to both buckets (lock must be held)"""
+        self._request_bucket.set_rate(self.requests_per_minute / 60.0 * self._rate_fraction)
+        self._token_bucket.set_rate(self.tokens_per_minute / 60.0 * self._rate_fraction)
+
+    def acquire(self, estimated_tokens: int):
+        """Block until both the request and token budgets allow another call"""
+        self._request_bucket.acquire(1)
+        self._token_bucket.acquire(max(1, estimated_tokens))
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['estimated_tokens'] += estimated_tokens
+
+    def record_success(self):
+        """Gradually restore the send rate after successful calls"""
+        with self._lock:
+            self._consecutive_throttles = 0
+            if self._rate_fraction < 1.0:
+                self._rate_fraction = min(1.0, self._rate_fraction + 0.1)
+                self._apply_rate()
+
+    def record_throttle(self) -> float:
+        """
+        Halve the send rate after a throttling error
+
+        Returns:
+            Seconds to back off before retrying (exponential with jitter)
+        """
+        with self._lock:
+            self.stats['throttled'] += 1
+            self._consecutive_throttles += 1
+            self._rate_fraction = max(self.min_rate_fraction, self._rate_fraction / 2)
+            self._apply_rate()
+
+            backoff = min(self.max_backoff, 2 ** self._consecutive_throttles)
+
+        return backoff * (0.5 + random.random() / 2)
+
+    def invoke(self, call: Callable[[], Any], estimated_tokens: int, max_throttle_retries: int = 6) -> Any:
+        """
+        Run a Bedrock call under the rate limit, retrying on throttling
+
+        Args:
+            call: Zero-argument function performing the Bedrock request
+            estimated_tokens: Estimated input + output tokens for the request
+            max_throttle_retries: Throttling retries before the error is re-raised
+
+        Returns:
+            Whatever `call` returns
+
+        Raises:
+            The last throttling error once retries are exhausted, or any
+            non-throttling error immediately
+        """
+        for attempt in range(max_throttle_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                result = call()
+            except Exception as e:
+                if not is_throttling_error(e) or attempt == max_throttle_retries:
+                    raise
+                wait_time = self.record_throttle()
+                print(f"   ⏳ Throttled by Bedrock, backing off {wait_time:.1f}s "
+                      f"(rate now {self._rate_fraction * 100:.0f}% of quota)")
+                time.sleep(wait_time)
+                continue
+
+            self.record_success()
+            return result
+
+
+class TokenUsageTracker:
+    """
+    Thread-safe totals of the `usage` block Bedrock returns for Anthropic models
+
+    Cache reads are billed at a fraction of the normal input price, so the
+    cache hit share shows how much of the static preamble was served from
+    the prompt cache.
+    """
+
+    FIELDS = ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+
+    def __init__(self):
+        self.stats = {field: 0 for field in self.FIELDS}
+        self.stats['requests'] = 0
+        self._lock = threading.Lock()
+
+    def record(self, response_body: Dict[str, Any]):
+        """Add the usage of one parsed invoke_model response body"""
+        usage = response_body.get('usage') or {}
+        with self._lock:
+            self.stats['requests'] += 1
+            for field in self.FIELDS:
+                self.stats[field] += usage.get(field) or 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of all prompt tokens that were read from the prompt cache"""
+        prompt_tokens = (self.stats['input_tokens'] + self.stats['cache_read_input_tokens']
+                         + self.stats['cache_creation_input_tokens'])
+        if not prompt_tokens:
+            return 0.0
+        return self.stats['cache_read_input_tokens'] / prompt_tokens
+
+    def summary(self) -> str:
+        """One-line usage summary for pipeline reports"""
+        return (f"Tokens: {self.stats['input_tokens']:,} input, "
+                f"{self.stats['cache_read_input_tokens']:,} cache hits, "
+                f"{self.stats['cache_creation_input_tokens']:,} cache writes, "
+                f"{self.stats['output_tokens']:,} output "
+                f"({self.cache_hit_rate * 100:.1f}% of prompt tokens from cache)")
@@ -8,55 +8,24 @@ Based on actual web scraper data structure from encephalitis_content_database_WI
 import json
 from typing import Dict, List, Any, Optional
 
-class BedrockTagRefinementPrompt:
-    """
-    Generates prompts for AWS Bedrock to refine classification tags
-    from web-scraped content and staff spreadsheet data
-    """
-    
-    @staticmethod
-    def build_tag_refinement_prompt(
-        url: str,
-        title: str,
-        summary: str,
-        existing_tags: Dict[str, List[str]],
-        content_source: str = "website",
-        full_content: Optional[str] = None
-    ) -> str:
-        """
-        Build a prompt for Bedrock to refine classification tags based on actual data structure
-        
-        Args:
-            url: The URL of the content
-            title: Title of the content
-            summary: Summary/description of the content
-            existing_tags: Current tags dict with personas, types, stages, topics
-            content_source: Source type (e.g., 'website', 'staff_spreadsheet', 'email_template')
-            full_content: Optional full text content for deeper analysis
-        """
-        
-        existing_personas = existing_tags.get('personas', [])
-        existing_types = existing_tags.get('types', [])
-        existing_stages = existing_tags.get('stages', [])
-        existing_topics = existing_tags.get('topics', [])
-        
-        prompt = f"""You are an expert content classifier for Encephalitis International, a charity supporting people affected by encephalitis, their caregivers, and healthcare professionals.
+from scripts.content_chunker import select_content
 
-Your task is to refine and enhance classification tags for support resources to ensure accurate content recommendations to users and staff.
 
-## CONTENT TO ANALYZE:
+# Bump whenever the wording of any prompt below changes - stored
+# classifications made with an older version are then redone
+PROMPT_VERSION = "2026.10-1"
 
-**URL:** {url}
-**Title:** {title}
-**Summary:** {summary}
-**Source Type:** {content_source}
+# Token budget for page text in a single-item prompt (~30,000 characters, the
+# previous character cut); longer pages send their most informative sections
+# (see scripts/content_chunker.py)
+FULL_CONTENT_TOKENS = 7500
 
-## EXISTING TAGS:
 
-**Personas:** {', '.join(existing_personas) if existing_personas else 'None'}
-**Types:** {', '.join(existing_types) if existing_types else 'None'}
-**Stages:** {', '.join(existing_stages) if existing_stages else 'None'}
-**Topics:** {', '.join(existing_topics) if existing_topics else 'None'}
+# Static instructions and taxonomy, sent as a cacheable system block.
+# These strings must stay byte-identical between requests for prompt caching to hit.
+TAG_REFINEMENT_SYSTEM_PROMPT = """You are an expert content classifier for Encephalitis International, a charity supporting people affected by encephalitis, their caregivers, and healthcare professionals.
+
+Your task is to refine and enhance classification tags for support resources to ensure accurate content recommendations to users and staff.
 
 ## CLASSIFICATION FRAMEWORK:
 
@@ -175,8 +144,8 @@ Analyze the content and provide refined tags that will help:
 
 Provide your response as a JSON object:
 
-{{
-  "refined_tags": {{
+{
+  "refined_tags": {
     "personas": ["persona:patient", "persona:caregiver"],
     "types": ["type:autoimmune", "type:infectious"],
     "stages": ["stage:pre_diagnosis", "stage:acute_hospital"],
@@ -188,39 +157,39 @@ Provide your response as a JSON object:
     "content_length": "length:medium",
     "content_format": "format:text",
     "playlists": ["playlist:newly_diagnosed_pack"]
-  }},
-  "changes": {{
-    "added_tags": {{
+  },
+  "changes": {
+    "added_tags": {
       "personas": ["persona:parent"],
       "symptoms": ["symptom:memory"],
       "resource_type": ["resource:factsheet"]
-    }},
-    "removed_tags": {{
+    },
+    "removed_tags": {
       "topics": ["topic:school"]
-    }},
+    },
     "reasoning": "Brief explanation of major changes"
-  }},
-  "recommendations": {{
+  },
+  "recommendations": {
     "primary_audience": "Detailed description of who would benefit most",
     "best_used_when": "Specific scenarios when staff should recommend this",
     "user_journey_fit": "Where this fits in the user's journey",
     "staff_notes": "Practical tips for staff using this resource"
-  }},
-  "metadata": {{
+  },
+  "metadata": {
     "estimated_reading_time": "5 minutes",
     "complexity_level": "beginner|intermediate|advanced",
     "emotional_tone": "supportive|clinical|informative|urgent|inspirational",
     "actionable_content": true,
     "requires_follow_up": false,
     "priority_level": "high|normal|low"
-  }},
-  "confidence_scores": {{
+  },
+  "confidence_scores": {
     "overall_classification": 85,
     "persona_match": 90,
     "stage_match": 80,
     "topic_relevance": 85
-  }}
-}}
+  }
+}
 
 ## IMPORTANT GUIDELINES:
 
@@ -239,134 +208,10 @@ Provide your response as a JSON object:
 - **Personal stories**: Powerful for newly diagnosed and those in recovery
 - **Clinical guidelines**: Primarily for professionals but may interest informed patients
 - **Fundraising**: Often relevant to bereaved families and long-term supporters
-- **International content**: Tag location appropriately for travel, regional studies, etc.
-
-Now analyze the content and provide your refined classification."""
-
-        if full_content:
-            prompt += f"\n\n## FULL CONTENT (for deeper analysis):\n{full_content[:30000]}..."
-        
-        return prompt
-    
-    @staticmethod
-    def build_batch_refinement_prompt(
-        content_items: List[Dict[str, Any]],
-        max_items: int = 10
-    ) -> str:
-        """
-        Build a prompt for batch processing multiple content items from web scraper
-        
-        Args:
-            content_items: List of dicts with 'url', 'title', 'summary', 'tags'
-            max_items: Maximum number of items to process in one batch
-        """
-        
-        items_text = ""
-        for idx, item in enumerate(content_items[:max_items], 1):
-            existing_tags = item.get('tags', {})
-            items_text += f"""
-### ITEM {idx}:
-**URL:** {item.get('url', 'N/A')}
-**Title:** {item.get('title', 'Untitled')}
-**Summary:** {item.get('summary', 'No summary')}
-**Existing Personas:** {', '.join(existing_tags.get('personas', []))}
-**Existing Types:** {', '.join(existing_tags.get('types', []))}
-**Existing Stages:** {', '.join(existing_tags.get('stages', []))}
-**Existing Topics:** {', '.join(existing_tags.get('topics', []))}
+- **International content**: Tag location appropriately for travel, regional studies, etc."""
 
----
-"""
-        
-        prompt = f"""You are an expert content classifier for Encephalitis International charity.
-
-Your task is to refine classification tags for multiple support resources in batch, ensuring consistency while respecting each item's unique characteristics.
-
-## CONTENT ITEMS TO ANALYZE:
-{items_text}
 
-## CLASSIFICATION FRAMEWORK:
-
-Use the same comprehensive tag taxonomy:
-- **Personas**: persona:patient, persona:caregiver, persona:parent, persona:professional, persona:bereaved
-- **Types**: type:autoimmune, type:infectious, type:post_infectious, type:NMDA, type:MOG, type:TBE, type:HSV
-- **Stages**: stage:pre_diagnosis, stage:acute_hospital, stage:early_recovery, stage:long_term_management
-- **Topics**: topic:research, topic:treatment, topic:diagnosis, topic:memory, topic:behaviour, topic:school, topic:work, topic:legal, topic:travel, etc.
-- **Symptoms**: symptom:memory, symptom:behaviour, symptom:seizures, symptom:fatigue, symptom:mobility, symptom:speech, symptom:emotional
-- **Locations**: location:uk, location:worldwide, location:europe, location:[country]
-- **Resource Types**: resource:factsheet, resource:research, resource:event, resource:news, resource:video, resource:personal_story, resource:professional_contact, resource:fundraising
-- **Content Length**: length:quick, length:short, length:medium, length:long
-- **Playlists**: playlist:newly_diagnosed_pack, playlist:caregiver_support, playlist:professional_education, playlist:research_updates, playlist:recovery_toolkit
-
-## YOUR TASK:
-
-For each content item, provide refined tags following the comprehensive classification approach.
-
-## OUTPUT FORMAT:
-
-Provide a JSON array with one object per content item:
-
-[
-  {{
-    "item_id": 1,
-    "url": "...",
-    "title": "...",
-    "refined_tags": {{
-      "personas": [...],
-      "types": [...],
-      "stages": [...],
-      "topics": [...],
-      "symptoms": [...],
-      "locations": [...],
-      "conditions": [...],
-      "resource_type": [...],
-      "content_length": "length:medium",
-      "playlists": [...]
-    }},
-    "changes_summary": "Brief description of key changes made",
-    "confidence_score": 85
-  }},
-  ...
-]
-
-Focus on:
-1. **Consistency**: Similar content should have similar tags
-2. **Completeness**: Don't miss important tags
-3. **Accuracy**: Only add tags supported by the content
-4. **Practicality**: Think about how staff will use these tags"""
-        
-        return prompt
-    
-    @staticmethod
-    def build_spreadsheet_content_prompt(
-        spreadsheet_row: Dict[str, Any],
-        column_mapping: Dict[str, str]
-    ) -> str:
-        """
-        Build a prompt specifically for staff spreadsheet content
-        
-        Args:
-            spreadsheet_row: Dict representing a row from staff spreadsheet
-            column_mapping: Maps spreadsheet columns to standard fields
-        """
-        
-        # Extract relevant fields based on mapping
-        title = spreadsheet_row.get(column_mapping.get('title', 'title'), 'Untitled')
-        description = spreadsheet_row.get(column_mapping.get('description', 'description'), '')
-        category = spreadsheet_row.get(column_mapping.get('category', 'category'), '')
-        target_audience = spreadsheet_row.get(column_mapping.get('audience', 'audience'), '')
-        notes = spreadsheet_row.get(column_mapping.get('notes', 'notes'), '')
-        resource_url = spreadsheet_row.get(column_mapping.get('url', 'url'), '')
-        
-        prompt = f"""You are analyzing content from Encephalitis International staff spreadsheet used to create support resources, emails, and chat responses.
-
-## SPREADSHEET ENTRY:
-
-**Title:** {title}
-**Description:** {description}
-**Staff Category:** {category}
-**Target Audience:** {target_audience}
-**Resource URL:** {resource_url}
-**Staff Notes:** {notes}
+SPREADSHEET_SYSTEM_PROMPT = """You are analyzing content from Encephalitis International staff spreadsheet used to create support resources, emails, and chat responses.
 
 ## CONTEXT:
 
@@ -413,8 +258,8 @@ Apply the comprehensive tag taxonomy:
 
 ## OUTPUT FORMAT:
 
-{{
-  "refined_tags": {{
+{
+  "refined_tags": {
     "personas": [...],
     "types": [...],
     "stages": [...],
@@ -426,9 +271,9 @@ Apply the comprehensive tag taxonomy:
     "content_length": "length:short",
     "content_format": "format:text",
     "playlists": [...]
-  }},
-  "staff_context": {{
-    "original_category": "{category}",
+  },
+  "staff_context": {
+    "original_category": "The staff category from the entry",
     "interpreted_use_cases": [
       "When newly diagnosed patient calls helpline",
       "When caregiver asks about memory problems",
@@ -439,26 +284,346 @@ Apply the comprehensive tag taxonomy:
     ],
     "communication_channel": "email|chat|phone|resource_pack|helpline",
     "staff_guidance": "Practical tips for staff on when and how to use this resource"
-  }},
-  "recommendations": {{
+  },
+  "recommendations": {
     "best_used_when": "Specific scenarios when staff should recommend this",
     "user_journey_fit": "Where this fits in the user's journey",
     "follow_up_resources": ["What resources to recommend next"],
     "sensitivity_notes": "Any sensitive topics or emotional considerations"
-  }},
-  "metadata": {{
+  },
+  "metadata": {
     "estimated_time": "How long to read/watch/complete",
     "complexity_level": "beginner|intermediate|advanced",
     "emotional_tone": "supportive|clinical|informative|urgent|inspirational|empathetic",
     "requires_follow_up": true,
     "priority_level": "high|normal|low"
-  }},
+  },
   "confidence_score": 85
-}}
+}"""
 
-Analyze this staff content and provide refined classification with practical guidance for staff use."""
+
+BATCH_REFINEMENT_SYSTEM_PROMPT = """You are an expert content classifier for Encephalitis International charity.
+
+Your task is to refine classification tags for multiple support resources in batch, ensuring consistency while respecting each item's unique characteristics.
+
+## CLASSIFICATION FRAMEWORK:
+
+Use the same comprehensive tag taxonomy:
+- **Personas**: persona:patient, persona:caregiver, persona:parent, persona:professional, persona:bereaved
+- **Types**: type:autoimmune, type:infectious, type:post_infectious, type:NMDA, type:MOG, type:TBE, type:HSV
+- **Stages**: stage:pre_diagnosis, stage:acute_hospital, stage:early_recovery, stage:long_term_management
+- **Topics**: topic:research, topic:treatment, topic:diagnosis, topic:memory, topic:behaviour, topic:school, topic:work, topic:legal, topic:travel, etc.
+- **Symptoms**: symptom:memory, symptom:behaviour, symptom:seizures, symptom:fatigue, symptom:mobility, symptom:speech, symptom:emotional
+- **Locations**: location:uk, location:worldwide, location:europe, location:[country]
+- **Resource Types**: resource:factsheet, resource:research, resource:event, resource:news, resource:video, resource:personal_story, resource:professional_contact, resource:fundraising
+- **Content Length**: length:quick, length:short, length:medium, length:long
+- **Playlists**: playlist:newly_diagnosed_pack, playlist:caregiver_support, playlist:professional_education, playlist:research_updates, playlist:recovery_toolkit
+
+## YOUR TASK:
+
+For each content item, provide refined tags following the comprehensive classification approach.
+
+## OUTPUT FORMAT:
+
+Provide a JSON array with one object per content item. Every item MUST be present and MUST echo its item_id:
+
+[
+  {
+    "item_id": 1,
+    "url": "...",
+    "title": "...",
+    "refined_tags": {
+      "personas": [...],
+      "types": [...],
+      "stages": [...],
+      "topics": [...],
+      "symptoms": [...],
+      "locations": [...],
+      "conditions": [...],
+      "resource_type": [...],
+      "content_length": "length:medium",
+      "content_format": "format:text",
+      "playlists": [...]
+    },
+    "recommendations": {
+      "primary_audience": "Who would benefit most",
+      "best_used_when": "When staff should recommend this",
+      "staff_notes": "Practical tips for staff"
+    },
+    "metadata": {
+      "estimated_time": "5 minutes",
+      "complexity_level": "beginner|intermediate|advanced",
+      "emotional_tone": "supportive|clinical|informative|urgent|inspirational",
+      "priority_level": "high|normal|low"
+    },
+    "changes_summary": "Brief description of key changes made",
+    "confidence_score": 85
+  },
+  ...
+]
+
+Focus on:
+1. **Consistency**: Similar content should have similar tags
+2. **Completeness**: Don't miss important tags
+3. **Accuracy**: Only add tags supported by the content
+4. **Practicality**: Think about how staff will use these tags"""
+
+
+class BedrockTagRefinementPrompt:
+    """
+    Generates prompts for AWS Bedrock to refine classification tags
+    from web-scraped content and staff spreadsheet data
+    
+    Each prompt is split into a static system block (instructions and
+    taxonomy, identical for every item, so Bedrock can cache it) and a small
+    per-item user block. The build_*_prompt methods still return the
+    combined single-string prompt for callers that do not use caching.
+    """
+    
+    @staticmethod
+    def build_tag_refinement_system_prompt() -> str:
+        """Static, cacheable instructions for web content tag refinement"""
+        return TAG_REFINEMENT_SYSTEM_PROMPT
+    
+    @staticmethod
+    def build_tag_refinement_item_prompt(
+        url: str,
+        title: str,
+        summary: str,
+        existing_tags: Dict[str, List[str]],
+        content_source: str = "website",
+        full_content: Optional[str] = None
+    ) -> str:
+        """
+        Build the per-item part of the tag refinement prompt
+        
+        Args:
+            url: The URL of the content
+            title: Title of the content
+            summary: Summary/description of the content
+            existing_tags: Current tags dict with personas, types, stages, topics
+            content_source: Source type (e.g., 'website', 'staff_spreadsheet', 'email_template')
+            full_content: Optional full text content for deeper analysis
+        """
+        
+        existing_personas = existing_tags.get('personas', [])
+        existing_types = existing_tags.get('types', [])
+        existing_stages = existing_tags.get('stages', [])
+        existing_topics = existing_tags.get('topics', [])
+        
+        prompt = f"""## CONTENT TO ANALYZE:
+
+**URL:** {url}
+**Title:** {title}
+**Summary:** {summary}
+**Source Type:** {content_source}
+
+## EXISTING TAGS:
+
+**Personas:** {', '.join(existing_personas) if existing_personas else 'None'}
+**Types:** {', '.join(existing_types) if existing_types else 'None'}
+**Stages:** {', '.join(existing_stages) if existing_stages else 'None'}
+**Topics:** {', '.join(existing_topics) if existing_topics else 'None'}
+
+Now analyze the content and provide your refined classification."""
+
+        if full_content:
+            prompt += f"\n\n## FULL CONTENT (for deeper analysis):\n{select_content(full_content, FULL_CONTENT_TOKENS, title=title)}..."
         
         return prompt
+    
+    @staticmethod
+    def build_tag_refinement_prompt(
+        url: str,
+        title: str,
+        summary: str,
+        existing_tags: Dict[str, List[str]],
+        content_source: str = "website",
+        full_content: Optional[str] = None
+    ) -> str:
+        """
+        Build a prompt for Bedrock to refine classification tags based on actual data structure
+        
+        Args:
+            url: The URL of the content
+            title: Title of the content
+            summary: Summary/description of the content
+            existing_tags: Current tags dict with personas, types, stages, topics
+            content_source: Source type (e.g., 'website', 'staff_spreadsheet', 'email_template')
+            full_content: Optional full text content for deeper analysis
+        """
+        item_prompt = BedrockTagRefinementPrompt.build_tag_refinement_item_prompt(
+            url, title, summary, existing_tags, content_source, full_content
+        )
+        return f"{TAG_REFINEMENT_SYSTEM_PROMPT}\n\n{item_prompt}"
+    
+    @staticmethod
+    def format_batch_item(item_id: int, item: Dict[str, Any], max_content_tokens: int = 500) -> str:
+        """
+        Render one content item for the batch refinement prompt
+        
+        Args:
+            item_id: 1-based position of the item within the batch (echoed back as item_id)
+            item: Dict with 'url', 'title', 'summary', 'tags' and optional
+                  'source_type', 'category', 'notes', 'content'
+            max_content_tokens: Token budget for 'content' (most informative sections kept)
+        """
+        existing_tags = item.get('tags', {}) or {}
+        
+        item_text = f"""
+### ITEM {item_id}:
+**URL:** {item.get('url', 'N/A')}
+**Title:** {item.get('title', 'Untitled')}
+**Summary:** {item.get('summary', 'No summary')}
+**Existing Personas:** {', '.join(existing_tags.get('personas', []))}
+**Existing Types:** {', '.join(existing_tags.get('types', []))}
+**Existing Stages:** {', '.join(existing_tags.get('stages', []))}
+**Existing Topics:** {', '.join(existing_tags.get('topics', []))}
+"""
+        if item.get('source_type'):
+            item_text += f"**Source Type:** {item['source_type']}\n"
+        if item.get('category'):
+            item_text += f"**Staff Category:** {item['category']}\n"
+        if item.get('notes'):
+            item_text += f"**Staff Notes:** {item['notes']}\n"
+        if item.get('content'):
+            item_text += f"**Content Excerpt:** {select_content(item['content'], max_content_tokens, title=item.get('title', ''))}\n"
+        
+        return item_text + "\n---\n"
+    
+    @staticmethod
+    def build_batch_refinement_system_prompt() -> str:
+        """Static, cacheable instructions for batch tag refinement"""
+        return BATCH_REFINEMENT_SYSTEM_PROMPT
+    
+    @staticmethod
+    def build_batch_refinement_item_prompt(
+        content_items: List[Dict[str, Any]],
+        max_items: int = 10
+    ) -> str:
+        """
+        Build the per-batch part of the batch refinement prompt
+        
+        Args:
+            content_items: List of dicts with 'url', 'title', 'summary', 'tags'
+                           (see format_batch_item for optional fields)
+            max_items: Maximum number of items to process in one batch
+        """
+        items_text = "".join(
+            BedrockTagRefinementPrompt.format_batch_item(idx, item)
+            for idx, item in enumerate(content_items[:max_items], 1)
+        )
+        
+        return f"""## CONTENT ITEMS TO ANALYZE:
+{items_text}
+Classify every item above and return the JSON array."""
+    
+    @staticmethod
+    def build_batch_refinement_prompt(
+        content_items: List[Dict[str, Any]],
+        max_items: int = 10
+    ) -> str:
+        """
+        Build a prompt for batch processing multiple content items from web scraper
+        
+        Args:
+            content_items: List of dicts with 'url', 'title', 'summary', 'tags'
+                           (see format_batch_item for optional fields)
+            max_items: Maximum number of items to process in one batch
+        """
+        item_prompt = BedrockTagRefinementPrompt.build_batch_refinement_item_prompt(content_items, max_items)
+        return f"{BATCH_REFINEMENT_SYSTEM_PROMPT}\n\n{item_prompt}"
+    
+    @staticmethod
+    def build_spreadsheet_system_prompt() -> str:
+        """Static, cacheable instructions for staff spreadsheet content"""
+        return SPREADSHEET_SYSTEM_PROMPT
+    
+    @staticmethod
+    def build_spreadsheet_item_prompt(
+        spreadsheet_row: Dict[str, Any],
+        column_mapping: Dict[str, str]
+    ) -> str:
+        """
+        Build the per-row part of the spreadsheet content prompt
+        
+        Args:
+            spreadsheet_row: Dict representing a row from staff spreadsheet
+            column_mapping: Maps spreadsheet columns to standard fields
+        """
+        
+        # Extract relevant fields based on mapping
+        title = spreadsheet_row.get(column_mapping.get('title', 'title'), 'Untitled')
+        description = spreadsheet_row.get(column_mapping.get('description', 'description'), '')
+        category = spreadsheet_row.get(column_mapping.get('category', 'category'), '')
+        target_audience = spreadsheet_row.get(column_mapping.get('audience', 'audience'), '')
+        notes = spreadsheet_row.get(column_mapping.get('notes', 'notes'), '')
+        resource_url = spreadsheet_row.get(column_mapping.get('url', 'url'), '')
+        
+        return f"""## SPREADSHEET ENTRY:
+
+**Title:** {title}
+**Description:** {description}
+**Staff Category:** {category}
+**Target Audience:** {target_audience}
+**Resource URL:** {resource_url}
+**Staff Notes:** {notes}
+
+Analyze this staff content and provide refined classification with practical guidance for staff use."""
+    
+    @staticmethod
+    def build_spreadsheet_content_prompt(
+        spreadsheet_row: Dict[str, Any],
+        column_mapping: Dict[str, str]
+    ) -> str:
+        """
+        Build a prompt specifically for staff spreadsheet content
+        
+        Args:
+            spreadsheet_row: Dict representing a row from staff spreadsheet
+            column_mapping: Maps spreadsheet columns to standard fields
+        """
+        item_prompt = BedrockTagRefinementPrompt.build_spreadsheet_item_prompt(spreadsheet_row, column_mapping)
+        return f"{SPREADSHEET_SYSTEM_PROMPT}\n\n{item_prompt}"
+    
+    @staticmethod
+    def build_cached_request_body(
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 4096,
+        temperature: float = 0.3,
+        cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Build an Anthropic Messages request body with a prompt-caching checkpoint
+        
+        The system block is marked with cache_control so Bedrock caches the
+        static preamble; only the small user block is new on each request.
+        Bedrock only caches prompts above the model's minimum cacheable length.
+        
+        Args:
+            system_prompt: Static instructions (one of the *_system_prompt builders)
+            user_prompt: Per-item prompt
+            max_tokens: Maximum output tokens
+            temperature: Sampling temperature
+            cache: Add the cache checkpoint (off for batch inference jobs)
+        """
+        system_block = {"type": "text", "text": system_prompt}
+        if cache:
+            system_block["cache_control"] = {"type": "ephemeral"}
+        
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": [system_block],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": user_prompt
+                }
+            ]
+        }
 
 
 # Example usage functions
@@ -0,0 +1,223 @@
+"""
+Excel Extraction Benchmark
+Compares the column-wise extraction in excel_processor with the per-cell
+iterrows() loop on a synthetic staff workbook
+
+FEATURES:
+- Generates a synthetic workbook (crib sheet sheets + Country Contacts) with
+  blank, whitespace-only, numeric and URL cells (100,000 rows by default,
+  reused on later runs)
+- Times loading every sheet up front (pd.read_excel(sheet_name=None)) against
+  lazily parsing just the sheet that is needed
+- Times row extraction (iterrows() vs vectorised) and checks both give the
+  same output
+
+USAGE:
+    python3 scripts/benchmark_excel_extraction.py                   # 100k rows
+    python3 scripts/benchmark_excel_extraction.py --rows 20000 --repeat 5
+    python3 scripts/benchmark_excel_extraction.py --workbook temp/excel_fixtures/custom.xlsx
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.excel_processor import ContactsProcessor, LazyWorkbook, LiveChatCribSheetProcessor
+
+
+CRIB_SHEETS = ('Overview', 'Services', 'Diagnosis', 'Treatments')
+CONTACTS_SHEET = 'Country Contacts'
+
+WORDS = ('encephalitis', 'recovery', 'memory', 'fatigue', 'support', 'seizures', 'family', 'school',
+         'rehabilitation', 'diagnosis', 'treatment', 'helpline', 'benefits', 'caregiver', 'brain')
+
+
+def build_synthetic_workbook(path: Path, rows: int = 100_000, seed: int = 42):
+    """
+    Write a workbook shaped like the staff spreadsheets
+
+    Args:
+        path: Output .xlsx file
+        rows: Total data rows (three quarters crib sheet, one quarter contacts)
+        seed: Random seed, so every run writes the same workbook
+    """
+    rng = random.Random(seed)
+
+    def sentence(low: int = 4, high: int = 20) -> str:
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + '.'
+
+    def maybe(value: Any, blank: float = 0.2) -> Any:
+        return None if rng.random() < blank else value
+
+    crib_rows = rows * 3 // 4
+    per_sheet = crib_rows // len(CRIB_SHEETS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet in CRIB_SHEETS:
+            pd.DataFrame({
+                'Topic': [maybe(sentence(1, 4), 0.1) for _ in range(per_sheet)],
+                'Information': [maybe(sentence()) for _ in range(per_sheet)],
+                'Link': [maybe(f"https://www.encephalitis.info/page-{rng.randint(1, 5000)}", 0.6)
+                         for _ in range(per_sheet)],
+                'Notes': [maybe(rng.choice(['  ', sentence(2, 6), '']), 0.5) for _ in range(per_sheet)],
+                'Priority': [maybe(rng.randint(1, 5), 0.3) for _ in range(per_sheet)]
+            }).to_excel(writer, sheet_name=sheet, index=False)
+
+        contact_rows = rows - per_sheet * len(CRIB_SHEETS)
+        pd.DataFrame({
+            'Name': [maybe(f"Contact {i}", 0.1) for i in range(contact_rows)],
+            'Country': [maybe(rng.choice(['UK', 'India', 'United States', 'Brazil']), 0.05) for _ in range(contact_rows)],
+            'Position': [maybe(rng.choice(['Neurologist', 'Consultant', 'Nurse'])) for _ in range(contact_rows)],
+            'Adult or paediatric': [maybe(rng.choice(['Adult', 'Paediatric'])) for _ in range(contact_rows)],
+            'Institution': [maybe(f"Hospital {rng.randint(1, 300)}") for _ in range(contact_rows)],
+            'Email': [maybe(f"contact{i}@example.org", 0.5) for i in range(contact_rows)],
+            'Notes': [maybe(sentence(2, 8), 0.7) for _ in range(contact_rows)]
+        }).to_excel(writer, sheet_name=CONTACTS_SHEET, index=False)
+
+
+def iterrows_sheet_content(df: pd.DataFrame, sheet_name: str) -> List[Dict[str, Any]]:
+    """Reference: the per-cell iterrows() extraction the crib sheet processor used to run"""
+    content_items = []
+    for idx, row in df.iterrows():
+        row_text = []
+        urls = []
+        for col in df.columns:
+            value = row[col]
+            if pd.notna(value):
+                value_str = str(value).strip()
+                if value_str:
+                    if value_str.startswith('http'):
+                        urls.append(value_str)
+                    else:
+                        row_text.append(value_str)
+        if row_text:
+            content_items.append({
+                'sheet': sheet_name,
+                'row_index': idx,
+                'content': ' '.join(row_text),
+                'urls': urls,
+                'source': 'live_chat_crib_sheet'
+            })
+    return content_items
+
+
+def iterrows_country_contacts(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Reference: the iterrows() loop the contacts processor used to run"""
+    def optional(row, column: str) -> str:
+        return str(row.get(column, '')) if pd.notna(row.get(column)) else ''
+
+    contacts = []
+    for idx, row in df.iterrows():
+        if pd.notna(row.get('Name')):
+            contacts.append({
+                'name': str(row.get('Name', '')),
+                'country': str(row.get('Country', '')),
+                'position': optional(row, 'Position'),
+                'specialty': optional(row, 'Adult or paediatric'),
+                'institution': optional(row, 'Institution'),
+                'email': optional(row, 'Email'),
+                'notes': optional(row, 'Notes'),
+                'source': 'country_contacts'
+            })
+    return contacts
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """Best wall time over the repeats, and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark(workbook: Path, repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    Time loading and extraction both ways
+
+    Returns:
+        Per step: baseline seconds, new seconds and whether the outputs match
+    """
+    results = {}
+
+    # Loading: every sheet up front vs only the sheet that is used
+    eager_seconds, sheets = best_time(lambda: pd.read_excel(workbook, sheet_name=None), 1)
+    lazy_seconds, _ = best_time(lambda: LazyWorkbook(str(workbook))[CONTACTS_SHEET], 1)
+    results['load one sheet'] = {'baseline': eager_seconds, 'new': lazy_seconds, 'match': None}
+
+    crib = LiveChatCribSheetProcessor.__new__(LiveChatCribSheetProcessor)
+    crib.sheets = {name: sheets[name] for name in CRIB_SHEETS}
+    crib.streaming = False
+    contacts = ContactsProcessor.__new__(ContactsProcessor)
+    contacts.sheets = {CONTACTS_SHEET: sheets[CONTACTS_SHEET]}
+    contacts.streaming = False
+
+    baseline_seconds, expected = best_time(
+        lambda: {name: iterrows_sheet_content(sheets[name], name) for name in CRIB_SHEETS}, repeat)
+    new_seconds, actual = best_time(
+        lambda: {name: crib.extract_sheet_content(name) for name in CRIB_SHEETS}, repeat)
+    results['crib sheet rows'] = {'baseline': baseline_seconds, 'new': new_seconds, 'match': expected == actual}
+
+    baseline_seconds, expected = best_time(lambda: iterrows_country_contacts(sheets[CONTACTS_SHEET]), repeat)
+    new_seconds, actual = best_time(contacts.process_country_contacts, repeat)
+    results['country contacts'] = {'baseline': baseline_seconds, 'new': new_seconds, 'match': expected == actual}
+
+    return results
+
+
+def main():
+    rows = 100_000
+    if '--rows' in sys.argv:
+        try:
+            rows_idx = sys.argv.index('--rows')
+            if rows_idx + 1 < len(sys.argv):
+                rows = max(100, int(sys.argv[rows_idx + 1]))
+        except (ValueError, IndexError):
+            pass
+
+    repeat = 3
+    if '--repeat' in sys.argv:
+        try:
+            repeat_idx = sys.argv.index('--repeat')
+            if repeat_idx + 1 < len(sys.argv):
+                repeat = max(1, int(sys.argv[repeat_idx + 1]))
+        except (ValueError, IndexError):
+            pass
+
+    workbook = Path(f'temp/excel_fixtures/synthetic_{rows}.xlsx')
+    if '--workbook' in sys.argv:
+        workbook_idx = sys.argv.index('--workbook')
+        if workbook_idx + 1 < len(sys.argv):
+            workbook = Path(sys.argv[workbook_idx + 1])
+
+    if not workbook.exists():
+        print(f"📝 Writing synthetic workbook ({rows:,} rows) to {workbook}...")
+        start = time.time()
+        build_synthetic_workbook(workbook, rows)
+        print(f"   Done in {time.time() - start:.1f}s")
+
+    size_mb = workbook.stat().st_size / (1024 * 1024)
+    print(f"\n🔬 {workbook} ({size_mb:.1f} MB), extraction best of {repeat} runs\n")
+
+    print(f"{'Step':<18} {'baseline s':>12} {'new s':>10} {'speedup':>10}  same output")
+    print("-" * 66)
+    for step, timing in benchmark(workbook, repeat).items():
+        speedup = f"{timing['baseline'] / timing['new']:.1f}x" if timing['new'] else '-'
+        match = '-' if timing['match'] is None else ('yes' if timing['match'] else 'NO')
+        print(f"{step:<18} {timing['baseline']:>12.3f} {timing['new']:>10.3f} {speedup:>10}  {match}")
+
+    print("\nBaselines: pd.read_excel(sheet_name=None) for loading, iterrows() for extraction")
+
+
+if __name__ == "__main__":
+    main()
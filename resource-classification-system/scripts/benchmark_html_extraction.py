@@ -0,0 +1,183 @@
+"""
+HTML Extraction Benchmark
+Compares the installed HTML extraction engines on saved pages
+
+FEATURES:
+- Saves live pages from the sitemap as fixtures (--fetch N), so runs are
+  repeatable and offline
+- Times every installed engine over all fixtures (ms/page, pages/s, speedup
+  over BeautifulSoup)
+- Checks each engine's title/description/content against BeautifulSoup
+
+USAGE:
+    python3 scripts/benchmark_html_extraction.py --fetch 50     # save 50 pages, then benchmark
+    python3 scripts/benchmark_html_extraction.py                # benchmark saved fixtures
+    python3 scripts/benchmark_html_extraction.py --repeat 5 --fixtures temp/html_fixtures
+"""
+
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.html_extraction import EXTRACTORS, available_engines
+
+
+FIELDS = ('title', 'description', 'content')
+
+
+def fetch_fixtures(fixtures_dir: Path, count: int, sitemap_url: str = 'https://www.encephalitis.info/sitemap.xml'):
+    """
+    Save the first pages of the sitemap as HTML fixtures
+
+    Args:
+        fixtures_dir: Directory for <hash>.html files and index.json (file -> URL)
+        count: Number of pages to save
+        sitemap_url: Sitemap to take pages from
+    """
+    import requests
+    from scripts.polite_crawler import PoliteCrawler
+    from scripts.sitemap_engine import SitemapEngine
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; EncephalitisResourceClassifier/1.0)'})
+    crawler = PoliteCrawler(session)
+
+    entries = SitemapEngine(crawler).fetch_entries(sitemap_url)[:count]
+    print(f"📡 Saving {len(entries)} pages to {fixtures_dir}")
+
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    index_file = fixtures_dir / 'index.json'
+    index = json.loads(index_file.read_text()) if index_file.exists() else {}
+
+    def fetch(url: str):
+        try:
+            return crawler.fetch(url).content
+        except Exception as e:
+            print(f"   ⚠️  {url}: {e}")
+            return None
+
+    for url, content, _ in crawler.map_ordered(fetch, [entry.url for entry in entries]):
+        if content is None:
+            continue
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + '.html'
+        (fixtures_dir / name).write_bytes(content)
+        index[name] = url
+
+    index_file.write_text(json.dumps(index, indent=2))
+    print(f"✅ {len(index)} fixtures saved")
+
+
+def load_fixtures(fixtures_dir: Path) -> List[Tuple[str, bytes]]:
+    """(url, html) for every saved fixture"""
+    index_file = fixtures_dir / 'index.json'
+    index = json.loads(index_file.read_text()) if index_file.exists() else {}
+
+    fixtures = []
+    for path in sorted(fixtures_dir.glob('*.html')):
+        fixtures.append((index.get(path.name, path.stem), path.read_bytes()))
+    return fixtures
+
+
+def benchmark(fixtures: List[Tuple[str, bytes]], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Time every installed engine
+
+    Returns:
+        Per engine: best total seconds over the repeats, ms/page and pages/s
+    """
+    timings = {}
+    for engine in available_engines():
+        extract = EXTRACTORS[engine]
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for url, html in fixtures:
+                extract(html, url)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        timings[engine] = {
+            'seconds': best,
+            'ms_per_page': best * 1000 / len(fixtures),
+            'pages_per_second': len(fixtures) / best if best else 0.0
+        }
+    return timings
+
+
+def compare_outputs(fixtures: List[Tuple[str, bytes]]) -> Dict[str, Dict[str, int]]:
+    """
+    Count, per engine and field, the fixtures whose output matches BeautifulSoup
+    """
+    reference = [EXTRACTORS['bs4'](html, url) for url, html in fixtures]
+
+    agreement = {}
+    for engine in available_engines():
+        matches = {field: 0 for field in FIELDS}
+        for (url, html), expected in zip(fixtures, reference):
+            fields = EXTRACTORS[engine](html, url)
+            for field in FIELDS:
+                if fields[field] == expected[field]:
+                    matches[field] += 1
+        agreement[engine] = matches
+    return agreement
+
+
+def main():
+    fixtures_dir = Path('temp/html_fixtures')
+    if '--fixtures' in sys.argv:
+        fixtures_idx = sys.argv.index('--fixtures')
+        if fixtures_idx + 1 < len(sys.argv):
+            fixtures_dir = Path(sys.argv[fixtures_idx + 1])
+
+    repeat = 3
+    if '--repeat' in sys.argv:
+        try:
+            repeat_idx = sys.argv.index('--repeat')
+            if repeat_idx + 1 < len(sys.argv):
+                repeat = max(1, int(sys.argv[repeat_idx + 1]))
+        except (ValueError, IndexError):
+            pass
+
+    if '--fetch' in sys.argv:
+        try:
+            fetch_idx = sys.argv.index('--fetch')
+            count = int(sys.argv[fetch_idx + 1]) if fetch_idx + 1 < len(sys.argv) else 50
+        except ValueError:
+            count = 50
+        fetch_fixtures(fixtures_dir, count)
+
+    fixtures = load_fixtures(fixtures_dir)
+    if not fixtures:
+        print(f"❌ No fixtures in {fixtures_dir} (use --fetch N to save some)")
+        sys.exit(1)
+
+    engines = available_engines()
+    total_kb = sum(len(html) for _, html in fixtures) / 1024
+    print(f"\n🔬 {len(fixtures)} pages ({total_kb:.0f} KB), best of {repeat} runs")
+    print(f"   Engines: {', '.join(engines)}\n")
+
+    timings = benchmark(fixtures, repeat)
+    baseline = timings.get('bs4')
+
+    print(f"{'Engine':<12} {'ms/page':>10} {'pages/s':>10} {'speedup':>10}")
+    print("-" * 45)
+    for engine, timing in timings.items():
+        speedup = f"{baseline['seconds'] / timing['seconds']:.1f}x" if baseline and timing['seconds'] else '-'
+        print(f"{engine:<12} {timing['ms_per_page']:>10.2f} {timing['pages_per_second']:>10.1f} {speedup:>10}")
+
+    if baseline:
+        print(f"\n📋 Output matching BeautifulSoup (of {len(fixtures)} pages)")
+        for engine, matches in compare_outputs(fixtures).items():
+            summary = ', '.join(f"{field} {matches[field]}" for field in FIELDS)
+            print(f"   {engine:<12} {summary}")
+    else:
+        print("\n⚠️  BeautifulSoup not installed - output comparison skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Append-Only Checkpoint Journal
+Crash-safe progress persistence for the classification pipelines
+
+Every classified item is appended as one JSON line, so saving progress costs
+O(1) per item instead of re-serialising every result. A crash can at worst
+leave a half-written last line, which replay skips.
+
+FEATURES:
+- JSONL records: {"type": "result", "data": {...}} and
+  {"type": "meta", "timestamp": "...", "metadata": {...}}
+- Every record flushed to the OS immediately; fsync batched (every N records
+  or T seconds, and on every checkpoint)
+- Compaction via temp file + fsync + atomic os.replace
+- Replay tolerant of a truncated tail (the partial line is cut off before appending)
+- Incremental follower for readers such as the monitoring server
+
+USAGE:
+    journal = CheckpointJournal('temp/progress_checkpoint.jsonl')
+    results, metadata, timestamp = journal.replay()
+    journal.append(result)
+    journal.checkpoint({'last_processed': 5, 'total': 100})
+    journal.compact(results, {'completed': True})
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _parse_lines(data: bytes) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse complete journal lines from a chunk of bytes
+
+    Returns:
+        Tuple of (records, bytes consumed) - a trailing partial or corrupt
+        line is not consumed
+    """
+    records = []
+    consumed = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        stripped = line.strip()
+        if stripped:
+            try:
+                records.append(json.loads(stripped))
+            except json.JSONDecodeError:
+                # A torn write can only be the last line; stop here
+                break
+        consumed += len(line)
+    return records, consumed
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of pipeline results and progress metadata
+    """
+
+    def __init__(self, path: str, fsync_every: int = 20, fsync_interval: float = 2.0):
+        """
+        Initialize journal
+
+        Args:
+            path: Journal file (created on first append)
+            fsync_every: Force an fsync after this many unsynced records
+            fsync_interval: Force an fsync when the last one is older than this (seconds)
+        """
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def replay(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any], Optional[str]]:
+        """
+        Rebuild state from the journal
+
+        A torn final line (crash mid-write) is ignored and cut off the file,
+        so later appends start on a clean line.
+
+        Returns:
+            Tuple of (results, latest metadata, latest checkpoint timestamp)
+        """
+        if not self.path.exists():
+            return [], {}, None
+
+        with self._lock:
+            self._close_file()
+            with open(self.path, 'rb') as f:
+                data = f.read()
+
+            records, consumed = _parse_lines(data)
+            if consumed < len(data):
+                print(f"⚠️  Ignoring {len(data) - consumed} bytes of incomplete journal tail in {self.path.name}")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(consumed)
+
+        results = []
+        metadata = {}
+        timestamp = None
+        for record in records:
+            if record.get('type') == 'result':
+                results.append(record['data'])
+            elif record.get('type') == 'meta':
+                metadata = record.get('metadata', {})
+                timestamp = record.get('timestamp')
+
+        return results, metadata, timestamp
+
+    def _open_file(self):
+        """Open the journal for appending (lock must be held)"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _close_file(self):
+        """Flush, sync and close the journal file (lock must be held)"""
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _sync(self):
+        """Flush and fsync (lock must be held)"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _write(self, record: Dict[str, Any], force_sync: bool = False):
+        """Append one record, syncing in batches (lock must be held)"""
+        self._open_file()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        # Hand every line to the OS right away (survives a killed process);
+        # fsync - durability across power loss - is batched
+        self._file.flush()
+        self._unsynced += 1
+
+        if (force_sync or self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self._sync()
+
+    def append(self, result: Dict[str, Any]):
+        """Append one result"""
+        with self._lock:
+            self._write({'type': 'result', 'data': result})
+
+    def checkpoint(self, metadata: Dict[str, Any]):
+        """Record progress metadata and make everything so far durable"""
+        with self._lock:
+            self._write({
+                'type': 'meta',
+                'timestamp': datetime.now().isoformat(),
+                'metadata': metadata
+            }, force_sync=True)
+
+    def compact(self, results: List[Dict[str, Any]], metadata: Dict[str, Any]):
+        """
+        Rewrite the journal as exactly `results` plus one metadata record
+
+        The new file is written and fsynced under a temporary name, then
+        atomically renamed over the journal - a crash leaves either the old
+        or the new journal, never a partial one.
+        """
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with self._lock:
+            self._close_file()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps({'type': 'result', 'data': result}, ensure_ascii=False) + '\n')
+                f.write(json.dumps({
+                    'type': 'meta',
+                    'timestamp': datetime.now().isoformat(),
+                    'metadata': metadata
+                }, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Start an empty journal (discarding previous progress)"""
+        with self._lock:
+            self._close_file()
+            if self.path.exists():
+                self.path.unlink()
+
+    def close(self):
+        """Sync and close the journal"""
+        with self._lock:
+            self._close_file()
+
+
+class JournalFollower:
+    """
+    Incrementally reads a journal another process is writing
+
+    Only bytes appended since the last poll are parsed; a compaction or reset
+    (file replaced or shrunk) triggers a full re-read.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.results: List[Dict[str, Any]] = []
+        self.metadata: Dict[str, Any] = {}
+        self.timestamp: Optional[str] = None
+        self._offset = 0
+        self._inode = None
+
+    def poll(self) -> bool:
+        """
+        Read new journal records
+
+        Returns:
+            True if anything changed since the last poll
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            changed = bool(self.results or self.metadata)
+            self.results, self.metadata, self.timestamp = [], {}, None
+            self._offset, self._inode = 0, None
+            return changed
+
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self.results, self.metadata, self.timestamp = [], {}, None
+            self._offset, self._inode = 0, stat.st_ino
+
+        if stat.st_size == self._offset:
+            return False
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        records, consumed = _parse_lines(data)
+        self._offset += consumed
+
+        for record in records:
+            if record.get('type') == 'result':
+                self.results.append(record['data'])
+            elif record.get('type') == 'meta':
+                self.metadata = record.get('metadata', {})
+                self.timestamp = record.get('timestamp')
+
+        return bool(records)
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Current state in the legacy checkpoint shape, or None if empty"""
+        if not self.results and not self.metadata:
+            return None
+        return {
+            'timestamp': self.timestamp or datetime.now().isoformat(),
+            'metadata': self.metadata,
+            'results': self.results
+        }
@@ -0,0 +1,461 @@
+"""
+Persistent Classification Store
+Embedded SQLite store for pipeline runs, items, classifications and errors
+
+Classifications are keyed by content hash, so each run only sends new or
+changed items to Bedrock; every item a run processes is recorded against
+that run, so outputs and the monitoring server can stream results from the
+database instead of holding the whole corpus in memory.
+
+FEATURES:
+- SQLite file (stdlib only) in WAL mode: readers (monitor, output generation)
+  never block the pipeline writing results; safe to share between worker threads
+- Key = SHA-256 of (normalised item content + prompt version + model ID):
+  editing a page, changing the prompt or switching model all force a reclassification
+- Tables: runs, items, classifications, errors (indexed by source type and content hash)
+- Ordered merge of reused and freshly classified items, so progress
+  counting and checkpoints keep working
+- Each item row keeps a snapshot of the classification the run used, so
+  a later run reclassifying the same content never rewrites earlier runs
+- Streaming reads of a run's results in pipeline result format
+
+USAGE:
+    store = ClassificationStore('temp/classification_store.db')
+    key = content_hash(item_prompt, PROMPT_VERSION, model_id)
+    cached = store.get(key)
+    if cached is None:
+        store.put(key, 'web_scraper', refined)
+
+    run_id = store.start_run('process_all_resources')
+    store.record_result(run_id, result, key)
+    for result in store.iter_results(run_id):
+        ...
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def normalize_content(text: str) -> str:
+    """
+    Normalise text before hashing
+
+    Unicode NFC, all whitespace runs collapsed to one space, ends stripped -
+    so re-scrapes that only differ in formatting hash the same.
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def content_hash(content: str, prompt_version: str, model_id: str) -> str:
+    """
+    Build the store key for one item
+
+    Args:
+        content: Item content as sent to the model (the per-item prompt)
+        prompt_version: PROMPT_VERSION of the prompt templates
+        model_id: Bedrock model ID
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (normalize_content(content), prompt_version, model_id):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT,
+    metadata TEXT
+);
+
+CREATE TABLE IF NOT EXISTS classifications (
+    content_hash TEXT PRIMARY KEY,
+    source_type TEXT NOT NULL,
+    item_key TEXT,
+    refined TEXT NOT NULL,
+    classified_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_source_type ON classifications (source_type);
+
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    source_type TEXT NOT NULL,
+    content_hash TEXT,
+    item_key TEXT,
+    original TEXT NOT NULL,
+    processed_at TEXT NOT NULL,
+    reused INTEGER NOT NULL DEFAULT 0,
+    refined TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_run_source_type ON items (run_id, source_type);
+CREATE INDEX IF NOT EXISTS idx_items_content_hash ON items (content_hash);
+
+CREATE TABLE IF NOT EXISTS errors (
+    error_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    item_id INTEGER REFERENCES items (item_id),
+    source_type TEXT NOT NULL,
+    content_hash TEXT,
+    error TEXT NOT NULL,
+    occurred_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_errors_run_source_type ON errors (run_id, source_type);
+CREATE INDEX IF NOT EXISTS idx_errors_content_hash ON errors (content_hash);
+CREATE INDEX IF NOT EXISTS idx_errors_item_id ON errors (item_id);
+"""
+
+
+class ClassificationStore:
+    """
+    SQLite-backed store of runs, items, classifications and errors
+    """
+
+    def __init__(self, db_path: str = 'temp/classification_store.db'):
+        """
+        Open (or create) the store
+
+        Args:
+            db_path: SQLite database file
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            # WAL lets readers stream results while the pipeline keeps writing;
+            # NORMAL sync is durable across process crashes in WAL mode
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            # Stores created before per-run snapshots: add the column in place
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+            if 'refined' not in columns:
+                self._conn.execute("ALTER TABLE items ADD COLUMN refined TEXT")
+
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a classification
+
+        Returns:
+            Dict with 'refined', 'source_type' and 'classified_at', or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refined, source_type, classified_at FROM classifications WHERE content_hash = ?",
+                (key,)
+            ).fetchone()
+            self.stats['hits' if row else 'misses'] += 1
+
+        if row is None:
+            return None
+        return {'refined': json.loads(row[0]), 'source_type': row[1], 'classified_at': row[2]}
+
+    def put(self, key: str, source_type: str, refined: Dict[str, Any], item_key: str = ''):
+        """
+        Store (or replace) a classification
+
+        Args:
+            key: content_hash of the item
+            source_type: Pipeline source type
+            refined: Parsed model classification
+            item_key: Human-readable identifier (URL or title), for inspection only
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?, ?)",
+                (key, source_type, item_key, json.dumps(refined, ensure_ascii=False), datetime.now().isoformat())
+            )
+            self.stats['stored'] += 1
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # Runs
+
+    def start_run(self, pipeline: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Register a new pipeline run
+
+        Earlier runs of the same pipeline still marked as running were
+        interrupted, and are marked as such.
+
+        Returns:
+            run_id
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = 'interrupted', updated_at = ? WHERE pipeline = ? AND status = 'running'",
+                (now, pipeline)
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO runs (pipeline, status, started_at, updated_at, metadata) VALUES (?, 'running', ?, ?, ?)",
+                (pipeline, now, now, json.dumps(metadata or {}))
+            )
+            return cursor.lastrowid
+
+    def update_run(self, run_id: int, metadata: Dict[str, Any], status: Optional[str] = None):
+        """Record progress metadata (and optionally a final status) for a run"""
+        now = datetime.now().isoformat()
+        finished_at = now if status and status != 'running' else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET metadata = ?, updated_at = ?, status = COALESCE(?, status), "
+                "finished_at = COALESCE(?, finished_at) WHERE run_id = ?",
+                (json.dumps(metadata), now, status, finished_at, run_id)
+            )
+
+    def latest_run(self, pipeline: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Most recently updated run
+
+        Returns:
+            Dict with run_id, pipeline, status, started_at, updated_at,
+            finished_at and metadata, or None if there are no runs
+        """
+        query = "SELECT run_id, pipeline, status, started_at, updated_at, finished_at, metadata FROM runs"
+        params = ()
+        if pipeline:
+            query += " WHERE pipeline = ?"
+            params = (pipeline,)
+        query += " ORDER BY updated_at DESC, run_id DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+
+        keys = ('run_id', 'pipeline', 'status', 'started_at', 'updated_at', 'finished_at', 'metadata')
+        run = dict(zip(keys, row))
+        run['metadata'] = json.loads(run['metadata'] or '{}')
+        return run
+
+    # Items and errors
+
+    def record_result(self, run_id: int, result: Dict[str, Any], key: Optional[str] = None, item_key: str = '') -> int:
+        """
+        Record one processed item of a run
+
+        The item keeps its own copy of the classification, so the run's
+        results stay as they were even if the content is reclassified later
+        (see put); failed items get a row in errors.
+
+        Args:
+            run_id: Run the item belongs to
+            result: Pipeline result record (source_type, original, refined
+                    or error, processed_at, optional reused)
+            key: content_hash of the item
+            item_key: Readable identifier (URL or title)
+
+        Returns:
+            item_id
+        """
+        now = datetime.now().isoformat()
+        refined = result.get('refined')
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO items (run_id, source_type, content_hash, item_key, original, processed_at, reused, refined) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, result['source_type'], key, item_key,
+                 json.dumps(result.get('original', {}), ensure_ascii=False),
+                 result.get('processed_at') or now, 1 if result.get('reused') else 0,
+                 json.dumps(refined, ensure_ascii=False) if refined else None)
+            )
+            item_id = cursor.lastrowid
+
+            if 'error' in result:
+                self._conn.execute(
+                    "INSERT INTO errors (run_id, item_id, source_type, content_hash, error, occurred_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, item_id, result['source_type'], key, str(result['error']), now)
+                )
+        return item_id
+
+    # Streaming reads (separate read-only connection, so they never hold the writer lock)
+
+    def _read_connection(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{Path(self.db_path).resolve()}?mode=ro", uri=True)
+
+    _RESULT_QUERY = """
+        SELECT i.item_id, i.source_type, i.original, i.processed_at, i.reused,
+               COALESCE(i.refined, c.refined), e.error
+        FROM items i
+        LEFT JOIN classifications c ON c.content_hash = i.content_hash
+        LEFT JOIN errors e ON e.item_id = i.item_id
+        WHERE i.run_id = ?
+    """
+
+    @staticmethod
+    def _row_to_result(row: Tuple) -> Dict[str, Any]:
+        """Convert a result query row to the pipeline result format"""
+        _, source_type, original, processed_at, reused, refined, error = row
+        result = {'source_type': source_type, 'original': json.loads(original)}
+        if error is not None or refined is None:
+            result['error'] = error or 'No classification stored'
+        else:
+            result['refined'] = json.loads(refined)
+        result['processed_at'] = processed_at
+        if reused:
+            result['reused'] = True
+        return result
+
+    def iter_results(self, run_id: int, source_type: Optional[str] = None, batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a run's results in processing order
+
+        Rows are fetched in batches, so memory stays flat however large the run.
+
+        Args:
+            run_id: Run to read
+            source_type: Only this source type (default: all)
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            Result records in the pipeline format
+        """
+        query = self._RESULT_QUERY
+        params: Tuple = (run_id,)
+        if source_type:
+            query += " AND i.source_type = ?"
+            params += (source_type,)
+        query += " ORDER BY i.item_id"
+
+        conn = self._read_connection()
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_result(row)
+        finally:
+            conn.close()
+
+    def recent_results(self, run_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Last `limit` results of a run, oldest first"""
+        conn = self._read_connection()
+        try:
+            rows = conn.execute(self._RESULT_QUERY + " ORDER BY i.item_id DESC LIMIT ?", (run_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [self._row_to_result(row) for row in reversed(rows)]
+
+    def count_results(self, run_id: int) -> Dict[str, int]:
+        """Item, error and reused-classification counts for a run"""
+        with self._lock:
+            items, reused = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(reused), 0) FROM items WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            errors = self._conn.execute("SELECT COUNT(*) FROM errors WHERE run_id = ?", (run_id,)).fetchone()[0]
+        return {'items': items, 'errors': errors, 'reused': reused}
+
+    def classify_incremental(
+        self,
+        items: Iterable[Any],
+        source_type: str,
+        key_fn: Callable[[Any], str],
+        classify_iter: Callable[[Iterable[Any]], Iterator[Tuple[Any, Any, float]]],
+        to_refined: Callable[[Any], Optional[Dict[str, Any]]],
+        from_stored: Callable[[Any, Dict[str, Any]], Any],
+        item_key_fn: Callable[[Any], str] = lambda item: '',
+        max_queued_hits: Optional[int] = 256
+    ) -> Iterator[Tuple[Any, Any, float, bool, str]]:
+        """
+        Reuse stored classifications and classify only the misses, in input order
+
+        Items are read lazily; only the misses are passed on to classify_iter,
+        and reused items are yielded in their original position. Hits ahead
+        of the next miss are yielded straight away. Hits queued behind misses
+        that are still in flight are capped at `max_queued_hits`: after that
+        many hits in a row the miss stream ends, classify_iter finishes the
+        misses it has, and a new stream starts at the next miss - so a rerun
+        where most items are already stored streams through instead of
+        buffering the whole input. Runs of fewer hits never split the stream.
+
+        Args:
+            items: Items to classify
+            source_type: Pipeline source type (stored with new classifications)
+            key_fn: Item -> content_hash
+            classify_iter: Classifies an iterable of items, yielding
+                           (item, value, elapsed) in input order
+            to_refined: Pipeline value -> refined dict to store (None = don't store, e.g. errors)
+            from_stored: (item, stored row) -> pipeline value for a reused item
+            item_key_fn: Item -> readable identifier saved alongside the classification
+            max_queued_hits: Consecutive hits after which the miss stream is
+                             split (None = one classify_iter call for all misses,
+                             e.g. for an offline batch job)
+
+        Yields:
+            Tuples of (item, value, elapsed_seconds, reused, content_hash)
+        """
+        iterator = iter(items)
+        queue = deque()
+
+        def misses(first):
+            yield first
+            consecutive_hits = 0
+            for item in iterator:
+                key = key_fn(item)
+                stored = self.get(key)
+                queue.append((item, key, stored))
+                if stored is None:
+                    consecutive_hits = 0
+                    yield item
+                else:
+                    consecutive_hits += 1
+                    if max_queued_hits is not None and consecutive_hits >= max_queued_hits:
+                        return
+
+        def reused_head():
+            while queue and queue[0][2] is not None:
+                item, key, stored = queue.popleft()
+                yield item, from_stored(item, stored), 0.0, True, key
+
+        for item in iterator:
+            key = key_fn(item)
+            stored = self.get(key)
+            if stored is not None:
+                yield item, from_stored(item, stored), 0.0, True, key
+                continue
+
+            queue.append((item, key, None))
+            for item, value, elapsed in classify_iter(misses(item)):
+                yield from reused_head()
+
+                _, key, _ = queue.popleft()
+                refined = to_refined(value)
+                if refined:
+                    self.put(key, source_type, refined, item_key_fn(item))
+                yield item, value, elapsed, False, key
+
+            yield from reused_head()
@@ -0,0 +1,92 @@
+"""
+Ordered Concurrent Executor
+Bounded-concurrency thread pool that yields results in input order
+
+Shared by the classification pipelines, the crawler, the S3 uploader and
+knowledge base retrieval - anything that runs many independent I/O-bound
+calls and wants the results back in the order the work was submitted.
+
+FEATURES:
+- Thread pool with configurable worker count
+- Lazy consumption of input iterables (bounded number of items in flight)
+- Results yielded strictly in input order, with per-item elapsed time
+- Runs inline on the calling thread with a single worker
+
+USAGE:
+    executor = ConcurrentExecutor(max_workers=4)
+
+    for item, result, elapsed in executor.map_ordered(fn, items):
+        ...
+"""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+class ConcurrentExecutor:
+    """
+    Bounded-concurrency executor with ordered result collection
+
+    Items are submitted to a thread pool while at most `max_in_flight` are
+    pending; results are yielded strictly in input order. With a single
+    worker, items run inline on the calling thread.
+    """
+
+    def __init__(self, max_workers: int = 4, max_in_flight: Optional[int] = None):
+        """
+        Initialize executor
+
+        Args:
+            max_workers: Number of concurrent calls
+            max_in_flight: Maximum submitted-but-not-yielded items (default: 2x workers)
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_in_flight = max(self.max_workers, max_in_flight or self.max_workers * 2)
+
+    @staticmethod
+    def _timed(fn: Callable[[Any], Any], item: Any) -> Tuple[Any, float]:
+        """Run fn(item) and return (result, elapsed seconds)"""
+        start = time.time()
+        result = fn(item)
+        return result, time.time() - start
+
+    def map_ordered(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any, float]]:
+        """
+        Apply fn to every item concurrently, yielding results in input order
+
+        Args:
+            fn: Function called with each item (should handle its own errors)
+            items: Any iterable - consumed lazily
+
+        Yields:
+            Tuples of (item, result, elapsed_seconds)
+        """
+        if self.max_workers == 1:
+            for item in items:
+                result, elapsed = self._timed(fn, item)
+                yield item, result, elapsed
+            return
+
+        pending = deque()
+        iterator = iter(items)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            exhausted = False
+            while True:
+                # Keep the pool fed without reading the whole input up front
+                while not exhausted and len(pending) < self.max_in_flight:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((item, pool.submit(self._timed, fn, item)))
+
+                if not pending:
+                    break
+
+                item, future = pending.popleft()
+                result, elapsed = future.result()
+                yield item, result, elapsed
@@ -0,0 +1,260 @@
+"""
+Content Chunker
+Token-aware selection of the most informative parts of a long text, used
+wherever content has to fit a prompt or document budget
+
+FEATURES:
+- Splits text into sections: headings with their paragraphs when the text has
+  line structure, groups of whole sentences of ~150 tokens when it has been
+  flattened to single spaces (extracted web pages)
+- Scores sections: opening sections, headings, keyword density (encephalitis
+  support vocabulary) and words from the title; menu-like spans score low
+- Picks the best sections that fit the token budget and returns them in
+  document order, with [...] marking the gaps
+- Text already within the budget is returned unchanged (same prompts, same
+  content hashes)
+- Chosen section boundaries are cached by content hash, so the same page is
+  only analysed once per budget
+
+USAGE:
+    excerpt = select_content(page['content'], max_tokens=4000, title=page['title'])
+
+    chunker = ContentChunker(segment_tokens=200, keywords=('seizure', 'memory'))
+    excerpt = chunker.select(text, max_tokens=500)
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from scripts.bedrock_executor import estimate_tokens
+
+
+# Vocabulary that marks a section as relevant for classification
+DEFAULT_KEYWORDS = (
+    'encephalitis', 'symptom', 'diagnosis', 'diagnosed', 'treatment', 'recovery',
+    'rehabilitation', 'support', 'caregiver', 'carer', 'family', 'parent', 'child',
+    'children', 'bereaved', 'bereavement', 'professional', 'clinician', 'research',
+    'autoimmune', 'infectious', 'infection', 'virus', 'brain', 'injury', 'memory',
+    'fatigue', 'seizure', 'epilepsy', 'behaviour', 'emotional', 'cognitive',
+    'hospital', 'acute', 'long-term', 'helpline', 'factsheet', 'guide', 'benefits',
+    'education', 'school', 'work', 'event', 'fundraising', 'donate'
+)
+
+# Marks text left out between selected sections
+GAP_MARKER = ' [...] '
+
+_WORD = re.compile(r"[\w'-]+")
+# End of a sentence in flattened text: ., ! or ? (plus any closing quotes or
+# brackets), whitespace, then something that can start a sentence - so
+# "e.g. memory" or "3.5 mg" are not split
+_SENTENCE_END = re.compile(r'(?<=[.!?])[\'"\u2019\u201d)\]]*\s+(?=[A-Z0-9"\u2018\u201c(\[])')
+
+
+def _is_heading(line: str) -> bool:
+    """Short line without closing punctuation (e.g. 'Symptoms of encephalitis')"""
+    line = line.strip()
+    return 0 < len(line) <= 80 and line[-1] not in '.!?,;' and len(line.split()) <= 12
+
+
+class ContentChunker:
+    """
+    Splits, scores and selects text sections within a token budget
+    """
+
+    def __init__(self, segment_tokens: int = 150, keywords: Iterable[str] = DEFAULT_KEYWORDS, cache_size: int = 2048):
+        """
+        Initialize chunker
+
+        Args:
+            segment_tokens: Target size of sections cut from flattened text
+            keywords: Words that make a section more informative
+            cache_size: Selections remembered (by content hash and budget)
+        """
+        self.segment_tokens = segment_tokens
+        self.keywords = frozenset(keyword.lower() for keyword in keywords)
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, List[Tuple[int, int]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'selected': 0, 'unchanged': 0, 'cache_hits': 0}
+
+    def sections(self, text: str) -> List[Tuple[int, int, bool]]:
+        """
+        Split text into sections
+
+        Returns:
+            (start, end, starts_with_heading) character spans covering the text
+        """
+        if '\n' in text.strip():
+            return self._line_sections(text)
+        return self._sentence_sections(text)
+
+    def _line_sections(self, text: str) -> List[Tuple[int, int, bool]]:
+        """Headings with the paragraphs below them, capped at ~2x segment_tokens"""
+        sections = []
+        start = None
+        heading = False
+        has_body = False
+        offset = 0
+        for line in text.splitlines(keepends=True):
+            line_start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+
+            line_heading = _is_heading(line)
+            too_long = start is not None and estimate_tokens(text[start:line_start]) >= self.segment_tokens * 2
+            # A heading opens a new section unless it directly follows another heading
+            if start is None or (line_heading and has_body) or too_long:
+                if start is not None:
+                    sections.append((start, line_start, heading))
+                start = line_start
+                heading = line_heading
+                has_body = False
+            if not line_heading:
+                has_body = True
+
+        if start is not None:
+            sections.append((start, len(text), heading))
+        return sections
+
+    def _sentence_sections(self, text: str) -> List[Tuple[int, int, bool]]:
+        """Consecutive sentences grouped to ~segment_tokens (long sentences are split)"""
+        max_chars = self.segment_tokens * 4
+        sections = []
+        start = 0
+        for match in _SENTENCE_END.finditer(text):
+            end = match.end()
+            while end - start > max_chars * 2:
+                # One very long "sentence" (lists, menus): cut at a space
+                cut = text.rfind(' ', start, start + max_chars) + 1 or start + max_chars
+                sections.append((start, cut, False))
+                start = cut
+            if end - start >= max_chars:
+                sections.append((start, end, False))
+                start = end
+
+        while len(text) - start > max_chars * 2:
+            cut = text.rfind(' ', start, start + max_chars) + 1 or start + max_chars
+            sections.append((start, cut, False))
+            start = cut
+        if start < len(text):
+            sections.append((start, len(text), False))
+        return sections
+
+    def score(self, text: str, index: int, heading: bool, title_words: frozenset) -> float:
+        """
+        Informativeness of one section
+
+        Args:
+            text: Section text
+            index: Position of the section in the document (0 = first)
+            heading: Section starts with a heading
+            title_words: Lower-cased words of the page title
+        """
+        words = [word.lower() for word in _WORD.findall(text)]
+        if not words:
+            return 0.0
+
+        keyword_density = sum(1 for word in words if word in self.keywords) / len(words)
+        title_density = sum(1 for word in words if word in title_words) / len(words) if title_words else 0.0
+        # Opening sections usually state what the page is about
+        position = 0.5 ** index
+        # Navigation and link lists: many very short "words", little prose
+        letters = sum(1 for char in text if char.isalpha())
+        prose = letters / max(1, len(text))
+
+        score = position + 10.0 * keyword_density + 5.0 * title_density + (0.25 if heading else 0.0)
+        if prose < 0.6:
+            score *= 0.5
+        return score
+
+    @staticmethod
+    def _cache_key(text: str, max_tokens: int, title: str) -> str:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"{digest}:{max_tokens}:{hashlib.sha256(title.encode('utf-8')).hexdigest()[:16]}"
+
+    def _choose(self, text: str, max_tokens: int, title: str) -> List[Tuple[int, int]]:
+        """Spans of the selected sections, in document order"""
+        sections = self.sections(text)
+        title_words = frozenset(word.lower() for word in _WORD.findall(title) if len(word) > 3)
+        scored = sorted(
+            range(len(sections)),
+            key=lambda i: (-self.score(text[sections[i][0]:sections[i][1]], i, sections[i][2], title_words), i)
+        )
+
+        gap_tokens = estimate_tokens(GAP_MARKER)
+        # The first section always opens the excerpt
+        order = [0] + [i for i in scored if i != 0] if sections else []
+        chosen = []
+        used = 0
+        for i in order:
+            start, end, _ = sections[i]
+            cost = estimate_tokens(text[start:end].strip()) + gap_tokens
+            if used + cost > max_tokens:
+                continue
+            chosen.append((start, end))
+            used += cost
+
+        if not chosen and sections:
+            # Not even the first section fits: keep its beginning
+            start, end = sections[0][0], sections[0][1]
+            chosen.append((start, min(end, start + max(0, max_tokens - gap_tokens) * 4)))
+        return sorted(chosen)
+
+    def select(self, text: Optional[str], max_tokens: int, title: str = '') -> str:
+        """
+        The most informative part of a text that fits a token budget
+
+        Args:
+            text: Full text
+            max_tokens: Budget in estimated tokens (see estimate_tokens)
+            title: Page title (its words make sections more relevant)
+
+        Returns:
+            The text itself if it fits, otherwise the selected sections in
+            document order joined by GAP_MARKER
+        """
+        if not text or estimate_tokens(text) <= max_tokens:
+            with self._lock:
+                self.stats['unchanged'] += 1
+            return text or ''
+
+        key = self._cache_key(text, max_tokens, title)
+        with self._lock:
+            spans = self._cache.get(key)
+            if spans is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+
+        if spans is None:
+            spans = self._choose(text, max_tokens, title)
+            with self._lock:
+                self._cache[key] = spans
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        with self._lock:
+            self.stats['selected'] += 1
+
+        parts = []
+        previous_end = 0
+        for start, end in spans:
+            if start > previous_end:
+                parts.append(GAP_MARKER.strip())
+            parts.append(text[start:end].strip())
+            previous_end = end
+        if previous_end < len(text.rstrip()):
+            parts.append(GAP_MARKER.strip())
+        return ' '.join(parts) if '\n' not in text.strip() else '\n'.join(parts)
+
+
+_default_chunker = ContentChunker()
+
+
+def select_content(text: Optional[str], max_tokens: int, title: str = '') -> str:
+    """
+    Token-budgeted excerpt of a text using the shared chunker (see ContentChunker.select)
+    """
+    return _default_chunker.select(text, max_tokens, title)
@@ -13,20 +13,54 @@ USAGE:
     # Create knowledge base infrastructure
     python3 scripts/create_knowledge_base.py --create
     
-    # Ingest data into knowledge base
-    python3 scripts/create_knowledge_base.py --ingest
+    # Sync data into knowledge base: new/changed documents uploaded in parallel,
+    # removed ones deleted, ingestion job only when something changed
+    python3 scripts/create_knowledge_base.py --ingest [--upload-workers N] [--force-ingest]
+    
+    # Deleting more than half of the documents in one sync needs confirming
+    python3 scripts/create_knowledge_base.py --ingest --allow-mass-delete
+    
+    # Start ingestion without waiting, or finish as soon as an EventBridge -> SQS
+    # ingestion event arrives (polling backs off from 1s to 30s either way)
+    python3 scripts/create_knowledge_base.py --ingest --no-wait
+    python3 scripts/create_knowledge_base.py --ingest --ingestion-events-queue https://sqs.us-west-2.amazonaws.com/123456789012/kb-ingestion-events
     
     # Test semantic search
     python3 scripts/create_knowledge_base.py --test "memory problems after encephalitis"
+    
+    # Build a local vector index of the same documents (searched without the
+    # managed Knowledge Base; --embedder hashing for a deterministic offline index)
+    python3 scripts/create_knowledge_base.py --build-local-index output/kb_index [--embedder bedrock-titan|hashing]
 """
 
 import boto3
 import json
 import time
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import hashlib
+import os
+import re
+import sys
+
+# Add parent directory to path so we can import from scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_stream import read_json_array
+from scripts.content_chunker import select_content
+from scripts.s3_uploader import ParallelS3Uploader
+from scripts.local_vector_index import BedrockTitanEmbedder, HashingEmbedder, LocalVectorIndex
+from scripts.ingestion_orchestrator import IngestionJob, IngestionOrchestrator, print_status
+
+
+# A sync that would delete more than this share of the documents is refused
+# unless --allow-mass-delete is given (e.g. a truncated results file)
+MAX_DELETE_FRACTION = 0.5
+
+# Documents uploaded before keys were derived from each resource's identity
+# were numbered by position (knowledge-base/resource_00042.json)
+LEGACY_KEY = re.compile(r'(^|/)resource_\d{5}\.json$')
 
 
 class BedrockKnowledgeBaseManager:
@@ -54,6 +88,11 @@ class BedrockKnowledgeBaseManager:
         self.collection_name = 'encephalitis-resources'
         self.bucket_name = f'encephalitis-kb-{self.region}'
         self.embedding_model = 'amazon.titan-embed-text-v2:0'
+        self.kb_prefix = 'knowledge-base/'
+        # Key -> MD5 of every document in the data source (outside kb_prefix, so not ingested)
+        self.manifest_key = 'manifests/knowledge-base.json'
+        # Non-blocking ingestion jobs with adaptive polling
+        self.ingestion = IngestionOrchestrator(self.bedrock_agent, on_status=print_status)
         
         print(f"✅ Initialized Bedrock Knowledge Base Manager")
         print(f"   Region: {region_name}")
@@ -351,7 +390,7 @@ class BedrockKnowledgeBaseManager:
                 'type': 'S3',
                 's3Configuration': {
                     'bucketArn': f'arn:aws:s3:::{self.bucket_name}',
-                    'inclusionPrefixes': ['knowledge-base/']
+                    'inclusionPrefixes': [self.kb_prefix]
                 }
             }
             
@@ -379,29 +418,21 @@ class BedrockKnowledgeBaseManager:
             print(f"❌ Error creating data source: {e}")
             raise
     
-    def prepare_documents_for_kb(self, json_file: str = 'output/encephalitis_content_database.json') -> List[str]:
+    def iter_kb_documents(self, json_file: str = 'output/encephalitis_content_database.json') -> Iterator[Tuple[str, Dict[str, Any]]]:
         """
-        Prepare documents for Knowledge Base ingestion
-        Converts classified resources to text documents with metadata
+        Stream Knowledge Base documents from the classification results
+        
+        The results file is read one resource at a time, so memory stays flat
+        however many resources it holds.
         
         Args:
             json_file: Path to complete classification results
             
-        Returns:
-            List of S3 keys for uploaded documents
+        Yields:
+            Tuples of (S3 key, document) for every successfully classified resource
         """
-        print(f"\n📄 Preparing documents for Knowledge Base")
-        print(f"   Source: {json_file}")
-        
-        # Load classified results
-        with open(json_file, 'r', encoding='utf-8') as f:
-            results = json.load(f)
-        
-        print(f"   Found {len(results)} resources to process")
-        
-        uploaded_keys = []
-        
-        for idx, result in enumerate(results, 1):
+        seen = {}
+        for result in read_json_array(json_file):
             if 'error' in result:
                 continue
             
@@ -423,25 +454,163 @@ class BedrockKnowledgeBaseManager:
                 'metadata': document_metadata
             }
             
-            # Upload to S3
-            key = f"knowledge-base/resource_{idx:05d}.json"
-            try:
-                self.s3.put_object(
-                    Bucket=self.bucket_name,
-                    Key=key,
-                    Body=json.dumps(document, ensure_ascii=False),
-                    ContentType='application/json'
-                )
-                uploaded_keys.append(key)
-                
-                if idx % 100 == 0:
-                    print(f"   Uploaded {idx}/{len(results)} documents...")
-                    
-            except Exception as e:
-                print(f"   ⚠️  Failed to upload document {idx}: {e}")
-        
-        print(f"✅ Uploaded {len(uploaded_keys)} documents to S3")
-        return uploaded_keys
+            yield self._document_key(result, seen), document
+    
+    def _document_key(self, result: Dict[str, Any], seen: Dict[str, int]) -> str:
+        """
+        Stable S3 key for a resource, derived from its identity (source type +
+        URL, title or name) rather than its position in the results file
+        
+        Args:
+            result: Classification result
+            seen: Identities already used in this run (repeats get a -2, -3... suffix)
+        """
+        original = result.get('original', {})
+        source_type = result.get('source_type', 'unknown')
+        identity = original.get('url') or original.get('title') or original.get('name') or json.dumps(original, sort_keys=True)
+        digest = hashlib.sha256(f"{source_type}\n{identity}".encode('utf-8')).hexdigest()[:20]
+        
+        seen[digest] = seen.get(digest, 0) + 1
+        suffix = f"-{seen[digest]}" if seen[digest] > 1 else ''
+        return f"{self.kb_prefix}{source_type}/{digest}{suffix}.json"
+    
+    def load_manifest(self) -> Optional[Dict[str, str]]:
+        """
+        Manifest of the last sync
+        
+        Returns:
+            Dict of S3 key -> document MD5, or None if no sync has run yet
+        """
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self.manifest_key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        except Exception as e:
+            print(f"   ⚠️  Could not read manifest ({e}) - comparing with the bucket instead")
+            return None
+        return json.loads(response['Body'].read()).get('documents', {})
+    
+    def save_manifest(self, documents: Dict[str, str]):
+        """Store the manifest (S3 key -> document MD5) of the current sync"""
+        manifest = {
+            'updated_at': datetime.now().isoformat(),
+            'prefix': self.kb_prefix,
+            'document_count': len(documents),
+            'documents': dict(sorted(documents.items()))
+        }
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.manifest_key,
+            Body=json.dumps(manifest, indent=2).encode('utf-8'),
+            ContentType='application/json'
+        )
+    
+    def sync_documents(self, json_file: str = 'output/encephalitis_content_database.json',
+                       max_workers: int = 16, allow_mass_delete: bool = False) -> Dict[str, Any]:
+        """
+        Bring the data source in line with the classification results
+        
+        Uploads new and changed documents (in parallel), deletes documents of
+        resources that are no longer in the results, and records the result
+        in the manifest. Removing more than MAX_DELETE_FRACTION of the
+        manifest (e.g. after a truncated or failed run) is refused unless
+        allow_mass_delete is set; documents that fail to delete stay in the
+        manifest, so the next sync retries them. Legacy position-numbered
+        documents are replaced by their identity-keyed copies, so they are
+        always deleted - unless the results hold far fewer documents than
+        they do, which the same guard treats as a truncated run.
+        
+        Args:
+            json_file: Path to complete classification results
+            max_workers: Concurrent S3 uploads
+            allow_mass_delete: Delete even when most of the data source would go
+            
+        Returns:
+            Dict with keys (documents now in S3), uploaded, unchanged,
+            deleted, failed and changed (True if the data source differs
+            from the last sync)
+        """
+        print(f"\n📄 Syncing Knowledge Base documents")
+        print(f"   Source: {json_file}")
+        
+        uploader = ParallelS3Uploader(self.bucket_name, region_name=self.region, max_workers=max_workers)
+        
+        manifest = self.load_manifest()
+        if manifest is None:
+            # First sync (or legacy position-numbered keys): start from what the bucket holds
+            manifest = uploader.existing_etags(self.kb_prefix)
+            print(f"   No manifest yet - comparing with {len(manifest)} objects in the bucket")
+        else:
+            print(f"   Manifest: {len(manifest)} documents from the last sync")
+        
+        current_keys = set()
+        
+        def documents():
+            for key, document in self.iter_kb_documents(json_file):
+                current_keys.add(key)
+                yield key, json.dumps(document, ensure_ascii=False).encode('utf-8')
+        
+        stored = uploader.upload(documents(), prefix=self.kb_prefix, existing=manifest)
+        
+        removed = sorted(key for key in manifest if key not in current_keys)
+        legacy = [key for key in removed if LEGACY_KEY.search(key)]
+        removed = [key for key in removed if not LEGACY_KEY.search(key)]
+        tracked = len(manifest) - len(legacy)
+        kept = []
+        if removed and len(removed) > tracked * MAX_DELETE_FRACTION and not allow_mass_delete:
+            print(f"   ⚠️  Not deleting {len(removed)} of {tracked} documents "
+                  f"(more than {MAX_DELETE_FRACTION:.0%} of the data source) - "
+                  f"check the results file, or rerun with --allow-mass-delete")
+            kept = removed
+        elif removed:
+            print(f"   🗑️  Deleting {len(removed)} documents no longer in the results")
+            kept = uploader.delete(removed)
+        
+        # Migration from position-numbered keys: the documents were just
+        # uploaded under their identity keys, so the old copies would only
+        # be ingested twice
+        if legacy and len(current_keys) < len(legacy) * (1 - MAX_DELETE_FRACTION) and not allow_mass_delete:
+            print(f"   ⚠️  Not replacing {len(legacy)} legacy resource_NNNNN documents with only "
+                  f"{len(current_keys)} current ones - check the results file, or rerun with --allow-mass-delete")
+            kept += legacy
+        elif legacy:
+            print(f"   🔁 Deleting {len(legacy)} legacy resource_NNNNN documents (now stored under identity keys)")
+            kept += uploader.delete(legacy)
+        
+        # Failed uploads keep their previous entry, so they are retried next time;
+        # documents not deleted stay listed, so their deletion is retried too
+        new_manifest = {key: stored.get(key) or manifest.get(key) for key in current_keys}
+        new_manifest.update((key, manifest.get(key)) for key in kept)
+        self.save_manifest({key: md5 for key, md5 in new_manifest.items() if md5})
+        
+        print(f"✅ {uploader.summary()}")
+        return {
+            'keys': sorted(stored),
+            'uploaded': uploader.stats['uploaded'],
+            'unchanged': uploader.stats['unchanged'],
+            'deleted': uploader.stats['deleted'],
+            'failed': uploader.stats['failed'],
+            'changed': bool(uploader.stats['uploaded'] or uploader.stats['deleted'])
+        }
+    
+    def prepare_documents_for_kb(self, json_file: str = 'output/encephalitis_content_database.json',
+                                 max_workers: int = 16, allow_mass_delete: bool = False) -> List[str]:
+        """
+        Prepare documents for Knowledge Base ingestion
+        Converts classified resources to text documents with metadata
+        
+        Only new or changed documents are uploaded, and removed resources are
+        deleted (see sync_documents).
+        
+        Args:
+            json_file: Path to complete classification results
+            max_workers: Concurrent S3 uploads
+            allow_mass_delete: Delete even when most of the data source would go
+            
+        Returns:
+            List of S3 keys for uploaded (or already up-to-date) documents
+        """
+        return self.sync_documents(json_file, max_workers, allow_mass_delete)['keys']
     
     def _create_document_text(self, original: Dict, refined: Dict, tags: Dict, metadata: Dict, recommendations: Dict) -> str:
         """Create rich text representation for embedding"""
@@ -450,7 +619,8 @@ class BedrockKnowledgeBaseManager:
         title = original.get('title', 'Untitled')
         description = original.get('description', original.get('summary', ''))
         url = original.get('url', '')
-        content = original.get('content', original.get('full_content', ''))[:2000]
+        # Most informative ~2,000 characters rather than the first 2,000
+        content = select_content(original.get('content', original.get('full_content', '')), 500, title=title)
         
         # Build comprehensive text for semantic search
         text_parts = [
@@ -522,55 +692,98 @@ class BedrockKnowledgeBaseManager:
             'processed_at': result.get('processed_at', '')
         }
     
-    def ingest_data(self, kb_id: str, data_source_id: str) -> str:
-        """Start ingestion job for Knowledge Base"""
+    def build_local_index(self, index_dir: str = 'output/kb_index',
+                          json_file: str = 'output/encephalitis_content_database.json',
+                          embedder_name: str = 'bedrock-titan') -> LocalVectorIndex:
+        """
+        Build a local vector index of the Knowledge Base documents
+        
+        Args:
+            index_dir: Output directory
+            json_file: Path to complete classification results
+            embedder_name: 'bedrock-titan' (the Knowledge Base's embedding model)
+                           or 'hashing' (deterministic, no network)
+            
+        Returns:
+            The built index
+        """
+        print(f"\n📦 Building local vector index")
+        print(f"   Source: {json_file}")
+        print(f"   Embedder: {embedder_name}")
+        
+        if embedder_name == 'hashing':
+            embedder = HashingEmbedder()
+        else:
+            embedder = BedrockTitanEmbedder(model_id=self.embedding_model, region_name=self.region)
+        
+        return LocalVectorIndex.build(self.iter_kb_documents(json_file), embedder, index_dir, region_name=self.region)
+    
+    def ingest_data(self, kb_id: str, data_source_id: str, wait: bool = True) -> str:
+        """
+        Start ingestion job for Knowledge Base
+        
+        Args:
+            kb_id: Knowledge Base ID
+            data_source_id: Data source to ingest
+            wait: Block until the job finishes (completion is noticed within
+                  seconds - see IngestionOrchestrator)
+            
+        Returns:
+            Ingestion job ID
+        """
+        return self.ingest_data_sources(kb_id, [data_source_id], wait=wait)[0].job_id
+    
+    def ingest_data_sources(self, kb_id: str, data_source_ids: List[str], wait: bool = True) -> List[IngestionJob]:
+        """
+        Start ingestion jobs for several data sources in parallel
+        
+        Args:
+            kb_id: Knowledge Base ID
+            data_source_ids: Data sources to ingest
+            wait: Block until every job finishes
+            
+        Returns:
+            IngestionJob handles (still running if wait is False)
+        """
         try:
-            print(f"\n🔄 Starting ingestion job")
+            print(f"\n🔄 Starting ingestion job{'s' if len(data_source_ids) > 1 else ''}")
             
-            response = self.bedrock_agent.start_ingestion_job(
-                knowledgeBaseId=kb_id,
-                dataSourceId=data_source_id,
-                description='Ingest classified Encephalitis resources'
-            )
+            jobs = self.ingestion.start_many(kb_id, data_source_ids)
+            for job in jobs:
+                print(f"   Job ID: {job.job_id} (data source {job.data_source_id})")
+                print(f"   Status: {job.status}")
             
-            job_id = response['ingestionJob']['ingestionJobId']
-            print(f"   Job ID: {job_id}")
-            print(f"   Status: {response['ingestionJob']['status']}")
+            if not wait:
+                print("\n   Not waiting for completion - status is in the Bedrock console")
+                return jobs
             
-            # Monitor ingestion job
+            # Monitor ingestion jobs (adaptive polling, plus events if configured)
             print("\n   ⏳ Monitoring ingestion progress...")
-            while True:
-                status = self.bedrock_agent.get_ingestion_job(
-                    knowledgeBaseId=kb_id,
-                    dataSourceId=data_source_id,
-                    ingestionJobId=job_id
-                )
-                
-                current_status = status['ingestionJob']['status']
-                print(f"   Status: {current_status}")
-                
-                if current_status in ['COMPLETE', 'FAILED']:
-                    break
-                
-                time.sleep(30)
-            
-            if current_status == 'COMPLETE':
-                stats = status['ingestionJob'].get('statistics', {})
-                print(f"\n✅ Ingestion complete!")
-                print(f"   Documents processed: {stats.get('numberOfDocumentsScanned', 0)}")
-                print(f"   Documents indexed: {stats.get('numberOfDocumentsIndexed', 0)}")
-                print(f"   Documents failed: {stats.get('numberOfDocumentsFailed', 0)}")
-            else:
-                print(f"\n❌ Ingestion failed")
-                print(f"   Failure reasons: {status['ingestionJob'].get('failureReasons', [])}")
-            
-            return job_id
+            self.ingestion.wait_all(jobs)
+            
+            for job in jobs:
+                if job.status == 'COMPLETE':
+                    stats = job.statistics
+                    print(f"\n✅ Ingestion complete! ({job.data_source_id}, {job.seconds:.0f}s)")
+                    print(f"   Documents processed: {stats.get('numberOfDocumentsScanned', 0)}")
+                    print(f"   Documents indexed: {stats.get('numberOfDocumentsIndexed', 0)}")
+                    print(f"   Documents failed: {stats.get('numberOfDocumentsFailed', 0)}")
+                elif job.error is not None:
+                    print(f"\n❌ Gave up checking ingestion job {job.job_id} ({job.data_source_id})")
+                    print(f"   Last error: {job.error}")
+                else:
+                    print(f"\n❌ Ingestion {job.status.lower()} ({job.data_source_id})")
+                    print(f"   Failure reasons: {job.failure_reasons}")
+            print(f"\n   {self.ingestion.summary()}")
+            
+            return jobs
             
         except Exception as e:
             print(f"❌ Error starting ingestion: {e}")
             raise
     
-    def query_knowledge_base(self, kb_id: str, query: str, max_results: int = 5) -> List[Dict]:
+    def query_knowledge_base(self, kb_id: str, query: str, max_results: int = 5,
+                             local_index: Optional[str] = None) -> List[Dict]:
         """
         Query Knowledge Base with semantic search
         
@@ -578,6 +791,7 @@ class BedrockKnowledgeBaseManager:
             kb_id: Knowledge Base ID
             query: Natural language query
             max_results: Maximum number of results
+            local_index: Search this LocalVectorIndex directory instead
             
         Returns:
             List of relevant documents with scores
@@ -586,17 +800,20 @@ class BedrockKnowledgeBaseManager:
             print(f"\n🔍 Querying Knowledge Base")
             print(f"   Query: {query}")
             
-            response = self.bedrock_agent_runtime.retrieve(
-                knowledgeBaseId=kb_id,
-                retrievalQuery={'text': query},
-                retrievalConfiguration={
-                    'vectorSearchConfiguration': {
-                        'numberOfResults': max_results
+            if local_index:
+                results = LocalVectorIndex.load(local_index).search(query, max_results=max_results)
+            else:
+                response = self.bedrock_agent_runtime.retrieve(
+                    knowledgeBaseId=kb_id,
+                    retrievalQuery={'text': query},
+                    retrievalConfiguration={
+                        'vectorSearchConfiguration': {
+                            'numberOfResults': max_results
+                        }
                     }
-                }
-            )
-            
-            results = response['retrievalResults']
+                )
+                
+                results = response['retrievalResults']
             
             print(f"\n✅ Found {len(results)} results")
             print("\n" + "="*80)
@@ -714,14 +931,36 @@ if __name__ == "__main__":
             print("❌ No configuration found. Run with --create first.")
             sys.exit(1)
         
-        # Prepare documents
-        manager.prepare_documents_for_kb()
-        
-        # Start ingestion
-        manager.ingest_data(
-            kb_id=config['knowledge_base_id'],
-            data_source_id=config['data_source_id']
-        )
+        # Check for upload parallelism
+        upload_workers = 16
+        if '--upload-workers' in sys.argv:
+            try:
+                workers_idx = sys.argv.index('--upload-workers')
+                if workers_idx + 1 < len(sys.argv):
+                    upload_workers = int(sys.argv[workers_idx + 1])
+            except (ValueError, IndexError):
+                pass
+        
+        # Sync documents (only new or changed ones are uploaded, removed ones deleted)
+        sync = manager.sync_documents(max_workers=upload_workers,
+                                      allow_mass_delete='--allow-mass-delete' in sys.argv)
+        
+        # Ingestion job state-change events (optional - polling works without them)
+        if '--ingestion-events-queue' in sys.argv:
+            queue_idx = sys.argv.index('--ingestion-events-queue')
+            if queue_idx + 1 < len(sys.argv):
+                manager.ingestion.sqs = boto3.client('sqs', region_name=manager.region)
+                manager.ingestion.events_queue_url = sys.argv[queue_idx + 1]
+        
+        # Start ingestion - only needed when the data source changed
+        if sync['changed'] or '--force-ingest' in sys.argv:
+            manager.ingest_data_sources(
+                kb_id=config['knowledge_base_id'],
+                data_source_ids=config.get('data_source_ids') or [config['data_source_id']],
+                wait='--no-wait' not in sys.argv
+            )
+        else:
+            print("\n✅ Knowledge base already up to date - no ingestion needed (--force-ingest to run anyway)")
         
     elif '--test' in sys.argv:
         # Test query
@@ -739,9 +978,26 @@ if __name__ == "__main__":
             max_results=5
         )
         
+    elif '--build-local-index' in sys.argv:
+        # Local vector index of the same documents
+        index_idx = sys.argv.index('--build-local-index')
+        index_dir = 'output/kb_index'
+        if index_idx + 1 < len(sys.argv) and not sys.argv[index_idx + 1].startswith('--'):
+            index_dir = sys.argv[index_idx + 1]
+        
+        embedder_name = 'bedrock-titan'
+        if '--embedder' in sys.argv:
+            embedder_idx = sys.argv.index('--embedder')
+            if embedder_idx + 1 < len(sys.argv):
+                embedder_name = sys.argv[embedder_idx + 1]
+        
+        index = manager.build_local_index(index_dir=index_dir, embedder_name=embedder_name)
+        print(f"\n   Search it with: python3 scripts/query_knowledge_base.py \"your query\" --local-index {index_dir}")
+        
     else:
         print("\nUSAGE:")
         print("  python3 scripts/create_knowledge_base.py --create")
         print("  python3 scripts/create_knowledge_base.py --ingest")
         print("  python3 scripts/create_knowledge_base.py --test \"your query here\"")
+        print("  python3 scripts/create_knowledge_base.py --build-local-index output/kb_index")
         print()
@@ -1,13 +1,207 @@
 """
 Excel File Processor for Charity Staff Resources
 Processes Live Chat Crib Sheet and Contacts spreadsheets for tag refinement
+
+Sheets are parsed on first use, and rows are extracted with column-wise
+pandas/NumPy operations instead of per-cell iterrows() loops
+(python3 scripts/benchmark_excel_extraction.py compares the two)
+
+For workbooks too large to hold in memory, streaming=True reads rows one at a
+time instead (scripts/excel_stream.py)
 """
 
+import os
+import sys
 import pandas as pd
+import numpy as np
 import json
-from typing import Dict, List, Any, Optional
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from pathlib import Path
 
+# Also run directly (python3 scripts/excel_processor.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.excel_stream import StreamingWorkbook
+
+
+class LazyWorkbook(Mapping):
+    """
+    Read-only {sheet name: DataFrame} mapping that parses a sheet on first access
+    
+    Same contents as pd.read_excel(excel_file, sheet_name=None), which parses
+    every sheet up front
+    """
+    
+    def __init__(self, excel_file: str):
+        self.excel_file = excel_file
+        self._workbook = pd.ExcelFile(excel_file)
+        self._frames: Dict[str, pd.DataFrame] = {}
+    
+    def __getitem__(self, sheet_name: str) -> pd.DataFrame:
+        if sheet_name not in self._frames:
+            if sheet_name not in self._workbook.sheet_names:
+                raise KeyError(sheet_name)
+            self._frames[sheet_name] = self._workbook.parse(sheet_name)
+        return self._frames[sheet_name]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._workbook.sheet_names)
+    
+    def __len__(self) -> int:
+        return len(self._workbook.sheet_names)
+    
+    def __contains__(self, sheet_name: object) -> bool:
+        return sheet_name in self._workbook.sheet_names
+    
+    def loaded_sheets(self) -> List[str]:
+        """Names of the sheets parsed so far"""
+        return list(self._frames)
+    
+    def close(self):
+        """Close the workbook file (sheets already parsed stay available)"""
+        self._workbook.close()
+
+
+def row_dtype(df: pd.DataFrame) -> np.dtype:
+    """
+    dtype of the rows iterrows() yields for a sheet
+    
+    The sheet's common dtype: a numeric column beside a float column is upcast
+    to float (3 -> '3.0'), and datetimes stay Timestamps.
+    """
+    return df.iloc[:0].to_numpy().dtype
+
+
+def cell_strings(column: pd.Series, dtype: np.dtype) -> pd.Series:
+    """
+    str(value) of every cell, exactly as str(row[column]) in an iterrows() loop
+    
+    Series.astype(str) formats differently (datetimes lose '00:00:00', ints are
+    not upcast), so each cell is cast to the row dtype and passed to str().
+    
+    Args:
+        column: Sheet column
+        dtype: row_dtype() of the sheet
+    """
+    return pd.Series(column.to_numpy(dtype=dtype), index=column.index).map(str)
+
+
+def column_strings(df: pd.DataFrame, column: str, na: str = '') -> np.ndarray:
+    """
+    A column as an object array of str(value), formatted as iterrows() rows are
+    
+    Args:
+        df: Sheet
+        column: Column name ('' for every row if the sheet has no such column)
+        na: Value for empty cells
+        
+    Returns:
+        Object array with one string per row
+    """
+    if column not in df.columns:
+        return np.full(len(df), '', dtype=object)
+    values = df[column]
+    strings = cell_strings(values, row_dtype(df)).to_numpy(dtype=object)
+    return np.where(values.notna().to_numpy(), strings, na)
+
+
+def cell_string(row: Dict[str, Any], column: str, na: str = '') -> str:
+    """
+    column_strings() for one streamed row dict
+    
+    Cells are formatted as stored - whole numbers are not upcast to float
+    the way a DataFrame row with a float column would be.
+    
+    Args:
+        row: Row dict from StreamingWorkbook.rows()
+        column: Column name ('' if the sheet has no such column)
+        na: Value for an empty cell
+    """
+    if column not in row:
+        return ''
+    value = row[column]
+    return na if value is None else str(value)
+
+
+def extract_rows(df: pd.DataFrame) -> Tuple[List[Any], List[str], List[List[str]]]:
+    """
+    Text and URLs of every row, one column at a time
+    
+    Each non-empty cell (str(value).strip(), formatted as in an iterrows()
+    row) starting with 'http' is a URL; the other cells are joined with spaces
+    in column order.
+    
+    Args:
+        df: Sheet
+        
+    Returns:
+        (row index labels, row texts, row URL lists) of the rows that have text
+    """
+    text = np.full(len(df), '', dtype=object)
+    url_cells = []
+    url_masks = []
+    dtype = row_dtype(df)
+    
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        present = column.notna().to_numpy()
+        strings = cell_strings(column, dtype).str.strip()
+        values = strings.to_numpy(dtype=object)
+        filled = present & (values != '')
+        is_url = filled & strings.str.startswith('http').to_numpy(dtype=bool)
+        is_text = filled & ~is_url
+        
+        # Append to rows that already have text, start the others
+        append = is_text & (text != '')
+        start = is_text & ~append
+        text[append] = text[append] + ' ' + values[append]
+        text[start] = values[start]
+        
+        if is_url.any():
+            url_cells.append(values)
+            url_masks.append(is_url)
+    
+    keep = text != ''
+    labels = df.index[keep].tolist()
+    
+    if url_masks:
+        masks = np.column_stack(url_masks)[keep]
+        cells = np.column_stack(url_cells)[keep]
+        # Row-major nonzero keeps each row's URLs in column order
+        rows, cols = np.nonzero(masks)
+        boundaries = np.cumsum(masks.sum(axis=1))[:-1]
+        urls = [part.tolist() for part in np.split(cells[rows, cols], boundaries)]
+    else:
+        urls = [[] for _ in labels]
+    
+    return labels, text[keep].tolist(), urls
+
+
+def row_text_and_urls(values: Iterable[Any]) -> Tuple[str, List[str]]:
+    """
+    extract_rows() for one streamed row
+    
+    Cells are formatted as stored (see cell_string()).
+    
+    Args:
+        values: Cell values in column order (None for empty cells)
+        
+    Returns:
+        (row text, row URLs) - the text is '' when the row has none
+    """
+    row_text = []
+    urls = []
+    for value in values:
+        if value is None:
+            continue
+        value_str = str(value).strip()
+        if value_str.startswith('http'):
+            urls.append(value_str)
+        elif value_str:
+            row_text.append(value_str)
+    return ' '.join(row_text), urls
+
 
 class LiveChatCribSheetProcessor:
     """
@@ -15,59 +209,72 @@ class LiveChatCribSheetProcessor:
     Extracts content from multiple sheets for tag refinement
     """
     
-    def __init__(self, excel_file: str):
+    def __init__(self, excel_file: str, streaming: bool = False):
         """
         Initialize processor with Excel file path
         
         Args:
             excel_file: Path to Live chat crib sheet.xlsx
+            streaming: Read rows one at a time (openpyxl read-only) instead of
+                       loading sheets into DataFrames
         """
         self.excel_file = excel_file
-        self.sheets = pd.read_excel(excel_file, sheet_name=None)
+        self.streaming = streaming
+        self.sheets = StreamingWorkbook(excel_file) if streaming else LazyWorkbook(excel_file)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Close the workbook (the streaming reader keeps the file open until then)"""
+        self.sheets.close()
         
-    def extract_sheet_content(self, sheet_name: str) -> List[Dict[str, Any]]:
+    def iter_sheet_content(self, sheet_name: str) -> Iterator[Dict[str, Any]]:
         """
-        Extract structured content from a specific sheet
+        Content items of a sheet, one at a time
         
         Args:
             sheet_name: Name of the sheet to process
             
-        Returns:
-            List of content items with metadata
+        Yields:
+            Content items with metadata
         """
         if sheet_name not in self.sheets:
-            return []
+            return
         
-        df = self.sheets[sheet_name]
-        content_items = []
+        if self.streaming:
+            rows = (
+                (row_index, *row_text_and_urls(row.values()))
+                for row_index, row in self.sheets.rows(sheet_name)
+            )
+        else:
+            # Rows with text (URL cells are collected separately)
+            rows = zip(*extract_rows(self.sheets[sheet_name]))
         
-        # Process each row, extracting text and URLs
-        for idx, row in df.iterrows():
-            # Combine all non-null values in the row
-            row_text = []
-            urls = []
-            
-            for col in df.columns:
-                value = row[col]
-                if pd.notna(value):
-                    value_str = str(value).strip()
-                    if value_str:
-                        # Check if it's a URL
-                        if value_str.startswith('http'):
-                            urls.append(value_str)
-                        else:
-                            row_text.append(value_str)
-            
-            if row_text:  # Only add if there's actual content
-                content_items.append({
+        for row_index, content, urls in rows:
+            if content:
+                yield {
                     'sheet': sheet_name,
-                    'row_index': idx,
-                    'content': ' '.join(row_text),
+                    'row_index': row_index,
+                    'content': content,
                     'urls': urls,
                     'source': 'live_chat_crib_sheet'
-                })
+                }
+    
+    def extract_sheet_content(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """
+        Extract structured content from a specific sheet
         
-        return content_items
+        Args:
+            sheet_name: Name of the sheet to process
+            
+        Returns:
+            List of content items with metadata
+        """
+        return list(self.iter_sheet_content(sheet_name))
     
     def process_all_sheets(self) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -78,7 +285,7 @@ class LiveChatCribSheetProcessor:
         """
         all_content = {}
         
-        for sheet_name in self.sheets.keys():
+        for sheet_name in self.sheets:
             content = self.extract_sheet_content(sheet_name)
             if content:
                 all_content[sheet_name] = content
@@ -92,9 +299,15 @@ class LiveChatCribSheetProcessor:
         Returns:
             List of items formatted for Bedrock tag refinement
         """
-        all_content = self.process_all_sheets()
-        dataset = []
+        return list(self.iter_tagging_dataset())
+    
+    def iter_tagging_dataset(self) -> Iterator[Dict[str, Any]]:
+        """
+        Items for tag refinement, one at a time (sheet by sheet, row by row)
         
+        Yields:
+            Items formatted for Bedrock tag refinement
+        """
         # Map sheet names to categories and personas
         sheet_metadata = {
             'Overview': {
@@ -207,17 +420,17 @@ class LiveChatCribSheetProcessor:
             }
         }
         
-        for sheet_name, items in all_content.items():
+        for sheet_name in self.sheets:
             metadata = sheet_metadata.get(sheet_name, {
                 'category': 'general',
                 'primary_personas': ['persona:patient', 'persona:caregiver'],
                 'resource_type': 'resource:factsheet'
             })
             
-            for item in items:
+            for item in self.iter_sheet_content(sheet_name):
                 # Group related rows into logical chunks
                 if len(item['content']) > 50:  # Only include substantial content
-                    dataset.append({
+                    yield {
                         'title': f"{sheet_name} - Row {item['row_index']}",
                         'description': item['content'][:200] + ('...' if len(item['content']) > 200 else ''),
                         'full_content': item['content'],
@@ -235,9 +448,7 @@ class LiveChatCribSheetProcessor:
                             'locations': metadata.get('locations', []),
                             'resource_type': [metadata.get('resource_type', 'resource:factsheet')]
                         }
-                    })
-        
-        return dataset
+                    }
 
 
 class ContactsProcessor:
@@ -245,88 +456,139 @@ class ContactsProcessor:
     Processes the Encephalitis Orgs, Centres and Country Contacts Excel file
     """
     
-    def __init__(self, excel_file: str):
+    def __init__(self, excel_file: str, streaming: bool = False):
         """
         Initialize processor with Excel file path
         
         Args:
             excel_file: Path to contacts Excel file
+            streaming: Read rows one at a time (openpyxl read-only) instead of
+                       loading sheets into DataFrames
         """
         self.excel_file = excel_file
-        self.sheets = pd.read_excel(excel_file, sheet_name=None)
+        self.streaming = streaming
+        self.sheets = StreamingWorkbook(excel_file) if streaming else LazyWorkbook(excel_file)
     
-    def process_encephalitis_orgs(self) -> List[Dict[str, Any]]:
-        """Process Encephalitis Orgs sheet"""
-        if 'Encephalitis Orgs' not in self.sheets:
-            return []
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Close the workbook (the streaming reader keeps the file open until then)"""
+        self.sheets.close()
+    
+    def _named_rows(self, sheet_name: str, fields: List[Tuple[str, str]]) -> Iterator[Tuple[str, ...]]:
+        """
+        String values of the given columns for every row that has a Name
         
-        df = self.sheets['Encephalitis Orgs']
-        orgs = []
+        Args:
+            sheet_name: Sheet to read
+            fields: (column, value for empty cells) pairs
+            
+        Yields:
+            One tuple of strings per row, in field order
+        """
+        if sheet_name not in self.sheets:
+            return
         
-        for idx, row in df.iterrows():
-            if pd.notna(row.get('Name')):
-                org = {
-                    'name': str(row.get('Name', '')),
-                    'country': str(row.get('Areas of operation', '')),
-                    'type': str(row.get('Type of organisation', '')),
-                    'services': str(row.get('What is offered', '')),
-                    'website': str(row.get('website', '')) if pd.notna(row.get('website')) else '',
-                    'email': str(row.get('Generic Email', '')) if pd.notna(row.get('Generic Email')) else '',
-                    'social_media': {
-                        'facebook': str(row.get('Facebook', '')) if pd.notna(row.get('Facebook')) else '',
-                        'twitter': str(row.get('Twitter/X', '')) if pd.notna(row.get('Twitter/X')) else '',
-                        'instagram': str(row.get('Instagram', '')) if pd.notna(row.get('Instagram')) else ''
-                    },
-                    'source': 'encephalitis_orgs'
-                }
-                orgs.append(org)
+        if self.streaming:
+            for _, row in self.sheets.rows(sheet_name):
+                if row.get('Name') is not None:
+                    yield tuple(cell_string(row, column, na) for column, na in fields)
+            return
         
-        return orgs
+        df = self.sheets[sheet_name]
+        if 'Name' not in df.columns:
+            return
+        df = df[df['Name'].notna()]
+        yield from zip(*(column_strings(df, column, na) for column, na in fields))
     
-    def process_country_contacts(self) -> List[Dict[str, Any]]:
-        """Process Country Contacts sheet"""
-        if 'Country Contacts' not in self.sheets:
-            return []
+    def iter_encephalitis_orgs(self) -> Iterator[Dict[str, Any]]:
+        """Encephalitis Orgs sheet rows, one at a time"""
+        # Empty country/type/services cells read 'nan' (kept so titles and tags stay stable)
+        columns = self._named_rows('Encephalitis Orgs', [
+            ('Name', ''),
+            ('Areas of operation', 'nan'),
+            ('Type of organisation', 'nan'),
+            ('What is offered', 'nan'),
+            ('website', ''),
+            ('Generic Email', ''),
+            ('Facebook', ''),
+            ('Twitter/X', ''),
+            ('Instagram', '')
+        ])
         
-        df = self.sheets['Country Contacts']
-        contacts = []
+        for name, country, org_type, services, website, email, facebook, twitter, instagram in columns:
+            yield {
+                'name': name,
+                'country': country,
+                'type': org_type,
+                'services': services,
+                'website': website,
+                'email': email,
+                'social_media': {
+                    'facebook': facebook,
+                    'twitter': twitter,
+                    'instagram': instagram
+                },
+                'source': 'encephalitis_orgs'
+            }
+    
+    def process_encephalitis_orgs(self) -> List[Dict[str, Any]]:
+        """Process Encephalitis Orgs sheet"""
+        return list(self.iter_encephalitis_orgs())
+    
+    def iter_country_contacts(self) -> Iterator[Dict[str, Any]]:
+        """Country Contacts sheet rows, one at a time"""
+        columns = self._named_rows('Country Contacts', [
+            ('Name', ''),
+            ('Country', 'nan'),
+            ('Position', ''),
+            ('Adult or paediatric', ''),
+            ('Institution', ''),
+            ('Email', ''),
+            ('Notes', '')
+        ])
         
-        for idx, row in df.iterrows():
-            if pd.notna(row.get('Name')):
-                contact = {
-                    'name': str(row.get('Name', '')),
-                    'country': str(row.get('Country', '')),
-                    'position': str(row.get('Position', '')) if pd.notna(row.get('Position')) else '',
-                    'specialty': str(row.get('Adult or paediatric', '')) if pd.notna(row.get('Adult or paediatric')) else '',
-                    'institution': str(row.get('Institution', '')) if pd.notna(row.get('Institution')) else '',
-                    'email': str(row.get('Email', '')) if pd.notna(row.get('Email')) else '',
-                    'notes': str(row.get('Notes', '')) if pd.notna(row.get('Notes')) else '',
-                    'source': 'country_contacts'
-                }
-                contacts.append(contact)
+        for name, country, position, specialty, institution, email, notes in columns:
+            yield {
+                'name': name,
+                'country': country,
+                'position': position,
+                'specialty': specialty,
+                'institution': institution,
+                'email': email,
+                'notes': notes,
+                'source': 'country_contacts'
+            }
+    
+    def process_country_contacts(self) -> List[Dict[str, Any]]:
+        """Process Country Contacts sheet"""
+        return list(self.iter_country_contacts())
+    
+    def iter_encephalitis_centres(self) -> Iterator[Dict[str, Any]]:
+        """Encephalitis Centres sheet rows, one at a time"""
+        columns = self._named_rows('Encephalitis Centres', [
+            ('Name', ''),
+            ('Country', ''),
+            ('Link', ''),
+            ('Notes', '')
+        ])
         
-        return contacts
+        for name, country, website, notes in columns:
+            yield {
+                'name': name,
+                'country': country,
+                'website': website,
+                'notes': notes,
+                'source': 'encephalitis_centres'
+            }
     
     def process_encephalitis_centres(self) -> List[Dict[str, Any]]:
         """Process Encephalitis Centres sheet"""
-        if 'Encephalitis Centres' not in self.sheets:
-            return []
-        
-        df = self.sheets['Encephalitis Centres']
-        centres = []
-        
-        for idx, row in df.iterrows():
-            if pd.notna(row.get('Name')):
-                centre = {
-                    'name': str(row.get('Name', '')),
-                    'country': str(row.get('Country', '')) if pd.notna(row.get('Country')) else '',
-                    'website': str(row.get('Link', '')) if pd.notna(row.get('Link')) else '',
-                    'notes': str(row.get('Notes', '')) if pd.notna(row.get('Notes')) else '',
-                    'source': 'encephalitis_centres'
-                }
-                centres.append(centre)
-        
-        return centres
+        return list(self.iter_encephalitis_centres())
     
     def create_tagging_dataset(self) -> List[Dict[str, Any]]:
         """
@@ -335,12 +597,20 @@ class ContactsProcessor:
         Returns:
             List of items formatted for Bedrock tag refinement
         """
-        dataset = []
+        return list(self.iter_tagging_dataset())
+    
+    def iter_tagging_dataset(self) -> Iterator[Dict[str, Any]]:
+        """
+        Items for tag refinement, one at a time (sheet by sheet, row by row)
+        
+        A sheet is only read once the previous sheet's items are used up.
         
+        Yields:
+            Items formatted for Bedrock tag refinement
+        """
         # Process organizations
-        orgs = self.process_encephalitis_orgs()
-        for org in orgs:
-            dataset.append({
+        for org in self.iter_encephalitis_orgs():
+            yield {
                 'title': f"{org['name']} - {org['country']}",
                 'description': f"{org['type']} organization offering {org['services']}",
                 'full_content': f"Organization: {org['name']}\nCountry: {org['country']}\nType: {org['type']}\nServices: {org['services']}\nWebsite: {org['website']}",
@@ -357,12 +627,11 @@ class ContactsProcessor:
                     'locations': [f"location:{org['country'].lower().replace(' ', '_')}"] if org['country'] else ['location:worldwide'],
                     'topics': ['topic:support_services', 'topic:international']
                 }
-            })
+            }
         
         # Process centres
-        centres = self.process_encephalitis_centres()
-        for centre in centres:
-            dataset.append({
+        for centre in self.iter_encephalitis_centres():
+            yield {
                 'title': f"{centre['name']} - {centre['country']}",
                 'description': f"Encephalitis treatment centre in {centre['country']}",
                 'full_content': f"Centre: {centre['name']}\nCountry: {centre['country']}\nWebsite: {centre['website']}\nNotes: {centre['notes']}",
@@ -380,12 +649,11 @@ class ContactsProcessor:
                     'topics': ['topic:treatment', 'topic:diagnosis'],
                     'stages': ['stage:acute_hospital', 'stage:early_recovery']
                 }
-            })
+            }
         
         # Process country contacts
-        contacts = self.process_country_contacts()
-        for contact in contacts:
-            dataset.append({
+        for contact in self.iter_country_contacts():
+            yield {
                 'title': f"{contact['position']} - {contact['institution']} ({contact['country']})",
                 'description': f"{contact['position']} at {contact['institution']} specializing in {contact['specialty']}",
                 'full_content': f"Contact: {contact['name']}\nPosition: {contact['position']}\nInstitution: {contact['institution']}\nCountry: {contact['country']}\nSpecialty: {contact['specialty']}\nNotes: {contact['notes']}",
@@ -402,9 +670,7 @@ class ContactsProcessor:
                     'locations': [f"location:{contact['country'].lower().replace(' ', '_')}"],
                     'topics': ['topic:professional_network', 'topic:clinical']
                 }
-            })
-        
-        return dataset
+            }
 
 
 def process_all_excel_files(
@@ -424,14 +690,14 @@ def process_all_excel_files(
     
     # Process crib sheet
     print("\n1. Processing Live Chat Crib Sheet...")
-    crib_processor = LiveChatCribSheetProcessor(crib_sheet_file)
-    crib_dataset = crib_processor.create_tagging_dataset()
+    with LiveChatCribSheetProcessor(crib_sheet_file) as crib_processor:
+        crib_dataset = crib_processor.create_tagging_dataset()
     print(f"   ✓ Extracted {len(crib_dataset)} items from crib sheet")
     
     # Process contacts
     print("\n2. Processing Contacts file...")
-    contacts_processor = ContactsProcessor(contacts_file)
-    contacts_dataset = contacts_processor.create_tagging_dataset()
+    with ContactsProcessor(contacts_file) as contacts_processor:
+        contacts_dataset = contacts_processor.create_tagging_dataset()
     print(f"   ✓ Extracted {len(contacts_dataset)} items from contacts")
     
     # Combine datasets
@@ -0,0 +1,169 @@
+"""
+Streaming Excel Reader
+Reads staff workbooks one row at a time with openpyxl's read-only mode, so
+memory use depends on the size of a row rather than of the workbook
+
+FEATURES:
+- Row dicts ({column: value}) yielded lazily from ws.iter_rows(values_only=True)
+- Column names and row numbers as pd.read_excel gives them (blank headers
+  become 'Unnamed: N', repeated ones 'Name.1'; rows counted from 0 below the
+  header), so streamed and pandas-read sheets line up
+- Empty cells are None; fully blank rows are skipped
+- Streaming writer (openpyxl write-only mode) for row-by-row transforms such
+  as anonymisation
+
+USAGE:
+    with StreamingWorkbook('Live chat crib sheet.xlsx') as workbook:
+        for sheet_name in workbook:
+            for row_index, row in workbook.rows(sheet_name):
+                print(row_index, row.get('Name'))
+
+    with StreamingWorkbook(input_file) as source, StreamingWriter(output_file) as target:
+        for sheet_name in source:
+            target.add_sheet(sheet_name, source.columns(sheet_name))
+            for _, row in source.rows(sheet_name):
+                target.write_row(row)
+
+NOTE: cell values are returned as stored, so a whole number reads 1 where
+pandas (which turns numeric columns with blanks into floats) gives 1.0
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from openpyxl import Workbook, load_workbook
+except ImportError:
+    Workbook = None
+    load_workbook = None
+
+
+def column_names(header: Tuple[Any, ...]) -> List[str]:
+    """
+    Column names for a header row, following pd.read_excel's conventions
+
+    Args:
+        header: Header row values
+
+    Returns:
+        One name per column ('Unnamed: N' for blanks, '.1', '.2'... suffixes
+        for repeats)
+    """
+    names = []
+    seen: Dict[Any, int] = {}
+    for position, value in enumerate(header):
+        name = f"Unnamed: {position}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class StreamingWorkbook:
+    """
+    Read-only workbook whose sheets are read row by row
+    """
+
+    def __init__(self, excel_file: str):
+        """
+        Open the workbook (no sheet is read yet)
+
+        Args:
+            excel_file: Path to an .xlsx file
+        """
+        if load_workbook is None:
+            raise ImportError("openpyxl is required for streaming Excel reads (pip install openpyxl)")
+        self.excel_file = excel_file
+        self._workbook = load_workbook(excel_file, read_only=True, data_only=True)
+        self.sheet_names: List[str] = list(self._workbook.sheetnames)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sheet_names)
+
+    def __contains__(self, sheet_name: object) -> bool:
+        return sheet_name in self.sheet_names
+
+    def __enter__(self) -> 'StreamingWorkbook':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def columns(self, sheet_name: str) -> List[str]:
+        """Column names of a sheet (empty for a blank sheet)"""
+        for header in self._workbook[sheet_name].iter_rows(values_only=True, max_row=1):
+            return column_names(header)
+        return []
+
+    def rows(self, sheet_name: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Rows of a sheet below its header
+
+        Args:
+            sheet_name: Sheet to read
+
+        Yields:
+            (row_index, {column: value}) for every row with at least one value;
+            row_index counts data rows from 0 like a pandas index
+        """
+        values = self._workbook[sheet_name].iter_rows(values_only=True)
+        header = next(values, None)
+        if header is None:
+            return
+        names = column_names(header)
+
+        for row_index, row in enumerate(values):
+            if all(value is None for value in row):
+                continue
+            # Read-only rows can be shorter or longer than the header
+            if len(row) > len(names):
+                names = names + column_names((None,) * len(row))[len(names):]
+            yield row_index, {name: (row[i] if i < len(row) else None) for i, name in enumerate(names)}
+
+    def close(self):
+        """Release the workbook file"""
+        self._workbook.close()
+
+
+class StreamingWriter:
+    """
+    Write-only workbook filled one row at a time
+    """
+
+    def __init__(self, excel_file: str):
+        """
+        Args:
+            excel_file: Output .xlsx path (written on close)
+        """
+        if Workbook is None:
+            raise ImportError("openpyxl is required for streaming Excel writes (pip install openpyxl)")
+        self.excel_file = excel_file
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._columns: List[str] = []
+        self.rows_written = 0
+
+    def __enter__(self) -> 'StreamingWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+
+    def add_sheet(self, sheet_name: str, columns: List[str]):
+        """Start a sheet and write its header row"""
+        self._sheet = self._workbook.create_sheet(sheet_name)
+        self._columns = list(columns)
+        if self._columns:
+            self._sheet.append(self._columns)
+
+    def write_row(self, row: Dict[str, Any]):
+        """Append a row dict to the current sheet (in header column order)"""
+        self._sheet.append([row.get(column) for column in self._columns])
+        self.rows_written += 1
+
+    def close(self, path: Optional[str] = None):
+        """Save the workbook"""
+        self._workbook.save(path or self.excel_file)
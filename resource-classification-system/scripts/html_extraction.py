@@ -0,0 +1,233 @@
+"""
+HTML Content Extraction
+Pluggable page extractors for the live scraper: title, description and main text
+
+All engines implement the same rules, so they produce the same output:
+- script/style/nav/footer/header elements (and comments) are dropped
+- title: <title> text, or the last URL segment
+- content: text of <main>, else <article>, else <body> - text nodes joined
+  with single spaces; longer than 50,000 characters, its most informative
+  sections are kept (scripts/content_chunker.py)
+- description: <meta name="description">, else the first <p>, else the
+  start of the content (500 characters)
+- the page bytes are decoded the way BeautifulSoup does it (BOM, then the
+  declared <meta> charset, then detection) before lxml or selectolax see
+  them; neither guesses the same way on its own (lxml falls back to
+  Latin-1, selectolax assumes UTF-8)
+
+ENGINES:
+- selectolax: Lexbor-based, fastest (pip install selectolax)
+- lxml: libxml2-based, one strip pass + XPath (pip install lxml)
+- bs4: BeautifulSoup with the pure-Python html.parser (reference, always available)
+
+USAGE:
+    extract = get_extractor()            # best installed engine
+    fields = extract(html_bytes, url)    # {'title', 'description', 'content'}
+
+    extract = get_extractor('bs4')       # a specific engine
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from scripts.content_chunker import select_content
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup, UnicodeDammit
+except ImportError:
+    BeautifulSoup = None
+    UnicodeDammit = None
+
+
+# Elements removed before any text is read
+BOILERPLATE_TAGS = ('script', 'style', 'nav', 'footer', 'header')
+
+# Limit length for API (match Lambda scraper limit)
+MAX_CONTENT_CHARS = 50000
+MAX_DESCRIPTION_CHARS = 500
+
+_WHITESPACE = re.compile(r'\s+')
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def decode_html(html: bytes) -> str:
+    """
+    Decode page bytes to text
+
+    Uses BeautifulSoup's UnicodeDammit (BOM, declared charset, then
+    detection), so every engine reads the same characters as the bs4
+    reference. Without bs4: the <meta> charset, else UTF-8.
+    """
+    if isinstance(html, str):
+        text = html
+    elif UnicodeDammit is not None:
+        text = UnicodeDammit(html, is_html=True).unicode_markup
+        if text is None:
+            text = html.decode('utf-8', errors='replace')
+    else:
+        match = _META_CHARSET.search(html[:4096])
+        try:
+            text = html.decode(match.group(1).decode('ascii') if match else 'utf-8', errors='replace')
+        except LookupError:
+            text = html.decode('utf-8', errors='replace')
+    # lxml rejects text that still carries an XML encoding declaration
+    return _XML_DECLARATION.sub('', text.lstrip('\ufeff'), count=1)
+
+
+def _fields(url: str, title: Optional[str], content: str, has_main: bool,
+            meta_description: Optional[str], first_paragraph: Optional[str]) -> Dict[str, str]:
+    """Apply the shared output rules to what an engine found"""
+    title = title.strip() if title is not None else url.split('/')[-1]
+
+    if len(content) > MAX_CONTENT_CHARS:
+        # Keep the most informative sections rather than the first 50,000 characters
+        content = select_content(content, MAX_CONTENT_CHARS // 4, title=title)[:MAX_CONTENT_CHARS]
+        if has_main:
+            content += "..."
+
+    description = meta_description or ''
+    if not description:
+        # Use first paragraph as description
+        if first_paragraph is not None:
+            description = first_paragraph.strip()[:MAX_DESCRIPTION_CHARS]
+        else:
+            description = content[:MAX_DESCRIPTION_CHARS]
+
+    return {'title': title, 'description': description, 'content': content}
+
+
+def _join_text(strings) -> str:
+    """Text nodes joined with single spaces (BeautifulSoup get_text(' ', strip=True) + collapse)"""
+    return _WHITESPACE.sub(' ', ' '.join(strings)).strip()
+
+
+def extract_with_bs4(html: bytes, url: str) -> Dict[str, str]:
+    """Reference extractor: BeautifulSoup with html.parser"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove script and style elements
+    for element in soup(list(BOILERPLATE_TAGS)):
+        element.decompose()
+
+    title = soup.find('title')
+    main_content = soup.find('main') or soup.find('article') or soup.find('body')
+    root = main_content if main_content else soup
+    content = _join_text(root.get_text(separator=' ', strip=True).split())
+
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    first_p = soup.find('p')
+
+    return _fields(
+        url,
+        title.get_text() if title else None,
+        content,
+        main_content is not None,
+        meta_desc.get('content', '') if meta_desc else None,
+        first_p.get_text() if first_p else None
+    )
+
+
+def extract_with_lxml(html: bytes, url: str) -> Dict[str, str]:
+    """Fast extractor: lxml parse, one strip pass, XPath lookups"""
+    tree = lxml.html.document_fromstring(decode_html(html))
+    etree.strip_elements(tree, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+
+    titles = tree.xpath('//title')
+    main_content = None
+    for tag in ('main', 'article', 'body'):
+        found = tree.xpath(f'//{tag}')
+        if found:
+            main_content = found[0]
+            break
+    root = main_content if main_content is not None else tree
+
+    meta = tree.xpath('//meta[@name="description"]/@content')
+    paragraphs = tree.xpath('//p')
+
+    return _fields(
+        url,
+        ''.join(titles[0].itertext()) if titles else None,
+        _join_text(root.itertext()),
+        main_content is not None,
+        meta[0] if meta else None,
+        ''.join(paragraphs[0].itertext()) if paragraphs else None
+    )
+
+
+def extract_with_selectolax(html: bytes, url: str) -> Dict[str, str]:
+    """Fastest extractor: selectolax (Lexbor) parse, one strip pass, CSS lookups"""
+    tree = SelectolaxParser(decode_html(html))
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+
+    title = tree.css_first('title')
+    main_content = tree.css_first('main') or tree.css_first('article') or tree.body
+    root = main_content if main_content is not None else tree.root
+
+    meta = tree.css_first('meta[name="description"]')
+    first_p = tree.css_first('p')
+
+    return _fields(
+        url,
+        title.text() if title is not None else None,
+        _join_text(root.text(separator=' ', strip=True).split()) if root is not None else '',
+        main_content is not None,
+        (meta.attributes.get('content') or '') if meta is not None else None,
+        first_p.text() if first_p is not None else None
+    )
+
+
+EXTRACTORS: Dict[str, Callable[[bytes, str], Dict[str, str]]] = {
+    'selectolax': extract_with_selectolax,
+    'lxml': extract_with_lxml,
+    'bs4': extract_with_bs4,
+}
+
+_AVAILABLE = {
+    'selectolax': SelectolaxParser is not None,
+    'lxml': lxml is not None,
+    'bs4': BeautifulSoup is not None,
+}
+
+
+def available_engines() -> List[str]:
+    """Installed engines, fastest first"""
+    return [name for name in EXTRACTORS if _AVAILABLE[name]]
+
+
+def resolve_engine(engine: str = 'auto') -> str:
+    """
+    Pick an engine name
+
+    Args:
+        engine: Engine name, or 'auto' for the fastest installed one
+
+    Raises:
+        ValueError: If the engine is unknown or not installed
+    """
+    if engine == 'auto':
+        engines = available_engines()
+        if not engines:
+            raise ValueError("No HTML parser installed (install selectolax, lxml or beautifulsoup4)")
+        return engines[0]
+    if engine not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extraction engine '{engine}' (choose from {', '.join(EXTRACTORS)})")
+    if not _AVAILABLE[engine]:
+        raise ValueError(f"HTML extraction engine '{engine}' is not installed")
+    return engine
+
+
+def get_extractor(engine: str = 'auto') -> Callable[[bytes, str], Dict[str, Any]]:
+    """Extractor function (html, url) -> {'title', 'description', 'content'}"""
+    return EXTRACTORS[resolve_engine(engine)]
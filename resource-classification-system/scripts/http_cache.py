@@ -0,0 +1,171 @@
+"""
+Conditional HTTP Page Cache
+On-disk cache of scraped pages with their HTTP validators, so re-runs only
+download and parse pages that actually changed
+
+FEATURES:
+- SQLite file (stdlib only, WAL mode), safe to share between crawler threads
+- Stores ETag, Last-Modified, a SHA-256 of the response body and the parsed page
+- Conditional request headers (If-None-Match / If-Modified-Since)
+- 304 Not Modified, or a 200 whose body hashes the same, reuses the parsed page
+  without re-parsing - the page dict is identical to the previous run's, so the
+  classification store reuses its classification too
+- Parsed pages are tied to an extraction version: changing the extractor
+  invalidates them (validators are ignored for stale entries)
+
+USAGE:
+    cache = HttpCache('temp/http_cache.db', extraction_version='1')
+    entry = cache.get(url)
+    response = session.get(url, headers=cache.conditional_headers(entry))
+    if response.status_code == 304 and entry:
+        page = entry['page']
+    else:
+        page = parse(response)
+        cache.put(url, response, page)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT NOT NULL,
+    extraction_version TEXT NOT NULL,
+    page TEXT,
+    fetched_at TEXT NOT NULL,
+    checked_at TEXT NOT NULL
+);
+"""
+
+
+def body_hash(content: bytes) -> str:
+    """Hex SHA-256 of a response body"""
+    return hashlib.sha256(content or b'').hexdigest()
+
+
+class HttpCache:
+    """
+    SQLite-backed cache of HTTP validators and parsed pages, keyed by URL
+    """
+
+    def __init__(self, db_path: str = 'temp/http_cache.db', extraction_version: str = '1'):
+        """
+        Open (or create) the cache
+
+        Args:
+            db_path: SQLite database file
+            extraction_version: Version of the page extractor; entries parsed by
+                                another version are treated as missing
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.extraction_version = extraction_version
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached page
+
+        Returns:
+            Dict with etag, last_modified, body_hash and page (None if the page
+            was not scrapeable), or None if not cached for this extraction version
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_hash, page FROM pages WHERE url = ? AND extraction_version = ?",
+                (url, self.extraction_version)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'body_hash': row[2],
+            'page': json.loads(row[3]) if row[3] else None
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, response, page: Optional[Dict[str, Any]], content_hash: Optional[str] = None):
+        """
+        Store a freshly parsed page with the response's validators
+
+        Args:
+            url: Page URL
+            response: requests.Response the page was parsed from
+            page: Parsed page dict
+            content_hash: body_hash of the response (computed if not given)
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 content_hash or body_hash(response.content), self.extraction_version,
+                 json.dumps(page, ensure_ascii=False) if page else None, now, now)
+            )
+
+    def touch(self, url: str, response=None):
+        """
+        Mark a cached page as re-validated
+
+        Refreshes the validators when the server sent new ones (a 200 with an
+        identical body usually carries a new Date/ETag).
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            if response is not None and response.status_code != 304:
+                self._conn.execute(
+                    "UPDATE pages SET etag = ?, last_modified = ?, checked_at = ? WHERE url = ?",
+                    (response.headers.get('ETag'), response.headers.get('Last-Modified'), now, url)
+                )
+            else:
+                self._conn.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (now, url))
+
+    def count(self, outcome: str):
+        """Count a fetch outcome: not_modified, unchanged, changed or new"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def summary(self) -> str:
+        """One-line cache summary for pipeline reports"""
+        reused = self.stats['not_modified'] + self.stats['unchanged']
+        return (f"HTTP cache: {reused} pages unchanged ({self.stats['not_modified']} × 304, "
+                f"{self.stats['unchanged']} same body), {self.stats['changed']} changed, "
+                f"{self.stats['new']} new")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
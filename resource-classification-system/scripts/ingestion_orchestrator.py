@@ -0,0 +1,389 @@
+"""
+Knowledge Base Ingestion Orchestrator
+Starts Bedrock Knowledge Base ingestion jobs without blocking and notices
+their completion within a second or two instead of on a fixed 30-second poll
+
+FEATURES:
+- Non-blocking start: returns an IngestionJob handle (status, wait, result,
+  done callbacks)
+- Adaptive polling: a job is checked after 1s, then 1.5s, 2.25s... up to 30s,
+  so small ingestions finish fast and long ones cost few API calls
+- One monitor thread for all active jobs; several data sources ingest in
+  parallel (Bedrock runs one job per data source at a time)
+- Event-driven completion: notify(job_id) (e.g. from an EventBridge/SQS
+  consumer or a Lambda) triggers an immediate status check; an optional SQS
+  queue can be long-polled for such notifications
+- Notifications are only hints - the status always comes from get_ingestion_job;
+  only messages about this orchestrator's jobs are removed from the queue
+- A job whose status cannot be read several times in a row (other than
+  throttling) is given up on: it finishes with status CHECK_FAILED and the
+  error, so waiters never hang
+
+USAGE:
+    orchestrator = IngestionOrchestrator(bedrock_agent_client)
+
+    job = orchestrator.start(kb_id, data_source_id)          # returns immediately
+    job.add_done_callback(lambda job: print(job.status))
+    ...
+    job.wait()                                               # or job.result(timeout=600)
+
+    jobs = orchestrator.start_many(kb_id, [data_source_a, data_source_b])
+    orchestrator.wait_all(jobs)
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from scripts.bedrock_executor import is_throttling_error
+
+
+TERMINAL_STATUSES = {'COMPLETE', 'FAILED', 'STOPPED'}
+
+# Local status of a job given up on after repeated status check errors
+CHECK_FAILED = 'CHECK_FAILED'
+
+
+class IngestionJob:
+    """
+    Handle of one running ingestion job (updated by the orchestrator's monitor)
+    """
+
+    def __init__(self, orchestrator: 'IngestionOrchestrator', kb_id: str, data_source_id: str,
+                 job_id: str, status: str):
+        self.orchestrator = orchestrator
+        self.kb_id = kb_id
+        self.data_source_id = data_source_id
+        self.job_id = job_id
+        self.status = status
+        self.statistics: Dict[str, Any] = {}
+        self.failure_reasons: List[str] = []
+        self.error: Optional[Exception] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.checks = 0
+        self.check_failures = 0
+
+        self._done = threading.Event()
+        self._callbacks: List[Callable[['IngestionJob'], None]] = []
+        self._lock = threading.Lock()
+
+    def done(self) -> bool:
+        """True once the job has finished (complete, failed, stopped or CHECK_FAILED)"""
+        return self._done.is_set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 'COMPLETE'
+
+    @property
+    def seconds(self) -> float:
+        """Run time so far (or total, once finished)"""
+        return (self.finished_at or time.time()) - self.started_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job finishes
+
+        Also returns once the orchestrator has given up checking the job
+        (status CHECK_FAILED, see error).
+
+        Returns:
+            True if it finished within the timeout
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for the job and return its summary
+
+        Raises:
+            TimeoutError: If the job is still running after the timeout
+            RuntimeError: If its status could not be checked (from error)
+        """
+        if not self.wait(timeout):
+            raise TimeoutError(f"Ingestion job {self.job_id} still {self.status} after {timeout}s")
+        if self.error is not None:
+            raise RuntimeError(f"Could not check ingestion job {self.job_id}: {self.error}") from self.error
+        return self.summary()
+
+    def add_done_callback(self, callback: Callable[['IngestionJob'], None]):
+        """Call callback(job) when the job finishes (immediately if it already has)"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self):
+        with self._lock:
+            self.finished_at = time.time()
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"   ⚠️  Ingestion callback failed for job {self.job_id}: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Job state as a plain dict"""
+        return {
+            'knowledge_base_id': self.kb_id,
+            'data_source_id': self.data_source_id,
+            'job_id': self.job_id,
+            'status': self.status,
+            'statistics': self.statistics,
+            'failure_reasons': self.failure_reasons,
+            'error': str(self.error) if self.error is not None else None,
+            'seconds': round(self.seconds, 1),
+            'status_checks': self.checks
+        }
+
+
+class IngestionOrchestrator:
+    """
+    Starts ingestion jobs and tracks them on one adaptive-polling monitor thread
+    """
+
+    def __init__(
+        self,
+        bedrock_agent,
+        initial_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        on_status: Optional[Callable[[IngestionJob], None]] = None,
+        sqs_client=None,
+        events_queue_url: Optional[str] = None,
+        max_check_failures: int = 5
+    ):
+        """
+        Initialize orchestrator
+
+        Args:
+            bedrock_agent: boto3 'bedrock-agent' client
+            initial_interval: Seconds before a new job's first status check
+            max_interval: Longest wait between status checks
+            backoff: Factor the interval grows by after each check
+            on_status: Called with the job whenever its status changes
+            sqs_client: boto3 'sqs' client (needed for events_queue_url)
+            events_queue_url: SQS queue receiving ingestion job state-change
+                              events (e.g. from an EventBridge rule); each
+                              message naming a job triggers a status check
+            max_check_failures: Consecutive failed status checks (other than
+                                throttling) before a job is given up on
+        """
+        self.bedrock_agent = bedrock_agent
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.on_status = on_status
+        self.max_check_failures = max(1, int(max_check_failures))
+
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._due: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._wake = threading.Condition()
+        self._monitor: Optional[threading.Thread] = None
+        self._listener: Optional[threading.Thread] = None
+
+        self.sqs = sqs_client
+        self.events_queue_url = events_queue_url
+        self.stats = {'started': 0, 'status_checks': 0, 'notifications': 0, 'throttled': 0, 'check_errors': 0}
+
+    def start(self, kb_id: str, data_source_id: str,
+              description: str = 'Ingest classified Encephalitis resources') -> IngestionJob:
+        """
+        Start an ingestion job and return without waiting for it
+
+        Returns:
+            IngestionJob handle
+        """
+        response = self.bedrock_agent.start_ingestion_job(
+            knowledgeBaseId=kb_id,
+            dataSourceId=data_source_id,
+            description=description
+        )
+        ingestion = response['ingestionJob']
+        job = IngestionJob(self, kb_id, data_source_id, ingestion['ingestionJobId'], ingestion['status'])
+
+        with self._wake:
+            self._jobs[job.job_id] = job
+            self._intervals[job.job_id] = self.initial_interval
+            self._due[job.job_id] = time.time() + self.initial_interval
+            self.stats['started'] += 1
+            self._wake.notify_all()
+            self._ensure_threads()
+        return job
+
+    def start_many(self, kb_id: str, data_source_ids: Iterable[str],
+                   description: str = 'Ingest classified Encephalitis resources') -> List[IngestionJob]:
+        """Start one job per data source; they run in parallel"""
+        return [self.start(kb_id, data_source_id, description) for data_source_id in data_source_ids]
+
+    def notify(self, job_id: str):
+        """
+        Completion hint from an event source: check the job's status now
+
+        Unknown job ids are ignored.
+        """
+        with self._wake:
+            if job_id in self._due:
+                self._due[job_id] = time.time()
+                self.stats['notifications'] += 1
+                self._wake.notify_all()
+
+    def wait_all(self, jobs: Iterable[IngestionJob], timeout: Optional[float] = None) -> bool:
+        """
+        Wait for several jobs
+
+        Returns:
+            True if all finished within the timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        for job in jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def active_jobs(self) -> List[IngestionJob]:
+        with self._wake:
+            return [self._jobs[job_id] for job_id in self._due]
+
+    def _ensure_threads(self):
+        """Start the monitor (and event listener) if not running - call holding _wake"""
+        # The threads clear their attribute under _wake when they exit, so a
+        # thread that is just finishing is never mistaken for a running one
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._run_monitor, name='ingestion-monitor', daemon=True)
+            self._monitor.start()
+        if self.events_queue_url and self.sqs is not None and (self._listener is None or not self._listener.is_alive()):
+            self._listener = threading.Thread(target=self._run_listener, name='ingestion-events', daemon=True)
+            self._listener.start()
+
+    def _run_monitor(self):
+        """Check each active job when it is due; sleep until the next one is"""
+        while True:
+            with self._wake:
+                if not self._due:
+                    self._monitor = None
+                    return
+                job_id, due = min(self._due.items(), key=lambda item: item[1])
+                wait = due - time.time()
+                if wait > 0:
+                    self._wake.wait(wait)
+                    continue
+                job = self._jobs[job_id]
+                interval = self._intervals[job_id]
+
+            self._check(job)
+
+            with self._wake:
+                if job.done():
+                    self._due.pop(job_id, None)
+                    self._intervals.pop(job_id, None)
+                else:
+                    self._intervals[job_id] = min(self.max_interval, interval * self.backoff)
+                    self._due[job_id] = time.time() + self._intervals[job_id]
+
+    def _check(self, job: IngestionJob):
+        """
+        Refresh a job's status
+
+        Throttling just delays the next check; after max_check_failures other
+        errors in a row the job finishes with status CHECK_FAILED.
+        """
+        try:
+            response = self.bedrock_agent.get_ingestion_job(
+                knowledgeBaseId=job.kb_id,
+                dataSourceId=job.data_source_id,
+                ingestionJobId=job.job_id
+            )
+        except Exception as e:
+            if is_throttling_error(e):
+                self.stats['throttled'] += 1
+                return
+            self.stats['check_errors'] += 1
+            job.check_failures += 1
+            print(f"   ⚠️  Could not check ingestion job {job.job_id} "
+                  f"({job.check_failures}/{self.max_check_failures}): {e}")
+            if job.check_failures >= self.max_check_failures:
+                job.error = e
+                job.status = CHECK_FAILED
+                if self.on_status:
+                    try:
+                        self.on_status(job)
+                    except Exception as callback_error:
+                        print(f"   ⚠️  Status callback failed for job {job.job_id}: {callback_error}")
+                job._finish()
+            return
+
+        ingestion = response['ingestionJob']
+        job.check_failures = 0
+        job.checks += 1
+        self.stats['status_checks'] += 1
+        changed = ingestion['status'] != job.status
+        job.status = ingestion['status']
+        job.statistics = ingestion.get('statistics', {})
+        job.failure_reasons = ingestion.get('failureReasons', [])
+
+        if changed and self.on_status:
+            try:
+                self.on_status(job)
+            except Exception as e:
+                print(f"   ⚠️  Status callback failed for job {job.job_id}: {e}")
+        if job.status in TERMINAL_STATUSES:
+            job._finish()
+
+    def _run_listener(self):
+        """Long-poll the events queue while jobs are active"""
+        while True:
+            with self._wake:
+                if not self._due:
+                    self._listener = None
+                    return
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.events_queue_url,
+                    MaxNumberOfMessages=10,
+                    WaitTimeSeconds=20
+                )
+            except Exception as e:
+                print(f"   ⚠️  Could not read ingestion events ({e}) - relying on polling")
+                return
+
+            for message in response.get('Messages', []):
+                job_ids = self._job_ids_in(message.get('Body', ''))
+                for job_id in job_ids:
+                    self.notify(job_id)
+                # Events about other jobs stay on the queue for whoever owns them
+                # (they become visible again after the visibility timeout)
+                if not job_ids:
+                    continue
+                try:
+                    self.sqs.delete_message(QueueUrl=self.events_queue_url, ReceiptHandle=message['ReceiptHandle'])
+                except Exception as e:
+                    print(f"   ⚠️  Could not delete ingestion event {message.get('MessageId', '')}: {e}")
+
+    def _job_ids_in(self, body: str) -> List[str]:
+        """Active job ids mentioned in an event message (any JSON shape)"""
+        try:
+            text = json.dumps(json.loads(body))
+        except (TypeError, ValueError):
+            text = body
+        with self._wake:
+            return [job_id for job_id in self._due if job_id in text]
+
+    def summary(self) -> str:
+        """One-line orchestrator summary"""
+        return (f"Ingestion: {self.stats['started']} jobs, {self.stats['status_checks']} status checks, "
+                f"{self.stats['notifications']} event notifications, {self.stats['throttled']} throttled checks, "
+                f"{self.stats['check_errors']} failed checks")
+
+
+def print_status(job: IngestionJob):
+    """on_status callback printing status changes in the knowledge base scripts' style"""
+    print(f"   [{datetime.now().strftime('%H:%M:%S')}] Job {job.job_id} ({job.data_source_id}): {job.status}")
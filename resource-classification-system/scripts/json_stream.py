@@ -0,0 +1,232 @@
+"""
+Streaming JSON Array I/O
+Reads and writes large top-level JSON arrays one element at a time, so files can
+be consumed and produced as streams without holding the whole list in memory
+
+The output is byte-for-byte what json.dump(list, f, indent=...) would write.
+JsonArrayWriter writes to a temporary file and only replaces the target once
+the array is complete, so a crashed run never leaves a truncated file that
+still parses.
+Reading uses ijson when it is installed and an incremental stdlib decoder
+otherwise; either way memory is bounded by the largest single element.
+
+USAGE:
+    for item in read_json_array('data/cached/web_scraper_content.json'):
+        ...
+
+    count = write_json_array('output/dynamodb_resources.json', items)
+
+    with JsonArrayWriter('output/encephalitis_content_database.json') as writer:
+        for result in results:
+            writer.write(result)
+
+    # Chunks for a streamed HTTP response (array nested one level deep)
+    chunks = iter_json_array(results, level=1)
+"""
+
+import json
+import os
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Bytes read from disk per step by the stdlib reader
+READ_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def _read_json_array_stdlib(f, chunk_size: int) -> Iterator[Any]:
+    """Incrementally decode a top-level array from a text file object"""
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Advance to the next significant character; False at end of input"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[pos] != '[':
+        raise ValueError("Expected a top-level JSON array")
+    pos += 1
+
+    expect_value = None  # None = first element (or immediate ']')
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buffer[pos]
+        if char == ']' and expect_value is not True:
+            return
+        if expect_value is False:
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' at offset {pos} of buffer")
+            pos += 1
+            expect_value = True
+            continue
+
+        # Decode one element, reading more input until it is complete. A number
+        # cut off by the buffer end still decodes (as a shorter number), so a
+        # value is only accepted once a delimiter follows it (or at EOF).
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+                if eof or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not fill():
+                item, end = _decoder.raw_decode(buffer, pos)
+                break
+
+        pos = end
+        expect_value = False
+        yield item
+
+        # Drop consumed text so the buffer never holds more than one element
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def read_json_array(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Stream the elements of a file containing a top-level JSON array
+
+    Args:
+        path: JSON file
+        chunk_size: Bytes read per step (stdlib reader only)
+
+    Yields:
+        Array elements in file order
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _read_json_array_stdlib(f, chunk_size)
+
+
+def _format_element(item: Any, first: bool, indent: Optional[int], ensure_ascii: bool, level: int = 0) -> str:
+    """Text for one array element, including its leading separator"""
+    text = json.dumps(item, indent=indent, ensure_ascii=ensure_ascii)
+
+    if indent is None:
+        return ('' if first else ', ') + text
+
+    pad = ' ' * (indent * (level + 1))
+    return ('\n' if first else ',\n') + pad + text.replace('\n', '\n' + pad)
+
+
+def _close_array(count: int, indent: Optional[int], level: int = 0) -> str:
+    """Closing bracket (on its own line when indented and non-empty)"""
+    if count and indent is not None:
+        return '\n' + ' ' * (indent * level) + ']'
+    return ']'
+
+
+def iter_json_array(items: Iterable[Any], indent: Optional[int] = 2, ensure_ascii: bool = True, level: int = 0) -> Iterator[str]:
+    """
+    Yield a JSON array as text chunks, one per element
+
+    Args:
+        items: Elements to encode
+        indent: Same meaning as for json.dumps
+        ensure_ascii: Same meaning as for json.dumps
+        level: Nesting depth of the array (e.g. 1 for a value inside a top-level object)
+    """
+    yield '['
+    count = 0
+    for item in items:
+        yield _format_element(item, count == 0, indent, ensure_ascii, level)
+        count += 1
+    yield _close_array(count, indent, level)
+
+
+class JsonArrayWriter:
+    """
+    Incrementally writes a top-level JSON array
+
+    Elements go to `<path>.tmp`, which is renamed over `path` when the block
+    exits cleanly; if it raises, the temporary file is removed and any
+    previous `path` is left untouched.
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = 2, ensure_ascii: bool = True):
+        """
+        Initialize writer
+
+        Args:
+            path: Output file
+            indent: Same meaning as for json.dump (None = compact)
+            ensure_ascii: Same meaning as for json.dump
+        """
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._file = None
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        self._file.write('[')
+        return self
+
+    def write(self, item: Any):
+        """Append one element"""
+        self._file.write(_format_element(item, self.count == 0, self.indent, self.ensure_ascii))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write(_close_array(self.count, self.indent))
+        finally:
+            self._file.close()
+            self._file = None
+
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+        return False
+
+
+def write_json_array(path: str, items: Iterable[Any], indent: Optional[int] = 2, ensure_ascii: bool = True) -> int:
+    """
+    Write an iterable as a JSON array
+
+    Returns:
+        Number of elements written
+    """
+    with JsonArrayWriter(path, indent=indent, ensure_ascii=ensure_ascii) as writer:
+        for item in items:
+            writer.write(item)
+    return writer.count
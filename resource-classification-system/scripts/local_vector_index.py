@@ -0,0 +1,460 @@
+"""
+Local Vector Index
+Searches the Knowledge Base documents on local disk, without the network
+round trip to the managed Knowledge Base
+
+FEATURES:
+- Built from the same documents (text + metadata) the Knowledge Base ingests
+  (BedrockKnowledgeBaseManager.iter_kb_documents)
+- Exact cosine search: one NumPy matrix-vector product over normalised float32
+  embeddings (brute force is faster than an ANN index at our corpus size)
+- Embeddings memory-mapped from disk, so loading takes milliseconds (Lambda
+  cold starts) and pages are shared between processes
+- Document texts stay on disk (JSON lines plus an offset table) and are only
+  read for the results returned; keys and metadata are held for filtering
+- Built in one streaming pass: texts are written as they arrive and
+  embeddings go straight into a float32 matrix
+- Metadata filters in the Bedrock retrieval filter format (equals, in,
+  stringContains, andAll, orAll, ... - e.g. KnowledgeBaseQuery._build_filter)
+- Results shaped like Bedrock retrievalResults (content, location, metadata, score)
+- Pluggable embedders: Titan via Bedrock for production, a deterministic
+  hashing embedder for offline runs and tests
+
+USAGE:
+    embedder = BedrockTitanEmbedder(region_name='us-west-2')
+    LocalVectorIndex.build(manager.iter_kb_documents(), embedder, 'output/kb_index')
+
+    index = LocalVectorIndex.load('output/kb_index')
+    results = index.search("memory problems after encephalitis", max_results=5,
+                           filter={'equals': {'key': 'source_type', 'value': 'web'}})
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+DOCUMENTS_FILE = 'documents.json'        # per row: key and metadata
+TEXTS_FILE = 'texts.jsonl'               # per row: the text as a JSON string
+TEXT_OFFSETS_FILE = 'text_offsets.npy'   # byte offset of each line in TEXTS_FILE
+INDEX_INFO_FILE = 'index.json'
+
+_WORD = re.compile(r'\w+')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The local vector index requires numpy (pip install numpy)")
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder: signed feature hashing of words and word pairs
+
+    No model or network needed, so indexes built with it are reproducible -
+    for tests, offline development and as a keyword-level fallback.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dimensions: int = 512):
+        """
+        Args:
+            dimensions: Embedding size
+        """
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> Iterable[str]:
+        words = _WORD.findall(text.lower())
+        yield from words
+        for first, second in zip(words, words[1:]):
+            yield f"{first} {second}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts (L2-normalised vectors)"""
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimensions
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'big')
+                vector[value % self.dimensions] += 1.0 if value & (1 << 63) else -1.0
+            norm = sum(x * x for x in vector) ** 0.5 or 1.0
+            vectors.append([x / norm for x in vector])
+        return vectors
+
+    def spec(self) -> Dict[str, Any]:
+        """Settings stored with an index, to recreate the embedder for queries"""
+        return {'name': self.name, 'dimensions': self.dimensions}
+
+
+class BedrockTitanEmbedder:
+    """
+    Amazon Titan text embeddings via Bedrock (the Knowledge Base's own model)
+    """
+
+    name = 'bedrock-titan'
+
+    def __init__(self, model_id: str = 'amazon.titan-embed-text-v2:0', dimensions: int = 1024,
+                 region_name: str = 'us-west-2', bedrock_client=None):
+        """
+        Args:
+            model_id: Titan embedding model
+            dimensions: Embedding size (256, 512 or 1024 for Titan v2)
+            region_name: AWS region
+            bedrock_client: bedrock-runtime client to use (default: a new one)
+        """
+        if bedrock_client is None and boto3 is None:
+            raise ImportError("BedrockTitanEmbedder requires boto3 (pip install boto3)")
+
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.region = region_name
+        self.bedrock = bedrock_client or boto3.client('bedrock-runtime', region_name=region_name)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts (one Bedrock call each; Titan returns normalised vectors)"""
+        vectors = []
+        for text in texts:
+            response = self.bedrock.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps({'inputText': text[:50000], 'dimensions': self.dimensions, 'normalize': True}),
+                contentType='application/json',
+                accept='application/json'
+            )
+            vectors.append(json.loads(response['body'].read())['embedding'])
+        return vectors
+
+    def spec(self) -> Dict[str, Any]:
+        """Settings stored with an index, to recreate the embedder for queries"""
+        return {'name': self.name, 'dimensions': self.dimensions, 'model_id': self.model_id}
+
+
+EMBEDDERS = {
+    HashingEmbedder.name: HashingEmbedder,
+    BedrockTitanEmbedder.name: BedrockTitanEmbedder,
+}
+
+
+def embedder_from_spec(spec: Dict[str, Any], region_name: str = 'us-west-2'):
+    """Recreate the embedder an index was built with"""
+    name = spec.get('name')
+    if name == HashingEmbedder.name:
+        return HashingEmbedder(dimensions=spec['dimensions'])
+    if name == BedrockTitanEmbedder.name:
+        return BedrockTitanEmbedder(model_id=spec['model_id'], dimensions=spec['dimensions'], region_name=region_name)
+    raise ValueError(f"Unknown embedder '{name}' (choose from: {', '.join(EMBEDDERS)})")
+
+
+def _values(value: Any) -> List[str]:
+    """Metadata value as a list (comma-joined tag fields are split)"""
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [item for item in str(value).split(',') if item]
+
+
+def matches_filter(metadata: Dict[str, Any], condition: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Bedrock retrieval filter against a document's metadata
+
+    Supports equals, notEquals, greaterThan(OrEquals), lessThan(OrEquals), in,
+    notIn, startsWith, stringContains, listContains, andAll and orAll, with
+    the same semantics as the managed Knowledge Base.
+    """
+    if not condition:
+        return True
+
+    operator, operand = next(iter(condition.items()))
+    if operator == 'andAll':
+        return all(matches_filter(metadata, item) for item in operand)
+    if operator == 'orAll':
+        return any(matches_filter(metadata, item) for item in operand)
+
+    key, expected = operand['key'], operand['value']
+    if key not in metadata:
+        return operator in ('notEquals', 'notIn')
+    actual = metadata[key]
+
+    if operator == 'equals':
+        return actual == expected
+    if operator == 'notEquals':
+        return actual != expected
+    if operator == 'in':
+        return actual in expected
+    if operator == 'notIn':
+        return actual not in expected
+    if operator == 'startsWith':
+        return str(actual).startswith(str(expected))
+    if operator == 'stringContains':
+        return str(expected) in str(actual)
+    if operator == 'listContains':
+        return str(expected) in _values(actual)
+    if operator in ('greaterThan', 'greaterThanOrEquals', 'lessThan', 'lessThanOrEquals'):
+        try:
+            actual, expected = float(actual), float(expected)
+        except (TypeError, ValueError):
+            return False
+        return {
+            'greaterThan': actual > expected,
+            'greaterThanOrEquals': actual >= expected,
+            'lessThan': actual < expected,
+            'lessThanOrEquals': actual <= expected,
+        }[operator]
+    raise ValueError(f"Unsupported filter operator '{operator}'")
+
+
+class _TextFile:
+    """
+    Document texts read on demand from TEXTS_FILE through its offset table
+    """
+
+    def __init__(self, path: Path, offsets):
+        self.path = path
+        self.offsets = offsets
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, row: int) -> str:
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            self._file.seek(int(self.offsets[row]))
+            line = self._file.readline()
+        return json.loads(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class LocalVectorIndex:
+    """
+    Memory-mapped embedding matrix plus document metadata, with texts on disk
+    """
+
+    def __init__(self, embeddings, documents: List[Dict[str, Any]], info: Dict[str, Any], embedder=None,
+                 texts=None):
+        """
+        Use LocalVectorIndex.load() or LocalVectorIndex.build() rather than this directly
+
+        Args:
+            embeddings: (documents x dimensions) float32 matrix of normalised vectors
+            documents: Per row: key and metadata (and text, if texts is None)
+            info: Index settings (embedder spec, counts, build time)
+            embedder: Embeds queries (default: recreated from info)
+            texts: Row -> text lookup (default: each document's 'text')
+        """
+        _require_numpy()
+        self.embeddings = embeddings
+        self.documents = documents
+        self.info = info
+        self._embedder = embedder
+        self._texts = texts
+        self.stats = {'queries': 0, 'search_seconds': 0.0}
+
+    def text(self, row: int) -> str:
+        """Text of the document in a row"""
+        if self._texts is None:
+            return self.documents[row].get('text', '')
+        return self._texts[row]
+
+    @property
+    def embedder(self):
+        """Query embedder (created on first use, so loading needs no client)"""
+        if self._embedder is None:
+            self._embedder = embedder_from_spec(self.info['embedder'], self.info.get('region', 'us-west-2'))
+        return self._embedder
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Dict[str, Any]]], embedder, index_dir: str,
+              batch_size: int = 64, region_name: str = 'us-west-2') -> 'LocalVectorIndex':
+        """
+        Embed documents and write the index to disk
+
+        Args:
+            documents: (key, {'text', 'metadata'}) pairs, e.g. iter_kb_documents()
+            embedder: Embedder for the document texts (also used for queries)
+            index_dir: Output directory
+            batch_size: Texts per embed() call
+            region_name: AWS region stored for recreating a Bedrock embedder
+
+        Returns:
+            The loaded index
+        """
+        _require_numpy()
+        start_time = time.time()
+        index_path = Path(index_dir)
+        index_path.mkdir(parents=True, exist_ok=True)
+
+        rows = []
+        offsets = []
+        # Embeddings are written straight into a float32 matrix (grown by doubling)
+        matrix = np.empty((max(batch_size, 1024), embedder.dimensions), dtype=np.float32)
+        count = 0
+        batch = []
+
+        def flush():
+            nonlocal matrix, count
+            if not batch:
+                return
+            vectors = np.asarray(embedder.embed(batch), dtype=np.float32).reshape(len(batch), embedder.dimensions)
+            if count + len(batch) > len(matrix):
+                grown = np.empty((max(len(matrix) * 2, count + len(batch)), embedder.dimensions), dtype=np.float32)
+                grown[:count] = matrix[:count]
+                matrix = grown
+            matrix[count:count + len(batch)] = vectors
+            count += len(batch)
+            batch.clear()
+
+        # Write to temporary names first, so readers never see a half-written index
+        texts_tmp = index_path / f"{TEXTS_FILE}.tmp"
+        with open(texts_tmp, 'wb') as texts_file:
+            for key, document in documents:
+                text = document.get('text', '')
+                offsets.append(texts_file.tell())
+                texts_file.write(json.dumps(text, ensure_ascii=False).encode('utf-8') + b'\n')
+                rows.append({'key': key, 'metadata': document.get('metadata', {})})
+                batch.append(text)
+                if len(batch) >= batch_size:
+                    flush()
+                    print(f"   Embedded {count} documents...")
+            flush()
+
+        matrix = matrix[:count]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        info = {
+            'created_at': datetime.now().isoformat(),
+            'document_count': len(rows),
+            'dimensions': embedder.dimensions,
+            'embedder': embedder.spec(),
+            'region': region_name,
+        }
+
+        np.save(index_path / f"{EMBEDDINGS_FILE}.tmp.npy", matrix)
+        np.save(index_path / f"{TEXT_OFFSETS_FILE}.tmp.npy", np.asarray(offsets, dtype=np.int64))
+        with open(index_path / f"{DOCUMENTS_FILE}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False)
+        with open(index_path / f"{INDEX_INFO_FILE}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+        (index_path / f"{EMBEDDINGS_FILE}.tmp.npy").replace(index_path / EMBEDDINGS_FILE)
+        (index_path / f"{TEXT_OFFSETS_FILE}.tmp.npy").replace(index_path / TEXT_OFFSETS_FILE)
+        texts_tmp.replace(index_path / TEXTS_FILE)
+        (index_path / f"{DOCUMENTS_FILE}.tmp").replace(index_path / DOCUMENTS_FILE)
+        (index_path / f"{INDEX_INFO_FILE}.tmp").replace(index_path / INDEX_INFO_FILE)
+
+        print(f"✅ Local index: {len(rows)} documents, {embedder.dimensions} dimensions "
+              f"({matrix.nbytes / 1024 / 1024:.1f} MB) in {time.time() - start_time:.1f}s -> {index_dir}")
+        return cls.load(index_dir, embedder=embedder)
+
+    @classmethod
+    def load(cls, index_dir: str, embedder=None) -> 'LocalVectorIndex':
+        """
+        Open an index written by build()
+
+        Args:
+            index_dir: Index directory
+            embedder: Query embedder (default: the one the index was built with)
+        """
+        _require_numpy()
+        index_path = Path(index_dir)
+        with open(index_path / INDEX_INFO_FILE, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        with open(index_path / DOCUMENTS_FILE, 'r', encoding='utf-8') as f:
+            documents = json.load(f)
+        embeddings = np.load(index_path / EMBEDDINGS_FILE, mmap_mode='r')
+
+        # Indexes built before texts moved out of DOCUMENTS_FILE keep them inline
+        texts = None
+        if (index_path / TEXTS_FILE).exists():
+            texts = _TextFile(index_path / TEXTS_FILE, np.load(index_path / TEXT_OFFSETS_FILE, mmap_mode='r'))
+
+        if embedder is not None and embedder.dimensions != info['dimensions']:
+            raise ValueError(f"Embedder has {embedder.dimensions} dimensions, index has {info['dimensions']}")
+        return cls(embeddings, documents, info, embedder, texts)
+
+    def embed_query(self, query: str):
+        """Normalised float32 query vector"""
+        vector = np.asarray(self.embedder.embed([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query: str, max_results: int = 5, filter: Optional[Dict[str, Any]] = None,
+               query_vector=None) -> List[Dict[str, Any]]:
+        """
+        Most similar documents to a query
+
+        Args:
+            query: Natural language query
+            max_results: Maximum number of results
+            filter: Bedrock retrieval filter (see matches_filter)
+            query_vector: Precomputed query embedding (skips embedding the query)
+
+        Returns:
+            Results shaped like Bedrock retrievalResults, best first; score is
+            the cosine similarity mapped to 0-1 as in the managed vector store
+        """
+        start_time = time.time()
+        vector = self.embed_query(query) if query_vector is None else np.asarray(query_vector, dtype=np.float32)
+
+        if filter:
+            rows = np.fromiter(
+                (i for i, document in enumerate(self.documents) if matches_filter(document['metadata'], filter)),
+                dtype=np.int64
+            )
+            similarities = self.embeddings[rows] @ vector if len(rows) else np.empty(0, dtype=np.float32)
+        else:
+            rows = None
+            similarities = self.embeddings @ vector
+
+        count = min(max_results, len(similarities))
+        if count <= 0:
+            best = np.empty(0, dtype=np.int64)
+        elif count < len(similarities):
+            best = np.argpartition(-similarities, count - 1)[:count]
+            best = best[np.argsort(-similarities[best], kind='stable')]
+        else:
+            best = np.argsort(-similarities, kind='stable')
+
+        results = []
+        for position in best:
+            row = int(rows[position]) if rows is not None else int(position)
+            document = self.documents[row]
+            results.append({
+                'content': {'text': self.text(row)},
+                'location': {'type': 'LOCAL', 'localLocation': {'key': document['key']}},
+                'metadata': document['metadata'],
+                'score': float((1.0 + similarities[position]) / 2.0)
+            })
+
+        self.stats['queries'] += 1
+        self.stats['search_seconds'] += time.time() - start_time
+        return results
+
+    def summary(self) -> str:
+        """One-line index summary"""
+        embedder = self.info['embedder']
+        return (f"Local index: {len(self)} documents, {self.info['dimensions']} dimensions "
+                f"({embedder['name']}), {self.stats['queries']} queries")
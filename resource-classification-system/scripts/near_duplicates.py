@@ -0,0 +1,265 @@
+"""
+Near-Duplicate Page Detection
+Finds pages whose text is nearly identical (paginated listings, tag archives,
+print views) so only one page per cluster is sent to Bedrock
+
+FEATURES:
+- MinHash signatures over word shingles (estimated Jaccard similarity)
+- LSH banding for candidate lookup, so each page is compared with a handful of
+  candidates instead of every page seen so far
+- Online clustering: the first page of a cluster is its representative, later
+  pages within the threshold join it - works on a stream of scraped pages
+- Representatives are classified; their classification is copied to members
+- Report of clusters and estimated tokens saved
+- NumPy used for signatures when installed (pure Python otherwise)
+
+USAGE:
+    detector = NearDuplicateDetector(threshold=0.9)
+
+    for page, classification, duration, duplicate_of in classify_with_duplicates(
+            pages, detector, classify_iter, key_fn=lambda p: p['url'], text_fn=page_text):
+        ...
+
+    print(detector.summary())
+    detector.save_report('temp/near_duplicates_report.json')
+"""
+
+import hashlib
+import json
+import random
+import re
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Mersenne prime 2^61 - 1: modulus of the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text: str, size: int = 5) -> List[int]:
+    """
+    32-bit hashes of the text's word shingles
+
+    Args:
+        text: Page text
+        size: Words per shingle (shorter texts give one shingle of all words)
+
+    Returns:
+        Distinct shingle hashes (empty for text without words)
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return []
+    if len(words) <= size:
+        grams = [' '.join(words)]
+    else:
+        grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return list({int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=4).digest(), 'big')
+                 for gram in grams})
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) for LSH banding
+
+    Picks the most selective banding (most rows per band) that still makes
+    a pair at the threshold a candidate with at least 95% probability.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= 0.95:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateDetector:
+    """
+    Online MinHash/LSH clustering of pages by text similarity
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize detector
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity for a duplicate (0-1)
+            num_perm: MinHash permutations (signature length)
+            shingle_size: Words per shingle
+            seed: Permutation seed (fixed, so results are reproducible)
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_bands(num_perm, threshold)
+
+        rng = random.Random(seed)
+        # a < 2^31 and hashes < 2^32 keep a*x + b inside uint64 for NumPy
+        self._a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        if np is not None:
+            self._a_np = np.array(self._a, dtype=np.uint64)
+            self._b_np = np.array(self._b, dtype=np.uint64)
+
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = defaultdict(list)
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self.clusters: Dict[str, List[str]] = {}
+
+        self.stats = {'pages': 0, 'representatives': 0, 'duplicates': 0, 'tokens_saved': 0}
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature of a text (None if it has no words)"""
+        hashes = shingles(text, self.shingle_size)
+        if not hashes:
+            return None
+
+        if np is not None:
+            values = np.array(hashes, dtype=np.uint64)[:, None]
+            return tuple(((values * self._a_np + self._b_np) % np.uint64(_PRIME)).min(axis=0).tolist())
+
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in zip(self._a, self._b))
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        """
+        Assign a page to a cluster
+
+        Args:
+            key: Page identifier (e.g. URL)
+            text: Page text
+
+        Returns:
+            Key of the representative the page duplicates, or None if the page
+            starts a new cluster (it is then its own representative)
+        """
+        self.stats['pages'] += 1
+        signature = self.signature(text)
+        if signature is None:
+            self.stats['representatives'] += 1
+            return None
+
+        best_key, best_similarity = None, self.threshold
+        candidates = {candidate for band_key in self._band_keys(signature) for candidate in self._buckets.get(band_key, ())}
+        for candidate in candidates:
+            similarity = self.similarity(signature, self._signatures[candidate])
+            if similarity >= best_similarity and (best_key is None or similarity > best_similarity):
+                best_key, best_similarity = candidate, similarity
+
+        if best_key is not None:
+            self.clusters[best_key].append(key)
+            self.stats['duplicates'] += 1
+            return best_key
+
+        self._signatures[key] = signature
+        self.clusters[key] = []
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].append(key)
+        self.stats['representatives'] += 1
+        return None
+
+    def summary(self) -> str:
+        """One-line summary for pipeline reports"""
+        clustered = len([members for members in self.clusters.values() if members])
+        return (f"Near-duplicates (similarity ≥ {self.threshold:.2f}): {self.stats['duplicates']} of "
+                f"{self.stats['pages']} pages reused a classification from {clustered} representatives "
+                f"(~{self.stats['tokens_saved']:,} input tokens saved)")
+
+    def report(self) -> Dict[str, Any]:
+        """Clusters with members, plus totals"""
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'threshold': self.threshold,
+            'num_perm': self.num_perm,
+            'shingle_size': self.shingle_size,
+            'stats': dict(self.stats),
+            'clusters': [
+                {'representative': representative, 'members': members}
+                for representative, members in self.clusters.items() if members
+            ]
+        }
+
+    def save_report(self, path: str):
+        """Write report() as JSON"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+
+def classify_with_duplicates(
+    items: Iterable[Any],
+    detector: NearDuplicateDetector,
+    classify_iter: Callable[[Iterable[Any]], Iterator[Tuple[Any, Any, float]]],
+    key_fn: Callable[[Any], str],
+    text_fn: Callable[[Any], str],
+    tokens_fn: Optional[Callable[[Any], int]] = None
+) -> Iterator[Tuple[Any, Any, float, Optional[str]]]:
+    """
+    Classify one representative per near-duplicate cluster
+
+    Items are read lazily; only representatives are passed on to
+    classify_iter. Each duplicate is yielded with its representative's
+    classification once that is known.
+
+    Args:
+        items: Items to classify
+        detector: Cluster state (shared across calls to dedupe across sources)
+        classify_iter: Classifies an iterable of items, yielding
+                       (item, classification, elapsed) in input order
+        key_fn: Item -> identifier
+        text_fn: Item -> text compared for similarity
+        tokens_fn: Item -> estimated prompt tokens (counted as saved for duplicates)
+
+    Yields:
+        Tuples of (item, classification, elapsed_seconds, duplicate_of) where
+        duplicate_of is the representative's key (None for representatives)
+    """
+    waiting = defaultdict(list)   # representative key -> duplicates awaiting its classification
+    classified = {}               # representative key -> classification
+    ready = deque()
+
+    def representatives():
+        for item in items:
+            representative = detector.add(key_fn(item), text_fn(item))
+            if representative is None:
+                yield item
+                continue
+
+            if tokens_fn:
+                detector.stats['tokens_saved'] += tokens_fn(item)
+            if representative in classified:
+                ready.append((item, classified[representative], 0.0, representative))
+            else:
+                waiting[representative].append(item)
+
+    for item, classification, elapsed in classify_iter(representatives()):
+        key = key_fn(item)
+        classified[key] = classification
+        yield item, classification, elapsed, None
+
+        for duplicate in waiting.pop(key, []):
+            yield duplicate, classification, 0.0, key
+        while ready:
+            yield ready.popleft()
+
+    while ready:
+        yield ready.popleft()
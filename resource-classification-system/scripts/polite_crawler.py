@@ -0,0 +1,259 @@
+"""
+Polite Concurrent Crawler
+Fetches many pages in parallel while staying within per-host politeness limits
+
+FEATURES:
+- Thread pool fetching with results returned in input order
+- Per-host concurrency limit (semaphore) and per-host token-bucket pacing
+- robots.txt support: disallowed URLs are skipped, Crawl-delay slows the host's bucket
+- One shared requests.Session with a pooled HTTPAdapter
+- Retry with exponential backoff on connection errors, 429 and 5xx
+  (Retry-After is honoured up to max_backoff; a longer one gives up on the
+  URL); every retry takes a token from the host's bucket, so retries never
+  exceed the per-host request rate
+
+USAGE:
+    crawler = PoliteCrawler(session, max_workers=8, per_host_limit=4, requests_per_second=2.0)
+
+    response = crawler.fetch('https://www.encephalitis.info/')
+
+    for url, page, elapsed in crawler.map_ordered(scrape_url, urls):
+        ...
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scripts.concurrent_executor import ConcurrentExecutor
+from scripts.rate_limiter import TokenBucket
+
+
+# Responses retried (with backoff) before giving up
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RobotsDisallowed(Exception):
+    """Raised when robots.txt disallows fetching a URL"""
+
+
+class _HostState:
+    """Politeness state for one scheme://host"""
+
+    def __init__(self, concurrency: int, rate: float):
+        self.semaphore = threading.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_lock = threading.Lock()
+
+
+class PoliteCrawler:
+    """
+    Concurrent HTTP fetcher with per-host concurrency, pacing and robots.txt rules
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        max_workers: int = 8,
+        per_host_limit: int = 4,
+        requests_per_second: float = 2.0,
+        respect_robots: bool = True,
+        retries: int = 3,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60.0,
+        timeout: int = 30
+    ):
+        """
+        Initialize crawler
+
+        Args:
+            session: Session to fetch with (its headers, e.g. User-Agent, are
+                     kept; a pooled adapter is mounted on it)
+            max_workers: Concurrent fetches across all hosts
+            per_host_limit: Concurrent fetches to any single host
+            requests_per_second: Request rate per host (lowered by robots.txt Crawl-delay)
+            respect_robots: Honour robots.txt Disallow and Crawl-delay rules
+            retries: Retries for connection errors and RETRY_STATUS_CODES
+            backoff_factor: Exponential backoff base in seconds (1, 2, 4, ...)
+            max_backoff: Longest wait before a retry, in seconds; a response
+                         asking for a longer Retry-After is not retried (the
+                         wait holds one of the host's concurrency slots)
+            timeout: Request timeout in seconds
+        """
+        self.session = session or requests.Session()
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.requests_per_second = requests_per_second
+        self.respect_robots = respect_robots
+        self.retries = max(0, int(retries))
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        # Retries are done in fetch (through the host's rate limiter), not by urllib3
+        retry = Retry(total=0, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.executor = ConcurrentExecutor(max_workers=self.max_workers)
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._hosts_lock = threading.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'errors': 0,
+            'robots_skipped': 0
+        }
+        self._stats_lock = threading.Lock()
+
+    @property
+    def user_agent(self) -> str:
+        return self.session.headers.get('User-Agent', '*')
+
+    def _host(self, url: str) -> Tuple[str, _HostState]:
+        """Politeness state for the URL's host (created on first use)"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._hosts_lock:
+            state = self._hosts.get(origin)
+            if state is None:
+                state = _HostState(self.per_host_limit, self.requests_per_second)
+                self._hosts[origin] = state
+        return origin, state
+
+    def _robots(self, origin: str, state: _HostState) -> RobotFileParser:
+        """
+        Fetch and parse the host's robots.txt once
+
+        Follows the standard library's rules: 401/403 disallow everything,
+        other errors (or an unreachable host) allow everything.
+        """
+        with state.robots_lock:
+            if state.robots is not None:
+                return state.robots
+
+            parser = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                response = self.session.get(parser.url, timeout=self.timeout)
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+                    parser.modified()
+            except requests.RequestException:
+                parser.allow_all = True
+
+            delay = parser.crawl_delay(self.user_agent)
+            if delay:
+                rate = min(self.requests_per_second, 1.0 / float(delay))
+                state.bucket.set_rate(rate)
+                print(f"   🤖 {origin}: robots.txt Crawl-delay {delay}s ({rate:.2f} requests/s)")
+
+            state.robots = parser
+            return parser
+
+    def allowed(self, url: str) -> bool:
+        """True if robots.txt permits fetching the URL (always True when robots are ignored)"""
+        if not self.respect_robots:
+            return True
+        origin, state = self._host(url)
+        return self._robots(origin, state).can_fetch(self.user_agent, url)
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        GET a URL within the host's concurrency and rate limits
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers (e.g. conditional request validators)
+
+        Returns:
+            Response (already checked with raise_for_status)
+
+        Raises:
+            RobotsDisallowed: If robots.txt disallows the URL
+            requests.RequestException: If the request fails after retries
+        """
+        origin, state = self._host(url)
+        if self.respect_robots and not self._robots(origin, state).can_fetch(self.user_agent, url):
+            with self._stats_lock:
+                self.stats['robots_skipped'] += 1
+            raise RobotsDisallowed(f"Disallowed by robots.txt: {url}")
+
+        with state.semaphore:
+            for attempt in range(self.retries + 1):
+                # Every attempt, retries included, waits for the host's rate limit
+                state.bucket.acquire()
+                with self._stats_lock:
+                    self.stats['requests'] += 1
+                try:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.retries:
+                        with self._stats_lock:
+                            self.stats['errors'] += 1
+                        raise
+                    delay = self._backoff(attempt)
+                else:
+                    retry_after = self._retry_after(response) if response.status_code in RETRY_STATUS_CODES else 0.0
+                    if (response.status_code not in RETRY_STATUS_CODES or attempt == self.retries
+                            or retry_after > self.max_backoff):
+                        try:
+                            response.raise_for_status()
+                        except requests.RequestException:
+                            with self._stats_lock:
+                                self.stats['errors'] += 1
+                            raise
+                        return response
+                    delay = max(self._backoff(attempt), retry_after)
+                    response.close()
+
+                with self._stats_lock:
+                    self.stats['retries'] += 1
+                time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff before retry number attempt + 1 (1, 2, 4, ... x backoff_factor, up to max_backoff)"""
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Seconds requested by a Retry-After header (delta-seconds or HTTP date), 0 if absent"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def map_ordered(self, fn: Callable[[str], Any], urls: Iterable[str]) -> Iterator[Tuple[str, Any, float]]:
+        """
+        Apply fn (which should call fetch) to every URL concurrently, in input order
+
+        Args:
+            fn: Function called with each URL (should handle its own errors)
+            urls: URLs - consumed lazily
+
+        Yields:
+            Tuples of (url, result, elapsed_seconds)
+        """
+        yield from self.executor.map_ordered(fn, urls)
@@ -21,13 +21,39 @@ USAGE:
     
     # RAG query (with generation)
     python3 scripts/query_knowledge_base.py "What helps with memory problems?" --rag
+    
+    # Search a local index instead of the managed Knowledge Base (no retrieve call)
+    python3 scripts/create_knowledge_base.py --build-local-index output/kb_index
+    python3 scripts/query_knowledge_base.py "support for caregivers" --local-index output/kb_index
+    
+    # Answers are cached (exact + semantically similar questions, until the TTL or
+    # the next ingestion job); --no-cache to always call Bedrock
+    python3 scripts/query_knowledge_base.py "memory problems" --cache-ttl 3600 --semantic-threshold 0.95
+    
+    # Batch mode: one query per line (or JSON objects with query/id/filters/max_results),
+    # retrieved concurrently and streamed to stdout as NDJSON
+    python3 scripts/query_knowledge_base.py --batch questions.txt --workers 8 > results.ndjson
+    cat questions.jsonl | python3 scripts/query_knowledge_base.py --batch - --persona caregiver
 """
 
 import boto3
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path so we can import from scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.local_vector_index import BedrockTitanEmbedder, LocalVectorIndex
+from scripts.retrieval_cache import RetrievalCache, normalise_query
+from scripts.bedrock_executor import is_throttling_error
+from scripts.concurrent_executor import ConcurrentExecutor
 
 
 class KnowledgeBaseQuery:
@@ -35,23 +61,101 @@ class KnowledgeBaseQuery:
     Query interface for Bedrock Knowledge Base
     """
     
-    def __init__(self, kb_id: str, region_name: str = 'us-west-2'):
+    def __init__(
+        self,
+        kb_id: str,
+        region_name: str = 'us-west-2',
+        local_index: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        cache_ttl: float = 86400,
+        semantic_threshold: Optional[float] = 0.95,
+        data_source_id: Optional[str] = None
+    ):
         """
         Initialize Knowledge Base query interface
         
         Args:
             kb_id: Knowledge Base ID
             region_name: AWS region
+            local_index: Directory of a LocalVectorIndex to serve retrieve()
+                         from instead of the managed Knowledge Base
+            cache_path: SQLite file for cached results (None = no cache)
+            cache_ttl: Seconds cached results stay valid
+            semantic_threshold: Query similarity for reusing another query's
+                                results (None = exact matches only)
+            data_source_id: Data source whose ingestion jobs invalidate the
+                            cache (default: all of the Knowledge Base's)
         """
         self.kb_id = kb_id
         self.region = region_name
+        self.data_source_id = data_source_id
         self.bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=region_name)
         self.bedrock_runtime = boto3.client('bedrock-runtime', region_name=region_name)
+        self.local_index = None
+        self.cache = None
         
-        print(f"✅ Connected to Knowledge Base: {kb_id}")
+        if local_index:
+            self.local_index = LocalVectorIndex.load(local_index)
+            print(f"✅ Loaded local index: {local_index}")
+            print(f"   {self.local_index.summary()}")
+        else:
+            print(f"✅ Connected to Knowledge Base: {kb_id}")
         print(f"   Region: {region_name}")
+        
+        if cache_path:
+            # Query embeddings for the semantic layer: the local index's own
+            # embedder, or small Titan vectors (one cheap call per new question)
+            embedder = None
+            if semantic_threshold is not None:
+                embedder = (self.local_index.embedder if self.local_index is not None
+                            else BedrockTitanEmbedder(dimensions=256, bedrock_client=self.bedrock_runtime))
+            self.cache = RetrievalCache(cache_path, ttl_seconds=cache_ttl,
+                                        semantic_threshold=semantic_threshold, embedder=embedder)
+            generation = self.knowledge_base_generation()
+            self.cache.set_generation(generation)
+            if generation is None:
+                print(f"   Cache: {cache_path} bypassed (Knowledge Base generation unknown)")
+            else:
+                print(f"   Cache: {cache_path} ({len(self.cache)} entries, generation {generation})")
         print()
     
+    def knowledge_base_generation(self) -> Optional[str]:
+        """
+        Identifier of the Knowledge Base contents: the latest completed
+        ingestion job per data source (the local index's build time when
+        searching locally)
+        
+        Returns:
+            Generation string, or None if it cannot be determined (the
+            cache is then bypassed, see RetrievalCache.set_generation)
+        """
+        if self.local_index is not None:
+            return f"local:{self.local_index.info.get('created_at', '')}"
+        
+        try:
+            bedrock_agent = boto3.client('bedrock-agent', region_name=self.region)
+            if self.data_source_id:
+                data_source_ids = [self.data_source_id]
+            else:
+                response = bedrock_agent.list_data_sources(knowledgeBaseId=self.kb_id)
+                data_source_ids = [source['dataSourceId'] for source in response.get('dataSourceSummaries', [])]
+            
+            job_ids = []
+            for data_source_id in data_source_ids:
+                response = bedrock_agent.list_ingestion_jobs(
+                    knowledgeBaseId=self.kb_id,
+                    dataSourceId=data_source_id,
+                    filters=[{'attribute': 'STATUS', 'operator': 'EQ', 'values': ['COMPLETE']}],
+                    sortBy={'attribute': 'STARTED_AT', 'order': 'DESCENDING'},
+                    maxResults=1
+                )
+                job_ids.extend(job['ingestionJobId'] for job in response.get('ingestionJobSummaries', []))
+            # No completed ingestion yet is a known (empty) generation
+            return ','.join(sorted(job_ids))
+        except Exception as e:
+            print(f"   ⚠️  Could not read ingestion jobs ({e}) - retrieval cache bypassed")
+            return None
+    
     def retrieve(
         self,
         query: str,
@@ -75,6 +179,56 @@ class KnowledgeBaseQuery:
             print(f"   Filters: {filters}")
         print()
         
+        try:
+            results, source = self._search(query, max_results, filters)
+        except Exception as e:
+            print(f"❌ Error querying Knowledge Base: {e}")
+            raise
+        
+        if source == 'local_index':
+            print(f"✅ Found {len(results)} results (local index)\n")
+        elif source == 'cache':
+            print(f"⚡ Found {len(results)} results (cached)\n")
+        else:
+            print(f"✅ Found {len(results)} results\n")
+        
+        # Format results
+        formatted_results = []
+        for idx, result in enumerate(results, 1):
+            formatted = self._format_result(result, idx)
+            formatted_results.append(formatted)
+        
+        return formatted_results
+    
+    def _search(
+        self,
+        query: str,
+        max_results: int,
+        filters: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Raw retrieval results, without console output
+        
+        Returns:
+            Tuple of (retrievalResults, source) where source is 'local_index',
+            'cache' or 'knowledge_base'
+        """
+        if self.local_index is not None:
+            # Same filter and result format as the managed Knowledge Base
+            results = self.local_index.search(
+                query,
+                max_results=max_results,
+                filter=self._build_filter(filters) if filters else None
+            )
+            return results, 'local_index'
+        
+        scope = None
+        if self.cache is not None:
+            scope = self.cache.scope('retrieve', kb_id=self.kb_id, filters=filters, max_results=max_results)
+            results = self.cache.get(query, scope)
+            if results is not None:
+                return results, 'cache'
+        
         # Build retrieval configuration
         retrieval_config = {
             'vectorSearchConfiguration': {
@@ -86,28 +240,97 @@ class KnowledgeBaseQuery:
         if filters:
             retrieval_config['vectorSearchConfiguration']['filter'] = self._build_filter(filters)
         
-        try:
-            response = self.bedrock_agent_runtime.retrieve(
-                knowledgeBaseId=self.kb_id,
-                retrievalQuery={'text': query},
-                retrievalConfiguration=retrieval_config
-            )
-            
-            results = response['retrievalResults']
-            
-            print(f"✅ Found {len(results)} results\n")
-            
-            # Format results
-            formatted_results = []
-            for idx, result in enumerate(results, 1):
-                formatted = self._format_result(result, idx)
-                formatted_results.append(formatted)
-            
-            return formatted_results
+        response = self.bedrock_agent_runtime.retrieve(
+            knowledgeBaseId=self.kb_id,
+            retrievalQuery={'text': query},
+            retrievalConfiguration=retrieval_config
+        )
+        
+        results = response['retrievalResults']
+        if self.cache is not None:
+            self.cache.put(query, scope, results)
+        return results, 'knowledge_base'
+    
+    def retrieve_many(
+        self,
+        queries: Iterable[Any],
+        max_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        max_workers: int = 8,
+        max_throttle_retries: int = 5
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Retrieve results for many queries concurrently, without console output
+        
+        Identical queries (same normalised text, filters and result count)
+        are retrieved once. Results come back in input order as soon as they
+        are ready; a failed query yields a record with an error instead of
+        stopping the batch.
+        
+        Args:
+            queries: Query strings, or dicts with 'query' and optional 'id',
+                     'filters' and 'max_results'
+            max_results: Default maximum results per query
+            filters: Default metadata filters
+            max_workers: Concurrent retrievals
+            max_throttle_retries: Retries per query when Bedrock throttles
             
-        except Exception as e:
-            print(f"❌ Error querying Knowledge Base: {e}")
-            raise
+        Yields:
+            Dicts with index, id, query, filters, max_results, results (as
+            returned by retrieve), source, seconds, duplicate_of (index of the
+            first identical query, or None) and error (None on success)
+        """
+        requests = []
+        first_index = {}
+        unique = []
+        for index, entry in enumerate(queries):
+            if isinstance(entry, str):
+                entry = {'query': entry}
+            request = {
+                'index': index,
+                'id': entry.get('id', index),
+                'query': entry['query'],
+                'filters': entry.get('filters', filters),
+                'max_results': entry.get('max_results', max_results)
+            }
+            key = (normalise_query(request['query']),
+                   json.dumps(request['filters'], sort_keys=True),
+                   request['max_results'])
+            request['duplicate_of'] = first_index.get(key)
+            if request['duplicate_of'] is None:
+                first_index[key] = index
+                unique.append(request)
+            requests.append(request)
+        
+        def run(request: Dict[str, Any]) -> Dict[str, Any]:
+            for attempt in range(max_throttle_retries + 1):
+                try:
+                    results, source = self._search(request['query'], request['max_results'], request['filters'])
+                    return {'results': [self._result_record(result) for result in results],
+                            'source': source, 'error': None}
+                except Exception as e:
+                    if is_throttling_error(e) and attempt < max_throttle_retries:
+                        time.sleep(min(20.0, 2 ** attempt) * (0.5 + random.random() / 2))
+                        continue
+                    return {'results': [], 'source': None, 'error': str(e)}
+        
+        outcomes = {}
+        position = 0
+        executor = ConcurrentExecutor(max_workers=max_workers)
+        for request, outcome, elapsed in executor.map_ordered(run, unique):
+            outcomes[request['index']] = dict(outcome, seconds=round(elapsed, 3))
+            # Emit every request (originals and their duplicates) that is now answered
+            while position < len(requests):
+                request = requests[position]
+                answered = outcomes.get(request['index'] if request['duplicate_of'] is None else request['duplicate_of'])
+                if answered is None:
+                    break
+                record = {key: request[key] for key in ('index', 'id', 'query', 'filters', 'max_results', 'duplicate_of')}
+                record.update(answered)
+                if request['duplicate_of'] is not None:
+                    record['seconds'] = 0.0
+                yield record
+                position += 1
     
     def retrieve_and_generate(
         self,
@@ -118,6 +341,9 @@ class KnowledgeBaseQuery:
         """
         Retrieve relevant documents and generate answer using RAG
         
+        The answer is printed as it is generated (see
+        retrieve_and_generate_stream); the result is returned once complete.
+        
         Args:
             query: Natural language question
             max_results: Maximum number of source documents
@@ -132,54 +358,38 @@ class KnowledgeBaseQuery:
         print()
         
         try:
-            response = self.bedrock_agent_runtime.retrieve_and_generate(
-                input={'text': query},
-                retrieveAndGenerateConfiguration={
-                    'type': 'KNOWLEDGE_BASE',
-                    'knowledgeBaseConfiguration': {
-                        'knowledgeBaseId': self.kb_id,
-                        'modelArn': f'arn:aws:bedrock:{self.region}::foundation-model/{model_id}',
-                        'retrievalConfiguration': {
-                            'vectorSearchConfiguration': {
-                                'numberOfResults': max_results
-                            }
-                        }
-                    }
-                }
-            )
+            done = None
+            started = False
+            for event in self.retrieve_and_generate_stream(query, max_results, model_id):
+                if event['type'] == 'text':
+                    if not started:
+                        print("✅ Generated Answer:\n")
+                        started = True
+                    print(event['text'], end='', flush=True)
+                elif event['type'] == 'done':
+                    done = event
             
-            # Extract answer and citations
-            answer = response['output']['text']
-            citations = response.get('citations', [])
+            if done.get('cached'):
+                print("\n\n⚡ Answer from cache")
+            else:
+                print(f"\n\n⏱️  First token after {done['first_token_seconds']:.2f}s, complete after {done['seconds']:.2f}s")
             
-            print("✅ Generated Answer:\n")
-            print(answer)
+            citations = done['citations']
             print("\n" + "="*80)
             print(f"SOURCES ({len(citations)} citations)")
             print("="*80 + "\n")
             
-            sources = []
             for idx, citation in enumerate(citations, 1):
-                for ref in citation.get('retrievedReferences', []):
-                    metadata = ref.get('metadata', {})
-                    content = ref.get('content', {}).get('text', '')
-                    
+                for source in self._citation_sources(citation):
                     print(f"Source {idx}:")
-                    print(f"  Title: {metadata.get('title', 'N/A')}")
-                    print(f"  URL: {metadata.get('url', 'N/A')}")
-                    print(f"  Excerpt: {content[:150]}...")
+                    print(f"  Title: {source['title'] or 'N/A'}")
+                    print(f"  URL: {source['url'] or 'N/A'}")
+                    print(f"  Excerpt: {source['content'][:150]}...")
                     print()
-                    
-                    sources.append({
-                        'title': metadata.get('title'),
-                        'url': metadata.get('url'),
-                        'content': content,
-                        'metadata': metadata
-                    })
             
             return {
-                'answer': answer,
-                'sources': sources,
+                'answer': done['answer'],
+                'sources': done['sources'],
                 'citations': citations
             }
             
@@ -187,6 +397,128 @@ class KnowledgeBaseQuery:
             print(f"❌ Error in RAG query: {e}")
             raise
     
+    def retrieve_and_generate_stream(
+        self,
+        query: str,
+        max_results: int = 5,
+        model_id: str = 'anthropic.claude-3-sonnet-20240229-v1:0'
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Retrieve relevant documents and stream the generated answer, without
+        console output
+        
+        Args:
+            query: Natural language question
+            max_results: Maximum number of source documents
+            model_id: LLM model for generation
+            
+        Yields:
+            Event dicts, by type:
+            - text: {'type', 'text'} - the next piece of the answer
+            - citation: {'type', 'citation', 'sources'} - as soon as Bedrock
+              attributes a span of the answer to retrieved documents
+            - done: {'type', 'answer', 'citations', 'sources', 'session_id',
+              'first_token_seconds', 'seconds', 'cached'} - always last
+        """
+        start_time = time.time()
+        
+        scope = None
+        if self.cache is not None:
+            scope = self.cache.scope('retrieve_and_generate', kb_id=self.kb_id, max_results=max_results, model_id=model_id)
+            cached = self.cache.get(query, scope)
+            if cached is not None:
+                answer = cached['output']['text']
+                citations = cached.get('citations', [])
+                yield {'type': 'text', 'text': answer}
+                for citation in citations:
+                    yield {'type': 'citation', 'citation': citation, 'sources': self._citation_sources(citation)}
+                yield {
+                    'type': 'done',
+                    'answer': answer,
+                    'citations': citations,
+                    'sources': [source for citation in citations for source in self._citation_sources(citation)],
+                    'session_id': None,
+                    'first_token_seconds': time.time() - start_time,
+                    'seconds': time.time() - start_time,
+                    'cached': True
+                }
+                return
+        
+        request = {
+            'input': {'text': query},
+            'retrieveAndGenerateConfiguration': {
+                'type': 'KNOWLEDGE_BASE',
+                'knowledgeBaseConfiguration': {
+                    'knowledgeBaseId': self.kb_id,
+                    'modelArn': f'arn:aws:bedrock:{self.region}::foundation-model/{model_id}',
+                    'retrievalConfiguration': {
+                        'vectorSearchConfiguration': {
+                            'numberOfResults': max_results
+                        }
+                    }
+                }
+            }
+        }
+        
+        parts = []
+        citations = []
+        first_token_seconds = None
+        session_id = None
+        
+        if hasattr(self.bedrock_agent_runtime, 'retrieve_and_generate_stream'):
+            response = self.bedrock_agent_runtime.retrieve_and_generate_stream(**request)
+            session_id = response.get('sessionId')
+            events = response['stream']
+        else:
+            # boto3 without the streaming API: one event with the whole answer
+            response = self.bedrock_agent_runtime.retrieve_and_generate(**request)
+            session_id = response.get('sessionId')
+            events = [{'output': response['output']}] + [{'citation': citation} for citation in response.get('citations', [])]
+        
+        for event in events:
+            if 'output' in event:
+                text = event['output'].get('text', '')
+                if not text:
+                    continue
+                if first_token_seconds is None:
+                    first_token_seconds = time.time() - start_time
+                parts.append(text)
+                yield {'type': 'text', 'text': text}
+            elif 'citation' in event:
+                # Stream events wrap the citation; older payloads are the citation itself
+                citation = event['citation'].get('citation') or event['citation']
+                citations.append(citation)
+                yield {'type': 'citation', 'citation': citation, 'sources': self._citation_sources(citation)}
+        
+        answer = ''.join(parts)
+        if self.cache is not None:
+            self.cache.put(query, scope, {'output': {'text': answer}, 'citations': citations})
+        
+        yield {
+            'type': 'done',
+            'answer': answer,
+            'citations': citations,
+            'sources': [source for citation in citations for source in self._citation_sources(citation)],
+            'session_id': session_id,
+            'first_token_seconds': first_token_seconds if first_token_seconds is not None else time.time() - start_time,
+            'seconds': time.time() - start_time,
+            'cached': False
+        }
+    
+    @staticmethod
+    def _citation_sources(citation: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Source documents referenced by one citation"""
+        sources = []
+        for ref in citation.get('retrievedReferences', []):
+            metadata = ref.get('metadata', {})
+            sources.append({
+                'title': metadata.get('title'),
+                'url': metadata.get('url'),
+                'content': ref.get('content', {}).get('text', ''),
+                'metadata': metadata
+            })
+        return sources
+    
     def _build_filter(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """Build metadata filter for retrieval"""
         # Convert simple filters to OpenSearch filter format
@@ -209,11 +541,24 @@ class KnowledgeBaseQuery:
         else:
             return {'andAll': filter_conditions}
     
+    @staticmethod
+    def _result_record(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Structured form of a single result (as returned by retrieve)"""
+        metadata = result.get('metadata', {})
+        return {
+            'score': result.get('score', 0),
+            'content': result.get('content', {}).get('text', ''),
+            'metadata': metadata,
+            'title': metadata.get('title'),
+            'url': metadata.get('url')
+        }
+    
     def _format_result(self, result: Dict[str, Any], index: int) -> Dict[str, Any]:
         """Format a single result for display"""
-        score = result.get('score', 0)
-        content = result.get('content', {}).get('text', '')
-        metadata = result.get('metadata', {})
+        record = self._result_record(result)
+        score = record['score']
+        content = record['content']
+        metadata = record['metadata']
         
         # Print result
         print(f"Result {index} (Relevance: {score:.3f})")
@@ -228,13 +573,7 @@ class KnowledgeBaseQuery:
         print(content[:300] + "..." if len(content) > 300 else content)
         print("="*80 + "\n")
         
-        return {
-            'score': score,
-            'content': content,
-            'metadata': metadata,
-            'title': metadata.get('title'),
-            'url': metadata.get('url')
-        }
+        return record
 
 
 def load_config() -> Dict[str, str]:
@@ -246,44 +585,119 @@ def load_config() -> Dict[str, str]:
     return {}
 
 
+def read_batch_queries(path: str) -> Iterator[Any]:
+    """Queries from a batch file: plain lines, or JSON objects with a 'query' field"""
+    with (contextlib.nullcontext(sys.stdin) if path == '-' else open(path, 'r', encoding='utf-8')) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line) if line.startswith('{') else line
+
+
+def build_filters(args) -> Dict[str, str]:
+    """Metadata filters from the --persona/--stage/--topic options"""
+    filters = {}
+    if args.persona:
+        filters['personas'] = f'persona:{args.persona}'
+    if args.stage:
+        filters['stages'] = f'stage:{args.stage}'
+    if args.topic:
+        filters['topics'] = f'topic:{args.topic}'
+    return filters
+
+
+def run_batch(args, config: Dict[str, str]):
+    """Batch mode: NDJSON results on stdout, progress on stderr"""
+    # Keep stdout clean for the NDJSON stream
+    with contextlib.redirect_stdout(sys.stderr):
+        kb_query = KnowledgeBaseQuery(
+            kb_id=config['knowledge_base_id'],
+            region_name=config.get('region', 'us-west-2'),
+            local_index=args.local_index,
+            cache_path=None if args.no_cache else args.cache_file,
+            cache_ttl=args.cache_ttl,
+            semantic_threshold=args.semantic_threshold or None,
+            data_source_id=config.get('data_source_id')
+        )
+    
+    queries = list(read_batch_queries(args.batch))
+    print(f"🔍 Batch: {len(queries)} queries, {args.workers} workers", file=sys.stderr)
+    
+    start_time = time.time()
+    counts = {'ok': 0, 'failed': 0, 'duplicates': 0}
+    for record in kb_query.retrieve_many(
+        queries,
+        max_results=args.max_results,
+        filters=build_filters(args) or None,
+        max_workers=args.workers
+    ):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        sys.stdout.flush()
+        counts['failed' if record['error'] else 'ok'] += 1
+        if record['duplicate_of'] is not None:
+            counts['duplicates'] += 1
+    
+    elapsed = time.time() - start_time
+    print(f"✅ {counts['ok']} answered ({counts['duplicates']} duplicates), {counts['failed']} failed "
+          f"in {elapsed:.1f}s ({len(queries) / max(elapsed, 1e-6):.1f} queries/s)", file=sys.stderr)
+    if kb_query.cache is not None:
+        print(f"⚡ {kb_query.cache.summary()}", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Query AWS Bedrock Knowledge Base for Encephalitis resources'
     )
-    parser.add_argument('query', nargs='+', help='Search query')
+    parser.add_argument('query', nargs='*', help='Search query')
+    parser.add_argument('--batch', help='File of queries (one per line or JSON objects; - for stdin), results as NDJSON')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent retrievals in batch mode')
     parser.add_argument('--max-results', type=int, default=5, help='Maximum number of results')
     parser.add_argument('--persona', help='Filter by persona (e.g., patient, caregiver)')
     parser.add_argument('--stage', help='Filter by journey stage (e.g., pre_diagnosis)')
     parser.add_argument('--topic', help='Filter by topic (e.g., memory, treatment)')
     parser.add_argument('--rag', action='store_true', help='Use RAG to generate answer')
     parser.add_argument('--model', default='anthropic.claude-3-sonnet-20240229-v1:0', help='Model for RAG')
+    parser.add_argument('--local-index', help='Search a local index directory instead of the Knowledge Base')
+    parser.add_argument('--no-cache', action='store_true', help='Always call Bedrock (skip the result cache)')
+    parser.add_argument('--cache-file', default='temp/kb_query_cache.db', help='Result cache database')
+    parser.add_argument('--cache-ttl', type=float, default=86400, help='Seconds cached results stay valid')
+    parser.add_argument('--semantic-threshold', type=float, default=0.95,
+                        help='Query similarity for reusing cached results (0 = exact matches only)')
     
     args = parser.parse_args()
+    if not args.query and not args.batch:
+        parser.error('a search query or --batch FILE is required')
     
     # Load configuration
     config = load_config()
+    if args.local_index and not args.rag:
+        config.setdefault('knowledge_base_id', 'local')
     if not config:
         print("❌ No Knowledge Base configuration found.")
         print("   Run: python3 scripts/create_knowledge_base.py --create")
         return
     
+    if args.batch:
+        run_batch(args, config)
+        return
+    
     # Initialize query interface
     kb_query = KnowledgeBaseQuery(
         kb_id=config['knowledge_base_id'],
-        region_name=config.get('region', 'us-west-2')
+        region_name=config.get('region', 'us-west-2'),
+        local_index=args.local_index,
+        cache_path=None if args.no_cache else args.cache_file,
+        cache_ttl=args.cache_ttl,
+        semantic_threshold=args.semantic_threshold or None,
+        data_source_id=config.get('data_source_id')
     )
     
     # Build query string
     query_text = ' '.join(args.query)
     
     # Build filters
-    filters = {}
-    if args.persona:
-        filters['personas'] = f'persona:{args.persona}'
-    if args.stage:
-        filters['stages'] = f'stage:{args.stage}'
-    if args.topic:
-        filters['topics'] = f'topic:{args.topic}'
+    filters = build_filters(args)
     
     # Execute query
     if args.rag:
@@ -313,6 +727,9 @@ def main():
         with open(output_file, 'w') as f:
             json.dump(results, f, indent=2)
         print(f"💾 Results saved to: {output_file}")
+    
+    if kb_query.cache is not None:
+        print(f"⚡ {kb_query.cache.summary()}")
 
 
 if __name__ == "__main__":
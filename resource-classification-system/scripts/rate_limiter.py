@@ -0,0 +1,96 @@
+"""
+Token Bucket Rate Limiting
+Thread-safe rate limiters shared by the Bedrock classification executor and the web scraper
+
+FEATURES:
+- Classic token bucket (burst capacity + steady refill rate)
+- Blocking acquire with optional timeout
+- Runtime rate adjustment (used for adaptive backoff on throttling)
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    `acquire(n)` blocks until n tokens are available, so callers are paced
+    without a fixed sleep between requests.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (default: one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill (lock must be held)"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate: float):
+        """Change the refill rate (capacity is left unchanged)"""
+        with self._lock:
+            self._refill()
+            self.rate = max(float(rate), 1e-6)
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Try to take tokens without blocking
+
+        Returns:
+            0.0 if the tokens were taken, otherwise the seconds to wait before retrying
+        """
+        # Requests larger than the bucket can never fit - let them through once full
+        amount = min(float(amount), self.capacity)
+
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until `amount` tokens are available
+
+        Args:
+            amount: Number of tokens to take
+            timeout: Maximum seconds to wait (default: wait forever)
+
+        Returns:
+            True if tokens were acquired, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait_time = self.try_acquire(amount)
+            if wait_time == 0.0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+
+            time.sleep(wait_time)
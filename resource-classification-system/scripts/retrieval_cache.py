@@ -0,0 +1,303 @@
+"""
+Retrieval Result Cache
+Two-level cache of Knowledge Base answers, so repeated (or reworded) staff and
+agent questions do not each cost a Bedrock retrieval or generation
+
+FEATURES:
+- Exact layer: normalised query text (case, whitespace, trailing punctuation)
+  plus filters, result count and model
+- Semantic layer: a new query reuses the results of an earlier query in the
+  same scope whose embedding is within a cosine similarity threshold
+- Entries expire after a TTL
+- Entries belong to a Knowledge Base generation (the latest ingestion job id):
+  after a new ingestion every older entry is a miss and is purged; while the
+  generation cannot be determined the cache is bypassed (nothing is read,
+  stored or purged)
+- SQLite file (stdlib only, WAL mode), shared between runs and threads
+- Hit-rate metrics per layer
+- Embedding failures (e.g. throttling) only degrade a lookup to the exact
+  layer; they never fail the retrieval the cache sits in front of
+- NumPy used for the similarity scan when installed (pure Python otherwise)
+
+USAGE:
+    cache = RetrievalCache('temp/kb_query_cache.db', ttl_seconds=86400,
+                           semantic_threshold=0.95, embedder=embedder)
+    cache.set_generation(latest_ingestion_job_id)
+
+    scope = cache.scope('retrieve', filters=filters, max_results=5)
+    hit = cache.get(query, scope)
+    if hit is None:
+        result = expensive_call(query)
+        cache.put(query, scope, result)
+    print(cache.summary())
+"""
+
+import array
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    generation TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding BLOB,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope, generation, created_at);
+"""
+
+_SPACES = re.compile(r'\s+')
+
+# Query embeddings of misses awaiting put(); the oldest are dropped beyond
+# this many (misses whose retrieval failed are never put)
+MAX_PENDING = 256
+
+
+def normalise_query(query: str) -> str:
+    """Query text as compared by the exact layer"""
+    return _SPACES.sub(' ', query.strip().lower()).rstrip('?!.').strip()
+
+
+class RetrievalCache:
+    """
+    SQLite-backed exact + semantic cache of retrieval results
+    """
+
+    def __init__(
+        self,
+        db_path: str = 'temp/kb_query_cache.db',
+        ttl_seconds: float = 86400,
+        semantic_threshold: Optional[float] = 0.95,
+        embedder=None,
+        max_entries: int = 5000
+    ):
+        """
+        Open (or create) the cache
+
+        Args:
+            db_path: SQLite database file
+            ttl_seconds: Age after which entries are ignored
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+                                (None disables the semantic layer)
+            embedder: Embeds queries for the semantic layer (see
+                      scripts.local_vector_index embedders)
+            max_entries: Oldest entries are evicted beyond this many
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold if embedder is not None else None
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.generation = ''
+        # Set while the Knowledge Base generation is unknown: lookups miss, nothing is stored
+        self.bypassed = False
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'stores': 0, 'invalidated': 0,
+                      'bypassed': 0, 'embed_errors': 0}
+        # Query embeddings of recent misses, reused by put()
+        self._pending: Dict[str, List[float]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def set_generation(self, generation: Optional[str]):
+        """
+        Tie the cache to a Knowledge Base generation (e.g. ingestion job id)
+
+        Entries from other generations are deleted. With None (generation
+        unknown, e.g. the lookup failed) the stored entries are left alone
+        and the cache is bypassed until a generation is set, since they may
+        or may not be stale.
+        """
+        if generation is None:
+            self.bypassed = True
+            return
+
+        self.bypassed = False
+        self.generation = generation
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM entries WHERE generation != ?", (self.generation,)
+            ).rowcount
+        self.stats['invalidated'] += deleted
+
+    @staticmethod
+    def scope(kind: str, **params: Any) -> str:
+        """
+        Cache scope: results are only shared between queries of the same scope
+
+        Args:
+            kind: Call type (e.g. 'retrieve', 'retrieve_and_generate')
+            params: Everything else that changes the result (filters, max_results, model)
+        """
+        return f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def _key(self, query: str, scope: str) -> str:
+        return hashlib.sha256(f"{scope}\n{normalise_query(query)}".encode('utf-8')).hexdigest()
+
+    def _embed(self, query: str) -> Optional[List[float]]:
+        """Normalised query embedding, or None if the embedder failed"""
+        try:
+            vector = list(self.embedder.embed([normalise_query(query)])[0])
+        except Exception as e:
+            with self._lock:
+                self.stats['embed_errors'] += 1
+            print(f"   ⚠️  Query embedding failed ({e}) - semantic cache layer skipped", file=sys.stderr)
+            return None
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        return [x / norm for x in vector]
+
+    def _remember(self, key: str, vector: List[float]):
+        """Keep a miss's embedding for put(), dropping the oldest beyond MAX_PENDING"""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = vector
+            while len(self._pending) > MAX_PENDING:
+                del self._pending[next(iter(self._pending))]
+
+    def _best_semantic(self, vector: List[float], rows: List[tuple]) -> Optional[tuple]:
+        """Row whose stored embedding is most similar to vector, if above the threshold"""
+        if not rows:
+            return None
+        if np is not None:
+            matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            similarities = matrix @ np.asarray(vector, dtype=np.float32)
+            best = int(similarities.argmax())
+            similarity = float(similarities[best])
+        else:
+            similarity, best = max(
+                (sum(x * y for x, y in zip(vector, array.array('f', row[1]))), i)
+                for i, row in enumerate(rows)
+            )
+        return rows[best] if similarity >= self.semantic_threshold else None
+
+    def get(self, query: str, scope: str) -> Optional[Any]:
+        """
+        Cached result for a query
+
+        Returns:
+            The stored result, or None on a miss
+        """
+        if self.bypassed:
+            with self._lock:
+                self.stats['bypassed'] += 1
+            return None
+
+        key = self._key(query, scope)
+        oldest = time.time() - self.ttl_seconds
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM entries WHERE key = ? AND generation = ? AND created_at >= ?",
+                (key, self.generation, oldest)
+            ).fetchone()
+        if row is not None:
+            self._hit(key, 'exact_hits')
+            return json.loads(row[0])
+
+        vector = self._embed(query) if self.semantic_threshold is not None else None
+        if vector is not None:
+            self._remember(key, vector)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, embedding, result FROM entries "
+                    "WHERE scope = ? AND generation = ? AND created_at >= ? AND embedding IS NOT NULL",
+                    (scope, self.generation, oldest)
+                ).fetchall()
+            match = self._best_semantic(vector, rows)
+            if match is not None:
+                with self._lock:
+                    self._pending.pop(key, None)
+                self._hit(match[0], 'semantic_hits')
+                return json.loads(match[2])
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def _hit(self, key: str, layer: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE entries SET hits = hits + 1 WHERE key = ?", (key,))
+            self.stats[layer] += 1
+
+    def put(self, query: str, scope: str, result: Any):
+        """Store the result of a query"""
+        if self.bypassed:
+            return
+
+        key = self._key(query, scope)
+        embedding = None
+        if self.semantic_threshold is not None:
+            with self._lock:
+                vector = self._pending.pop(key, None)
+            if vector is None:
+                vector = self._embed(query)
+            if vector is not None:
+                embedding = array.array('f', vector).tobytes()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, scope, generation, query, embedding, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, self.generation, normalise_query(query), embedding,
+                 json.dumps(result, ensure_ascii=False, default=str), time.time())
+            )
+            # Expired entries, then the oldest beyond max_entries
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.stats['stores'] += 1
+
+    def clear(self):
+        """Delete every entry"""
+        with self._lock, self._conn:
+            self.stats['invalidated'] += self._conn.execute("DELETE FROM entries").rowcount
+
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache (either layer)"""
+        hits = self.stats['exact_hits'] + self.stats['semantic_hits']
+        lookups = hits + self.stats['misses']
+        return hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        """One-line cache summary"""
+        semantic = (f"semantic ≥ {self.semantic_threshold:.2f}" if self.semantic_threshold is not None
+                    else "semantic layer off")
+        if self.bypassed:
+            return f"Retrieval cache: bypassed, Knowledge Base generation unknown ({self.stats['bypassed']} lookups)"
+        return (f"Retrieval cache: {self.hit_rate():.0%} hit rate ({self.stats['exact_hits']} exact, "
+                f"{self.stats['semantic_hits']} semantic, {self.stats['misses']} misses; {semantic})")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
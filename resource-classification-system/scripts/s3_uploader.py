@@ -0,0 +1,238 @@
+"""
+Parallel S3 Uploader
+Uploads many small documents concurrently, skipping the ones S3 already has
+
+FEATURES:
+- Thread pool uploads with a configurable parallelism level (one shared,
+  thread-safe boto3 client with a matching connection pool)
+- Unchanged documents skipped: the MD5 of each body is compared with the
+  ETag of the existing object (one paginated listing, no per-object HEAD)
+- Content-MD5 sent with every upload, so S3 rejects corrupted bodies
+- Throttling (SlowDown, 503) retried by botocore's adaptive mode, then with
+  exponential backoff on top
+- Batched deletes (delete_objects, 1,000 keys per request)
+- Progress reporting with upload rate
+
+Note: ETags only equal the MD5 for single-part uploads without SSE-KMS; with
+KMS encryption every document is simply re-uploaded.
+
+USAGE:
+    uploader = ParallelS3Uploader(bucket='encephalitis-kb-us-west-2', max_workers=16)
+    stored = uploader.upload(documents, prefix='knowledge-base/')  # (key, bytes) pairs -> {key: md5}
+    failed = uploader.delete(removed_keys)                # keys that could not be deleted
+    print(uploader.summary())
+"""
+
+import base64
+import hashlib
+import random
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from scripts.concurrent_executor import ConcurrentExecutor
+
+
+# S3 error codes worth retrying after botocore's own retries
+RETRYABLE_S3_ERRORS = {
+    'SlowDown',
+    'ServiceUnavailable',
+    'Throttling',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'RequestTimeout',
+    'InternalError',
+}
+
+
+def content_md5(body: bytes) -> Tuple[str, str]:
+    """(hex digest, base64 digest) of a body's MD5 - for ETag checks and Content-MD5"""
+    digest = hashlib.md5(body).digest()
+    return digest.hex(), base64.b64encode(digest).decode('ascii')
+
+
+class ParallelS3Uploader:
+    """
+    Concurrent put_object uploads with ETag-based skipping of unchanged documents
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region_name: str = 'us-west-2',
+        max_workers: int = 16,
+        max_retries: int = 3,
+        s3_client=None,
+        progress_every: int = 500
+    ):
+        """
+        Initialize uploader
+
+        Args:
+            bucket: Target bucket
+            region_name: AWS region
+            max_workers: Concurrent uploads
+            max_retries: Retries per document after botocore's own retries
+            s3_client: Client to use (default: one sized for max_workers with
+                       adaptive retries)
+            progress_every: Print progress every N documents
+        """
+        self.bucket = bucket
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.progress_every = progress_every
+
+        self.s3 = s3_client or boto3.client(
+            's3',
+            region_name=region_name,
+            config=Config(
+                max_pool_connections=self.max_workers,
+                retries={'max_attempts': 8, 'mode': 'adaptive'}
+            )
+        )
+        self.executor = ConcurrentExecutor(max_workers=self.max_workers)
+
+        self.stats = {'uploaded': 0, 'unchanged': 0, 'failed': 0, 'deleted': 0, 'retries': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def existing_etags(self, prefix: str = '') -> Dict[str, str]:
+        """
+        ETags (without quotes) of every object under a prefix
+
+        Returns:
+            Dict of key -> ETag (empty if the bucket cannot be listed)
+        """
+        etags = {}
+        try:
+            paginator = self.s3.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    etags[obj['Key']] = obj['ETag'].strip('"')
+        except ClientError as e:
+            print(f"   ⚠️  Could not list s3://{self.bucket}/{prefix} ({e}) - uploading everything")
+        return etags
+
+    def _put(self, key: str, body: bytes, md5_b64: str, content_type: str) -> bool:
+        """Upload one document, retrying throttling errors with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=body,
+                    ContentMD5=md5_b64,
+                    ContentType=content_type
+                )
+                return True
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                if code not in RETRYABLE_S3_ERRORS or attempt == self.max_retries:
+                    print(f"   ⚠️  Failed to upload document {key}: {e}")
+                    return False
+                with self._lock:
+                    self.stats['retries'] += 1
+                time.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random() / 2))
+            except Exception as e:
+                print(f"   ⚠️  Failed to upload document {key}: {e}")
+                return False
+        return False
+
+    def upload(
+        self,
+        documents: Iterable[Tuple[str, bytes]],
+        prefix: str = '',
+        content_type: str = 'application/json',
+        existing: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        """
+        Upload documents that are new or changed
+
+        Args:
+            documents: (key, body) pairs - consumed lazily
+            prefix: Key prefix to list for existing ETags
+            content_type: Content-Type of every document
+            existing: Known key -> ETag/MD5 map (listed under prefix if not given)
+
+        Returns:
+            Dict of key -> MD5 for every document now in S3 (uploaded or
+            already up to date); failed uploads are left out
+        """
+        if existing is None:
+            existing = self.existing_etags(prefix)
+
+        start_time = time.time()
+        print(f"   {self.max_workers} parallel uploads, {len(existing)} objects already under "
+              f"s3://{self.bucket}/{prefix}")
+
+        def changed() -> Iterator[Tuple[str, bytes, str, str]]:
+            for key, body in documents:
+                md5_hex, md5_b64 = content_md5(body)
+                if existing.get(key) == md5_hex:
+                    with self._lock:
+                        self.stats['unchanged'] += 1
+                    stored[key] = md5_hex
+                    continue
+                yield key, body, md5_hex, md5_b64
+
+        def put(document: Tuple[str, bytes, str, str]) -> bool:
+            key, body, _, md5_b64 = document
+            return self._put(key, body, md5_b64, content_type)
+
+        stored = {}
+        for count, ((key, body, md5_hex, _), ok, _) in enumerate(self.executor.map_ordered(put, changed()), 1):
+            with self._lock:
+                if ok:
+                    self.stats['uploaded'] += 1
+                    self.stats['bytes'] += len(body)
+                else:
+                    self.stats['failed'] += 1
+            if ok:
+                stored[key] = md5_hex
+
+            if count % self.progress_every == 0:
+                elapsed = time.time() - start_time
+                print(f"   Uploaded {self.stats['uploaded']} documents "
+                      f"({self.stats['unchanged']} unchanged skipped, "
+                      f"{self.stats['uploaded'] / max(elapsed, 1e-6):.0f}/s)...")
+
+        self.stats['seconds'] = time.time() - start_time
+        return stored
+
+    def delete(self, keys: List[str]) -> List[str]:
+        """
+        Delete objects in batches of 1,000
+
+        Returns:
+            Keys that could not be deleted (to be retried later)
+        """
+        failed = []
+        for i in range(0, len(keys), 1000):
+            batch = keys[i:i + 1000]
+            try:
+                response = self.s3.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except ClientError as e:
+                print(f"   ⚠️  Failed to delete {len(batch)} documents: {e}")
+                failed.extend(batch)
+                continue
+            for error in response.get('Errors', []):
+                print(f"   ⚠️  Failed to delete {error.get('Key')}: {error.get('Message')}")
+                failed.append(error.get('Key'))
+
+        with self._lock:
+            self.stats['deleted'] += len(keys) - len(failed)
+        return failed
+
+    def summary(self) -> str:
+        """One-line upload summary"""
+        seconds = self.stats.get('seconds', 0.0)
+        return (f"S3 upload: {self.stats['uploaded']} uploaded "
+                f"({self.stats['bytes'] / 1024 / 1024:.1f} MB), {self.stats['unchanged']} unchanged, "
+                f"{self.stats['deleted']} deleted, {self.stats['failed']} failed, {self.stats['retries']} throttling retries "
+                f"in {seconds:.1f}s")
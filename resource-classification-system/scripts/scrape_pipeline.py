@@ -0,0 +1,223 @@
+"""
+Fetch/Parse Scrape Pipeline
+Two-stage scraping: crawler threads download pages while a process pool parses
+them on every core, so network waits and HTML parsing overlap
+
+FEATURES:
+- Fetch stage: the polite crawler's thread pool (per-host limits, pacing,
+  robots.txt and retries all still apply)
+- Parse stage: ProcessPoolExecutor running the shared HTML extractors, so
+  parsing is not serialised by the GIL; workers are started with forkserver
+  (spawn where unavailable), never forked from a process with live threads
+- Bounded queue between the stages: when parsing (or the consumer, e.g.
+  classification) falls behind, fetching pauses - at most `queue_size` raw
+  pages are held in memory
+- Pages come out in input order as a lazy iterator, ready to be classified
+  while later pages are still downloading
+- Fetch functions may return an already-parsed page (e.g. an HTTP cache hit),
+  which skips the parse stage
+
+USAGE:
+    pipeline = ScrapePipeline(crawler, engine='lxml', parse_workers=4, queue_size=32)
+
+    def fetch(url):
+        response = crawler.fetch(url)
+        return ParseTask(url, response.content, response)
+
+    for url, page in pipeline.run(urls, fetch):
+        ...
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from scripts.html_extraction import EXTRACTORS
+
+
+class ParseTask(NamedTuple):
+    """A downloaded page waiting for the parse stage"""
+    url: str
+    content: bytes
+    context: Any = None  # handed back to on_parsed (e.g. the response, for caching)
+
+
+def _pool_context():
+    """
+    Start method for parse workers
+
+    Workers start lazily, while crawler threads are running; forking then
+    can copy locks held by those threads (e.g. in the connection pool), so
+    they come from a fork server (or are spawned) instead.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def parse_html(engine: str, url: str, content: bytes) -> Dict[str, Any]:
+    """
+    Parse one page into the scraper's page dict (process pool entry point)
+
+    Returns:
+        Dict with url, title, description, content and scraped_at
+    """
+    page = {'url': url}
+    page.update(EXTRACTORS[engine](content, url))
+    page['scraped_at'] = datetime.now().isoformat()
+    return page
+
+
+# Queue marker: the fetch stage has finished
+_DONE = object()
+
+
+class ScrapePipeline:
+    """
+    Fetch threads -> bounded queue -> process-pool parsing, in input order
+    """
+
+    def __init__(self, crawler, engine: str, parse_workers: Optional[int] = None, queue_size: int = 32):
+        """
+        Initialize pipeline
+
+        Args:
+            crawler: PoliteCrawler whose thread pool runs the fetch stage
+            engine: HTML extraction engine name (see scripts.html_extraction)
+            parse_workers: Parser processes (default: CPU count; 0 = parse on
+                           the consuming thread, no process pool)
+            queue_size: Maximum fetched pages waiting to be parsed and consumed
+        """
+        self.crawler = crawler
+        self.engine = engine
+        if parse_workers is None:
+            parse_workers = os.cpu_count() or 1
+        self.parse_workers = max(0, int(parse_workers))
+        self.queue_size = max(1, int(queue_size))
+
+        self.stats = {
+            'fetched': 0,
+            'parsed': 0,
+            'ready': 0,
+            'failed': 0,
+            'parse_seconds': 0.0,
+            'max_queue': 0
+        }
+
+    def _produce(self, urls: Iterable[str], fetch: Callable[[str], Any], pool: Optional[ProcessPoolExecutor],
+                 pages: queue.Queue, stop: threading.Event):
+        """Fetch stage: download pages and hand them to the parse stage"""
+        def put(item) -> bool:
+            # Blocks while the queue is full (backpressure), but gives up when
+            # the consumer has gone away
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for url, fetched, _ in self.crawler.map_ordered(fetch, urls):
+                if isinstance(fetched, ParseTask):
+                    self.stats['fetched'] += 1
+                    parsed = pool.submit(parse_html, self.engine, fetched.url, fetched.content) if pool else None
+                    item = (url, fetched, parsed)
+                else:
+                    item = (url, fetched, None)
+
+                if not put(item):
+                    return
+                self.stats['max_queue'] = max(self.stats['max_queue'], pages.qsize())
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    def _parse(self, task: ParseTask, parsed: Optional[Future]) -> Optional[Dict[str, Any]]:
+        """Parse stage result for one page (waits for the process pool)"""
+        start = time.time()
+        try:
+            if parsed is not None:
+                page = parsed.result()
+            else:
+                page = parse_html(self.engine, task.url, task.content)
+        except Exception as e:
+            print(f"  ❌ Error parsing {task.url}: {e}")
+            return None
+        finally:
+            self.stats['parse_seconds'] += time.time() - start
+        self.stats['parsed'] += 1
+        return page
+
+    def run(
+        self,
+        urls: Iterable[str],
+        fetch: Callable[[str], Any],
+        on_parsed: Optional[Callable[[ParseTask, Dict[str, Any]], None]] = None
+    ) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Scrape URLs through both stages
+
+        Args:
+            urls: URLs to scrape - consumed lazily
+            fetch: Called in a crawler thread with each URL; returns a ParseTask
+                   to parse, a ready page dict, or None on failure (should
+                   handle its own errors)
+            on_parsed: Called on the consuming thread with each ParseTask and its
+                       parsed page (e.g. to cache it)
+
+        Yields:
+            Tuples of (url, page) in input order (page is None on failure)
+        """
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=_pool_context()) if self.parse_workers else None
+
+        producer = threading.Thread(
+            target=self._produce,
+            args=(urls, fetch, pool, pages, stop),
+            name='scrape-fetch',
+            daemon=True
+        )
+        producer.start()
+
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                url, fetched, parsed = item
+                if isinstance(fetched, ParseTask):
+                    page = self._parse(fetched, parsed)
+                    if page is not None and on_parsed:
+                        on_parsed(fetched, page)
+                else:
+                    page = fetched
+                    if page is not None:
+                        self.stats['ready'] += 1
+
+                if page is None:
+                    self.stats['failed'] += 1
+                yield url, page
+        finally:
+            stop.set()
+            producer.join()
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def summary(self) -> str:
+        """One-line pipeline summary for pipeline reports"""
+        workers = f"{self.parse_workers} parser processes" if self.parse_workers else "inline parsing"
+        return (f"Scrape pipeline ({self.engine}, {workers}): {self.stats['parsed']} parsed, "
+                f"{self.stats['ready']} served without parsing, {self.stats['failed']} failed, "
+                f"peak queue {self.stats['max_queue']}/{self.queue_size}")